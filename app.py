@@ -1,12 +1,22 @@
 from flask import Flask, request, jsonify
+import numpy as np
 import pandas as pd
 import os
-from ml.data_utils import load_data, split_data
+from ml.data_utils import load_data, split_data, preprocessor_path, profile_data
 from ml.models import (
     train_algorithm, save_model, load_model, get_available_algorithms,
-    train_with_gridsearch, train_with_randomized_search
+    create_algorithm, train_algorithm_streaming
 )
-from ml.predict import predict, evaluate
+from ml.search import hyperparameter_search
+from ml.tuning import bayesian_search, study_path_for, is_valid_study_name
+from ml.predict import (
+    predict, evaluate, generate_prediction_report, read_prediction_rows, report_file_path,
+    REPORT_FORMATS
+)
+from ml.model_cache import model_cache, PRELOAD_MODELS
+from ml.data_cache import load_prepared_data, file_fingerprint
+from ml.batching import MicroBatcher, QueueFullError, BATCHING_ENABLED
+from ml.jobs import JobManager
 from ml.nlp_utils import TextClassifier, TextPreprocessor
 from ml.simple_nlp import SimpleNLP
 
@@ -18,6 +28,39 @@ os.makedirs("models", exist_ok=True)
 # تهيئة Simple NLP
 ll = SimpleNLP()
 
+# تحميل النماذج المحددة مسبقًا في الذاكرة المشتركة
+model_cache.warm(PRELOAD_MODELS)
+
+# تجميع طلبات التنبؤ في دفعات (اختياري عبر PEERAI_BATCHING=1)
+batcher = MicroBatcher() if BATCHING_ENABLED else None
+
+# مهام التدريب غير المتزامنة (عدد المهام المتزامنة عبر PEERAI_JOB_WORKERS)
+job_manager = JobManager()
+
+def _batched_model_predict(model_path):
+    """دالة دفعة: تنبؤ واحد على إطارات الطلبات المكدسة ثم تقسيم النتيجة"""
+    def run(frames):
+        model = model_cache.get(model_path)
+        X = pd.concat(frames, ignore_index=True)
+        predictions = np.asarray(predict(model, X))
+        bounds = np.cumsum([len(frame) for frame in frames])[:-1]
+        return np.split(predictions, bounds)
+    return run
+
+def _batched_nlp_predict(model_path):
+    """دالة دفعة: تنبؤ NLP واحد على نصوص كل الطلبات ثم تقسيم النتيجة"""
+    def run(text_lists):
+        classifier = TextClassifier(model_path=model_path)
+        results = classifier.predict([text for texts in text_lists for text in texts])
+        if isinstance(results, dict):
+            results = [results]
+        parts, start = [], 0
+        for texts in text_lists:
+            parts.append(results[start:start + len(texts)])
+            start += len(texts)
+        return parts
+    return run
+
 @app.route('/')
 def home():
     """الصفحة الرئيسية"""
@@ -37,6 +80,8 @@ def home():
             "/predict": "التنبؤ",
             "/nlp/train": "تدريب نموذج NLP",
             "/nlp/predict": "التنبؤ بـ NLP",
+            "/jobs/train": "تدريب غير متزامن ومتابعة تقدمه عبر /jobs/<id>",
+            "/reports": "تقرير تنبؤ بملف جانبي وقراءة صفوفه عبر /reports/<id>/rows",
             "/health": "حالة النظام"
         }
     })
@@ -64,62 +109,246 @@ def train():
         for field in required_fields:
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
+        if data.get('study_name') is not None and not is_valid_study_name(data['study_name']):
+            return jsonify({"error": "Invalid study_name: use letters, digits, '_' and '-' only"}), 400
+        if (data.get('use_bayesian_search') or data.get('search_type') == 'bayesian') and not data.get('search_space'):
+            return jsonify({"error": "Bayesian search needs a non-empty search_space"}), 400
         
-        # قراءة البيانات
-        df = load_data(data['data_path'])
+        return jsonify(run_training(data))
         
-        # تقسيم البيانات (للتجميع لا نحتاج y)
-        if data['task_type'] == 'clustering':
-            X_train = df
-            y_train = None
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _report(progress_callback, stage, **details):
+    """إبلاغ مرحلة التدريب الحالية (لمتابعة المهام غير المتزامنة)"""
+    if progress_callback is not None:
+        progress_callback({'stage': stage, **details})
+
+def run_training(data, progress_callback=None):
+    """
+    تنفيذ طلب التدريب (مشترك بين /train ومهام /jobs/train)
+    
+    Args:
+        data: معاملات الطلب
+        progress_callback: دالة تُستدعى بحالة التقدم (اختياري)
+        
+    Returns:
+        dict: نتيجة التدريب
+    """
+    # التدريب خارج الذاكرة للملفات الأكبر من الذاكرة
+    if data.get('streaming', False):
+        return _train_streaming(data, progress_callback)
+    
+    # قراءة البيانات وتقسيمها (للتجميع لا نحتاج y) مع إعادة استخدام النسخة المحفوظة
+    _report(progress_callback, 'loading_data')
+    X_train, X_test, y_train, y_test, preprocessor = load_prepared_data(
+        data['data_path'],
+        data['target'],
+        data['task_type'],
+        test_size=data.get('test_size', 0.2),
+        random_state=data.get('random_state', 42),
+        preprocess=data.get('preprocess', False),
+        use_cache=data.get('use_data_cache', True),
+        low_memory=data.get('low_memory', False)
+    )
+    
+    # معاملات إضافية للخوارزمية
+    algorithm_params = data.get('parameters', {})
+    
+    # نوع البحث: search_type أو الخيارات القديمة use_gridsearch/use_randomized_search
+    search_type = data.get('search_type')
+    default_n_iter = 10
+    if data.get('use_bayesian_search', False):
+        search_type = 'bayesian'
+    elif search_type is None and data.get('use_gridsearch', False):
+        search_type = 'grid'
+    elif search_type is None and data.get('use_randomized_search', False):
+        search_type = 'random'
+        # الافتراضي القديم لـ train_with_randomized_search
+        default_n_iter = 100
+    
+    # بصمة البيانات المقسمة (لحفظ نتائج البحث واستئناف الدراسات)
+    dataset_fingerprint = None
+    if search_type:
+        dataset_fingerprint = ':'.join(str(part) for part in (
+            file_fingerprint(data['data_path']), data['target'], data.get('test_size', 0.2),
+            data.get('random_state', 42), data.get('preprocess', False), data.get('low_memory', False)
+        ))
+    
+    # تدريب النموذج
+    search_info = None
+    if search_type == 'bayesian':
+        # بحث بايزي (TPE) مع دراسة محفوظة قابلة للاستئناف
+        model, search_info = bayesian_search(
+            X_train, y_train, data['algorithm'], data['task_type'],
+            data.get('search_space', {}),
+            n_trials=data.get('n_trials', 30),
+            cv=data.get('cv', 5),
+            scoring=data.get('scoring'),
+            n_jobs=data.get('n_jobs', 1),
+            study_path=study_path_for(data['algorithm'], data['task_type'],
+                                      data.get('study_name'), dataset_fingerprint),
+            dataset_fingerprint=dataset_fingerprint,
+            base_params=algorithm_params,
+            timeout=data.get('timeout'),
+            pruning=data.get('pruning', True),
+            progress_callback=progress_callback
+        )
+    elif search_type:
+        # البحث عن المعاملات دون تدريب نموذج أساسي مسبق
+        if search_type in ('random', 'halving_random'):
+            param_grid = data.get('param_distributions', data.get('param_grid', {}))
         else:
-            X_train, X_test, y_train, y_test = split_data(
-                df, 
-                data['target'], 
-                test_size=data.get('test_size', 0.2),
-                random_state=data.get('random_state', 42)
-            )
-        
-        # معاملات إضافية للخوارزمية
-        algorithm_params = data.get('parameters', {})
-        
-        # تدريب النموذج
-        if data.get('use_gridsearch', False):
-            # استخدام GridSearchCV
             param_grid = data.get('param_grid', {})
-            base_model = train_algorithm(X_train, y_train, data['algorithm'], data['task_type'], **algorithm_params)
-            model = train_with_gridsearch(X_train, y_train, base_model, param_grid, cv=data.get('cv', 5))
-        elif data.get('use_randomized_search', False):
-            # استخدام RandomizedSearchCV
-            param_distributions = data.get('param_distributions', {})
-            base_model = train_algorithm(X_train, y_train, data['algorithm'], data['task_type'], **algorithm_params)
-            model = train_with_randomized_search(X_train, y_train, base_model, param_distributions, n_iter=data.get('n_iter', 100), cv=data.get('cv', 5))
+        estimator = create_algorithm(data['algorithm'], data['task_type'], **algorithm_params)
+        model, search_info = hyperparameter_search(
+            estimator, X_train, y_train if data['task_type'] != 'clustering' else None,
+            param_grid,
+            search_type=search_type,
+            n_iter=data.get('n_iter', default_n_iter),
+            cv=data.get('cv', 5),
+            scoring=data.get('scoring'),
+            factor=data.get('factor', 3),
+            use_cache=data.get('use_search_cache', True),
+            dataset_fingerprint=dataset_fingerprint,
+            progress_callback=progress_callback
+        )
+    else:
+        # التدريب العادي
+        _report(progress_callback, 'training')
+        model = train_algorithm(X_train, y_train, data['algorithm'], data['task_type'], **algorithm_params)
+    
+    # حفظ النموذج
+    _report(progress_callback, 'saving')
+    model_path = f"models/{data['algorithm']}_{data['task_type']}_model.pkl"
+    save_model(model, model_path)
+    model_cache.invalidate(model_path)
+    
+    # حفظ المعالج بجانب النموذج (أو حذف معالج قديم لا يخص هذا النموذج)
+    pre_path = preprocessor_path(model_path)
+    if preprocessor is not None:
+        preprocessor.save(pre_path)
+    elif os.path.exists(pre_path):
+        os.remove(pre_path)
+    model_cache.invalidate(pre_path)
+    
+    # تقييم النموذج (للتجميع لا نحتاج تقييم)
+    _report(progress_callback, 'evaluating')
+    if data['task_type'] != 'clustering':
+        y_pred = predict(model, X_test)
+        evaluation = evaluate(y_test, y_pred, data['task_type'])
+    else:
+        evaluation = {"message": "Clustering model trained successfully"}
+    
+    response = {
+        "message": "Model trained successfully",
+        "algorithm": data['algorithm'],
+        "task_type": data['task_type'],
+        "model_path": model_path,
+        "evaluation": evaluation
+    }
+    if search_info is not None:
+        response["search"] = search_info
+    return response
+
+def _train_streaming(data, progress_callback=None):
+    """تدريب تدريجي على دفعات من الملف (للخوارزميات التي تدعم partial_fit)"""
+    model, info = train_algorithm_streaming(
+        data['data_path'],
+        data['target'],
+        data['algorithm'],
+        data['task_type'],
+        chunksize=data.get('chunksize', 10000),
+        progress_callback=progress_callback,
+        **data.get('parameters', {})
+    )
+    
+    # حفظ النموذج والمعالج معًا
+    model_path = f"models/{data['algorithm']}_{data['task_type']}_model.pkl"
+    save_model(model, model_path)
+    info['preprocessor'].save(preprocessor_path(model_path))
+    model_cache.invalidate(model_path)
+    model_cache.invalidate(preprocessor_path(model_path))
+    
+    scores = [entry['score'] for entry in info['history'] if entry['score'] is not None]
+    return {
+        "message": "Model trained successfully (streaming)",
+        "algorithm": data['algorithm'],
+        "task_type": data['task_type'],
+        "model_path": model_path,
+        "evaluation": {
+            "n_rows": info['n_rows'],
+            "n_chunks": len(info['history']),
+            "final_progressive_score": scores[-1] if scores else None,
+            "history": info['history']
+        }
+    }
+
+# =============================================================================
+# مهام التدريب غير المتزامنة
+# =============================================================================
+
+@app.route('/jobs/train', methods=['POST'])
+def submit_training_job():
+    """إضافة مهمة تدريب تعيد معرفها فورًا (kind: 'train' أو 'nlp')"""
+    try:
+        data = request.json
+        kind = data.get('kind', 'train')
+        
+        if kind == 'nlp':
+            required_fields = ['data_path', 'text_column', 'target_column']
+            runner = run_nlp_training
+        elif kind == 'train':
+            required_fields = ['data_path', 'target', 'algorithm', 'task_type']
+            runner = run_training
         else:
-            # التدريب العادي
-            model = train_algorithm(X_train, y_train, data['algorithm'], data['task_type'], **algorithm_params)
+            return jsonify({"error": f"Unknown job kind: {kind}"}), 400
         
-        # حفظ النموذج
-        model_path = f"models/{data['algorithm']}_{data['task_type']}_model.pkl"
-        save_model(model, model_path)
-        
-        # تقييم النموذج (للتجميع لا نحتاج تقييم)
-        if data['task_type'] != 'clustering':
-            y_pred = predict(model, X_test)
-            evaluation = evaluate(y_test, y_pred)
-        else:
-            evaluation = {"message": "Clustering model trained successfully"}
+        for field in required_fields:
+            if field not in data:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+        if data.get('study_name') is not None and not is_valid_study_name(data['study_name']):
+            return jsonify({"error": "Invalid study_name: use letters, digits, '_' and '-' only"}), 400
+        if (data.get('use_bayesian_search') or data.get('search_type') == 'bayesian') and not data.get('search_space'):
+            return jsonify({"error": "Bayesian search needs a non-empty search_space"}), 400
         
+        job = job_manager.submit(kind, runner, data)
         return jsonify({
-            "message": "Model trained successfully",
-            "algorithm": data['algorithm'],
-            "task_type": data['task_type'],
-            "model_path": model_path,
-            "evaluation": evaluation
-        })
-        
+            "message": "Training job submitted",
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}"
+        }), 202
+        
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """حالة المهمة وتقدمها ونتيجتها النهائية"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """إلغاء مهمة"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}"}), 404
+    return jsonify({"message": "Cancellation requested", "job_id": job.id, "status": job.status})
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """قائمة المهام (مع تصفية اختيارية بالحالة)"""
+    return jsonify({
+        "jobs": job_manager.list(request.args.get('status')),
+        "stats": job_manager.stats()
+    })
+
 @app.route('/predict', methods=['POST'])
 def predict_api():
     """التنبؤ"""
@@ -130,23 +359,84 @@ def predict_api():
         if 'model_path' not in data or 'features' not in data:
             return jsonify({"error": "Missing required fields: model_path and features"}), 400
         
-        # تحميل النموذج
-        model = load_model(data['model_path'])
+        # تحميل النموذج (من الذاكرة المؤقتة إن أمكن)
+        model = model_cache.get(data['model_path'])
         
         # تحويل البيانات إلى DataFrame
         X = pd.DataFrame(data['features'])
         
-        # التنبؤ
-        predictions = predict(model, X)
+        # تطبيق المعالج المحفوظ مع النموذج (إن وُجد)
+        pre_path = preprocessor_path(data['model_path'])
+        if os.path.exists(pre_path):
+            X = model_cache.get(pre_path).transform(X)
+        
+        # التنبؤ (ضمن دفعة مشتركة إذا كان التجميع مفعلًا)
+        if batcher is not None:
+            key = ('predict', data['model_path'], tuple(X.columns))
+            predictions = batcher.submit(key, X, len(X), _batched_model_predict(data['model_path']))
+        else:
+            predictions = predict(model, X)
         
         return jsonify({
             "message": "Prediction completed",
             "predictions": predictions.tolist() if hasattr(predictions, 'tolist') else predictions
         })
         
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/reports', methods=['POST'])
+def create_report():
+    """تقرير تنبؤ على ملف بيانات: ملخص ومقاييس، والصفوف في ملف جانبي"""
+    try:
+        data = request.json
+        
+        # التحقق من البيانات المطلوبة
+        if 'model_path' not in data or 'data_path' not in data:
+            return jsonify({"error": "Missing required fields: model_path and data_path"}), 400
+        task_type = data.get('task_type', 'classification')
+        if task_type != 'clustering' and 'target' not in data:
+            return jsonify({"error": "Missing required field: target"}), 400
+        output_format = data.get('format', 'npy')
+        if output_format not in REPORT_FORMATS:
+            return jsonify({"error": f"Unsupported report format: {output_format}"}), 400
+        if not os.path.exists(data['data_path']):
+            return jsonify({"error": f"Data file not found: {data['data_path']}"}), 404
+        
+        model = model_cache.get(data['model_path'])
+        frame = load_data(data['data_path'])
+        y = frame[data['target']] if task_type != 'clustering' else None
+        X = frame.drop(columns=[data['target']]) if y is not None else frame
+        
+        # تطبيق المعالج المحفوظ مع النموذج (إن وُجد)
+        pre_path = preprocessor_path(data['model_path'])
+        if os.path.exists(pre_path):
+            X = model_cache.get(pre_path).transform(X)
+        
+        report = generate_prediction_report(model, X, y, task_type, output_format=output_format)
+        return jsonify({"message": "Report generated", "report": report})
+        
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/reports/<report_id>/rows', methods=['GET'])
+def report_rows(report_id):
+    """صفحة من صفوف تقرير (offset و limit في معاملات الاستعلام)"""
+    path = report_file_path(report_id)
+    if path is None:
+        return jsonify({"error": f"Report not found: {report_id}"}), 404
+    try:
+        page = read_prediction_rows(
+            path,
+            offset=request.args.get('offset', 0, type=int),
+            limit=request.args.get('limit', 100, type=int)
+        )
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
 # =============================================================================
 # واجهات معالجة اللغة الطبيعية (NLP)
 # =============================================================================
@@ -163,51 +453,65 @@ def nlp_train():
             if field not in data:
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
-        # إنشاء مصنف النصوص
-        classifier = TextClassifier(model_path=data.get('model_path', 'models/nlp_model.pkl'))
-        
-        # معاملات إضافية
-        vectorizer_type = data.get('vectorizer_type', 'tfidf')
-        classifier_type = data.get('classifier_type', 'logistic_regression')
-        use_gridsearch = data.get('use_gridsearch', False)
-        
-        # تدريب النموذج
-        if use_gridsearch:
-            result = classifier.train_with_gridsearch(
-                data_path=data['data_path'],
-                text_column=data['text_column'],
-                target_column=data['target_column'],
-                vectorizer_type=vectorizer_type,
-                classifier_type=classifier_type,
-                param_grid=data.get('param_grid'),
-                cv=data.get('cv', 5),
-                test_size=data.get('test_size', 0.2),
-                random_state=data.get('random_state', 42)
-            )
-        else:
-            result = classifier.train(
-                data_path=data['data_path'],
-                text_column=data['text_column'],
-                target_column=data['target_column'],
-                vectorizer_type=vectorizer_type,
-                classifier_type=classifier_type,
-                test_size=data.get('test_size', 0.2),
-                random_state=data.get('random_state', 42),
-                **data.get('parameters', {})
-            )
-        
-        return jsonify({
-            "message": "NLP model trained successfully",
-            "model_path": result['model_path'],
-            "classes": result['classes'],
-            "accuracy": result['accuracy'],
-            "vectorizer_type": vectorizer_type,
-            "classifier_type": classifier_type
-        })
+        return jsonify(run_nlp_training(data))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def run_nlp_training(data, progress_callback=None):
+    """
+    تنفيذ طلب تدريب NLP (مشترك بين /nlp/train ومهام /jobs/train)
+    
+    Args:
+        data: معاملات الطلب
+        progress_callback: دالة تُستدعى بحالة التقدم (اختياري)
+        
+    Returns:
+        dict: نتيجة التدريب
+    """
+    # إنشاء مصنف النصوص
+    classifier = TextClassifier(model_path=data.get('model_path', 'models/nlp_model.pkl'))
+    
+    # معاملات إضافية
+    vectorizer_type = data.get('vectorizer_type', 'tfidf')
+    classifier_type = data.get('classifier_type', 'logistic_regression')
+    use_gridsearch = data.get('use_gridsearch', False)
+    
+    # تدريب النموذج
+    _report(progress_callback, 'training')
+    if use_gridsearch:
+        result = classifier.train_with_gridsearch(
+            data_path=data['data_path'],
+            text_column=data['text_column'],
+            target_column=data['target_column'],
+            vectorizer_type=vectorizer_type,
+            classifier_type=classifier_type,
+            param_grid=data.get('param_grid'),
+            cv=data.get('cv', 5),
+            test_size=data.get('test_size', 0.2),
+            random_state=data.get('random_state', 42)
+        )
+    else:
+        result = classifier.train(
+            data_path=data['data_path'],
+            text_column=data['text_column'],
+            target_column=data['target_column'],
+            vectorizer_type=vectorizer_type,
+            classifier_type=classifier_type,
+            test_size=data.get('test_size', 0.2),
+            random_state=data.get('random_state', 42),
+            **data.get('parameters', {})
+        )
+    
+    return {
+        "message": "NLP model trained successfully",
+        "model_path": result['model_path'],
+        "classes": result['classes'],
+        "accuracy": result['accuracy'],
+        "vectorizer_type": vectorizer_type,
+        "classifier_type": classifier_type
+    }
+
 @app.route('/nlp/predict', methods=['POST'])
 def nlp_predict():
     """التنبؤ باستخدام نموذج NLP"""
@@ -218,18 +522,26 @@ def nlp_predict():
         if 'texts' not in data:
             return jsonify({"error": "Missing required field: texts"}), 400
         
-        # إنشاء مصنف النصوص
-        classifier = TextClassifier(model_path=data.get('model_path', 'models/nlp_model.pkl'))
-        
-        # التنبؤ
+        model_path = data.get('model_path', 'models/nlp_model.pkl')
         texts = data['texts']
-        results = classifier.predict(texts)
+        
+        # التنبؤ (ضمن دفعة مشتركة إذا كان التجميع مفعلًا)
+        if batcher is not None:
+            text_list = [texts] if isinstance(texts, str) else list(texts)
+            key = ('nlp', model_path)
+            part = batcher.submit(key, text_list, len(text_list), _batched_nlp_predict(model_path))
+            results = part if len(part) > 1 else part[0]
+        else:
+            classifier = TextClassifier(model_path=model_path)
+            results = classifier.predict(texts)
         
         return jsonify({
             "message": "NLP prediction completed",
             "results": results
         })
         
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -318,12 +630,32 @@ def health():
         "version": "2.0"
     })
 
+@app.route('/data/profile', methods=['POST'])
+def data_profile():
+    """ملف تعريفي سريع لملف بيانات (محفوظ حسب بصمة الملف)"""
+    try:
+        data = request.json
+        if 'data_path' not in data:
+            return jsonify({"error": "Missing required field: data_path"}), 400
+        if not os.path.exists(data['data_path']):
+            return jsonify({"error": f"Data file not found: {data['data_path']}"}), 404
+        
+        profile = profile_data(
+            data['data_path'],
+            sample_size=data.get('sample_size', 10000),
+            use_cache=data.get('use_cache', True)
+        )
+        return jsonify({"message": "Profile completed", "profile": profile})
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/model_info/<model_name>', methods=['GET'])
 def model_info(model_name):
     """معلومات عن نموذج محدد"""
     model_path = f"models/{model_name}"
     if os.path.exists(model_path):
-        model = load_model(model_path)
+        model = model_cache.get(model_path)
         return jsonify({
             "model_name": model_name,
             "model_type": type(model).__name__,
@@ -337,6 +669,25 @@ def model_info(model_name):
             "message": "Model not found"
         }), 404
 
+@app.route('/model_cache', methods=['GET'])
+def model_cache_stats():
+    """إحصائيات ذاكرة النماذج المؤقتة"""
+    return jsonify(model_cache.stats())
+
+@app.route('/model_cache/invalidate', methods=['POST'])
+def model_cache_invalidate():
+    """إبطال نموذج محدد أو كل النماذج من الذاكرة المؤقتة"""
+    data = request.get_json(silent=True) or {}
+    model_cache.invalidate(data.get('model_path'))
+    return jsonify({"message": "Model cache invalidated", "stats": model_cache.stats()})
+
+@app.route('/batching/stats', methods=['GET'])
+def batching_stats():
+    """إحصائيات تجميع الطلبات في دفعات"""
+    if batcher is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **batcher.stats()})
+
 @app.route('/list_models', methods=['GET'])
 def list_models():
     """عرض جميع النماذج المحفوظة"""
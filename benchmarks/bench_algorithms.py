@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس أداء التدريب والتنبؤ لكل خوارزميات السجل
+
+يولّد بيانات اصطناعية بعدة أحجام (ويستخدم sample_data إن وُجدت)، ثم يقيس لكل
+خوارزمية مسجلة في classification_algorithms و regression_algorithms و
+clustering_algorithms: زمن train_algorithm و predict و predict_proba، وذروة
+الذاكرة أثناء التدريب (tracemalloc)، وحجم النموذج المحفوظ بـ joblib.
+يعمل دون اتصال بالشبكة.
+
+النتائج تُكتب JSON و/أو CSV، ويمكن مقارنتها بنتائج سابقة (--compare)؛
+ينتهي برمز خروج 1 إذا ظهر تراجع يتجاوز الحد المسموح.
+
+الاستخدام:
+    python benchmarks/bench_algorithms.py --rows 1000 10000 --output bench.json --csv bench.csv
+    python benchmarks/bench_algorithms.py --compare bench.json --tolerance 0.25
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+TASK_TYPES = ('classification', 'regression', 'clustering')
+
+# خوارزميات تكلفتها تربيعية أو أسوأ في عدد الصفوف؛ تُتخطى فوق --quadratic-max-rows
+QUADRATIC_ALGORITHMS = {
+    'svm', 'svr', 'gaussian_process_classifier', 'gaussian_process_regressor',
+    'agglomerative_clustering', 'spectral_clustering', 'optics', 'mean_shift'
+}
+
+# المقاييس التي تُقارن بين التشغيلات (الأعلى أسوأ)
+COMPARED_METRICS = ('fit_seconds', 'predict_seconds', 'predict_proba_seconds', 'peak_memory_mb', 'model_size_mb')
+
+CSV_FIELDS = ('dataset', 'task_type', 'algorithm', 'status', 'n_rows', 'n_features') + COMPARED_METRICS + ('error',)
+
+
+# =============================================================================
+# البيانات
+# =============================================================================
+
+def synthetic_datasets(rows, n_features=20, random_state=42):
+    """
+    بيانات اصطناعية لكل نوع مهمة وكل حجم
+
+    Returns:
+        list: عناصر (اسم البيانات، نوع المهمة، X، y)
+    """
+    from sklearn.datasets import make_blobs, make_classification, make_regression
+
+    datasets = []
+    for n_rows in rows:
+        name = f'synthetic_{n_rows}x{n_features}'
+        X, y = make_classification(n_rows, n_features, n_informative=max(2, n_features // 2),
+                                   n_classes=3, random_state=random_state)
+        datasets.append((name, 'classification', X, y))
+        X, y = make_regression(n_rows, n_features, n_informative=max(2, n_features // 2),
+                               noise=0.1, random_state=random_state)
+        datasets.append((name, 'regression', X, y))
+        X, _ = make_blobs(n_rows, n_features, centers=5, random_state=random_state)
+        datasets.append((name, 'clustering', X, None))
+    return datasets
+
+
+def sample_datasets(directory=os.path.join(REPO_ROOT, 'sample_data')):
+    """بيانات sample_data الموجودة (iris للتصنيف والتجميع، housing للانحدار)"""
+    import pandas as pd
+
+    datasets = []
+    iris_path = os.path.join(directory, 'iris.csv')
+    if os.path.exists(iris_path):
+        iris = pd.read_csv(iris_path)
+        X = iris.drop(columns=['species']).to_numpy(dtype='float64')
+        datasets.append(('iris', 'classification', X, iris['species'].to_numpy()))
+        datasets.append(('iris', 'clustering', X, None))
+    housing_path = os.path.join(directory, 'housing.csv')
+    if os.path.exists(housing_path):
+        housing = pd.read_csv(housing_path)
+        X = housing.drop(columns=['target']).to_numpy(dtype='float64')
+        datasets.append(('housing', 'regression', X, housing['target'].to_numpy()))
+    return datasets
+
+
+# =============================================================================
+# القياس
+# =============================================================================
+
+def _model_size(model):
+    """حجم النموذج بالبايت كما يحفظه joblib دون ضغط"""
+    import joblib
+
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def _timed(fn, repeat):
+    """الوسيط لزمن التنفيذ عبر عدة تكرارات وآخر نتيجة"""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations), result
+
+
+def bench_algorithm(name, task_type, X, y, repeat=3):
+    """
+    قياس خوارزمية واحدة على بيانات واحدة
+
+    التشغيل الأول يتم تحت tracemalloc لقياس ذروة الذاكرة فقط، لأن التتبع
+    يبطئ التخصيص؛ الأزمنة تُقاس في تشغيلات منفصلة دونه. tracemalloc يرى
+    تخصيصات Python و numpy فقط، لا مخازن Cython الداخلية (مثل عقد الأشجار)،
+    لذا يكمّله حجم النموذج المحفوظ.
+
+    Returns:
+        dict: المقاييس (None للعمليات غير المدعومة)
+    """
+    from ml.models import train_algorithm
+
+    tracemalloc.start()
+    try:
+        model = train_algorithm(X, y, name, task_type)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    fit_seconds, model = _timed(lambda: train_algorithm(X, y, name, task_type), repeat)
+
+    predict_seconds = predict_proba_seconds = None
+    if hasattr(model, 'predict'):
+        predict_seconds, _ = _timed(lambda: model.predict(X), repeat)
+    if hasattr(model, 'predict_proba'):
+        predict_proba_seconds, _ = _timed(lambda: model.predict_proba(X), repeat)
+
+    return {
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'predict_proba_seconds': predict_proba_seconds,
+        'peak_memory_mb': peak / (1024 * 1024),
+        'model_size_mb': _model_size(model) / (1024 * 1024)
+    }
+
+
+def run_benchmarks(datasets, algorithms=None, repeat=3, quadratic_max_rows=5000, verbose=True):
+    """
+    تشغيل القياس لكل الخوارزميات المسجلة على كل البيانات
+
+    Args:
+        datasets: عناصر (اسم، نوع المهمة، X، y)
+        algorithms: أسماء خوارزميات محددة (None = الكل)
+        repeat: عدد تكرارات قياس الزمن
+        quadratic_max_rows: أقصى عدد صفوف للخوارزميات التربيعية
+        verbose: طباعة التقدم
+
+    Returns:
+        list: صف نتائج لكل (بيانات، خوارزمية)
+    """
+    from ml.models import classification_algorithms, clustering_algorithms, regression_algorithms
+
+    registries = {
+        'classification': classification_algorithms,
+        'regression': regression_algorithms,
+        'clustering': clustering_algorithms
+    }
+    results = []
+    for dataset_name, task_type, X, y in datasets:
+        for name in registries[task_type]:
+            if algorithms and name not in algorithms:
+                continue
+            row = {'dataset': dataset_name, 'task_type': task_type, 'algorithm': name,
+                   'n_rows': X.shape[0], 'n_features': X.shape[1]}
+            if name in QUADRATIC_ALGORITHMS and X.shape[0] > quadratic_max_rows:
+                row['status'] = 'skipped'
+                row['error'] = f'more than {quadratic_max_rows} rows'
+            else:
+                try:
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore')
+                        row.update(bench_algorithm(name, task_type, X, y, repeat))
+                    row['status'] = 'ok'
+                except Exception as e:
+                    row['status'] = 'failed'
+                    row['error'] = str(e)
+            results.append(row)
+            if verbose:
+                print(_format_row(row))
+    return results
+
+
+def _format_row(row):
+    def fmt(value, unit):
+        return f'{value:9.4f}{unit}' if value is not None else ' ' * 9 + '-' * len(unit)
+
+    head = f"{row['dataset']:22s} {row['task_type']:14s} {row['algorithm']:30s}"
+    if row['status'] != 'ok':
+        return f"{head} {row['status']}: {row.get('error', '')}"
+    return (f"{head} fit={fmt(row['fit_seconds'], 's')} predict={fmt(row['predict_seconds'], 's')} "
+            f"proba={fmt(row['predict_proba_seconds'], 's')} peak={fmt(row['peak_memory_mb'], 'MB')} "
+            f"size={fmt(row['model_size_mb'], 'MB')}")
+
+
+# =============================================================================
+# المقارنة والمخرجات
+# =============================================================================
+
+def compare_results(current, baseline, tolerance=0.25, min_seconds=0.01, min_mb=0.1):
+    """
+    مقارنة النتائج الحالية بنتائج سابقة
+
+    تُعد الزيادة تراجعًا إذا تجاوزت tolerance نسبيًا وتجاوزت أيضًا حدًا مطلقًا
+    صغيرًا (min_seconds أو min_mb)، حتى لا تُبلغ تقلبات القياسات الصغيرة جدًا.
+
+    Args:
+        current: النتائج الحالية
+        baseline: النتائج السابقة
+        tolerance: الزيادة النسبية المسموحة (0.25 = 25%)
+
+    Returns:
+        list: التراجعات (البيانات، الخوارزمية، المقياس، القيمتان، النسبة)
+    """
+    previous = {(r['dataset'], r['task_type'], r['algorithm']): r for r in baseline}
+    regressions = []
+    for row in current:
+        key = (row['dataset'], row['task_type'], row['algorithm'])
+        old = previous.get(key)
+        if old is None or old.get('status') != 'ok':
+            continue
+        if row['status'] != 'ok':
+            regressions.append({'dataset': key[0], 'task_type': key[1], 'algorithm': key[2],
+                                'metric': 'status', 'baseline': 'ok', 'current': row['status']})
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old.get(metric), row.get(metric)
+            if before is None or after is None:
+                continue
+            floor = min_seconds if metric.endswith('_seconds') else min_mb
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append({'dataset': key[0], 'task_type': key[1], 'algorithm': key[2],
+                                    'metric': metric, 'baseline': before, 'current': after,
+                                    'ratio': after / before if before else float('inf')})
+    return regressions
+
+
+def environment_info():
+    """معلومات البيئة لتفسير الفروق بين التشغيلات"""
+    import numpy
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=REPO_ROOT).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def write_csv(results, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Training and inference benchmark for the algorithm registries')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--features', type=int, default=20)
+    parser.add_argument('--tasks', nargs='+', choices=TASK_TYPES, default=list(TASK_TYPES))
+    parser.add_argument('--algorithms', nargs='+', help='only benchmark these algorithms')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quadratic-max-rows', type=int, default=5000)
+    parser.add_argument('--no-sample-data', action='store_true', help='skip the datasets in sample_data/')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--csv', help='write results as CSV to this path')
+    parser.add_argument('--compare', help='previous JSON results to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--random-state', type=int, default=42)
+    args = parser.parse_args()
+
+    datasets = synthetic_datasets(args.rows, args.features, args.random_state)
+    if not args.no_sample_data:
+        datasets += sample_datasets()
+    datasets = [d for d in datasets if d[1] in args.tasks]
+
+    results = run_benchmarks(datasets, args.algorithms, args.repeat, args.quadratic_max_rows)
+    report = {'environment': environment_info(), 'results': results}
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline['results'], args.tolerance)
+        report['baseline'] = baseline.get('environment')
+        report['regressions'] = regressions
+        for r in regressions:
+            if r['metric'] == 'status':
+                print(f"REGRESSION {r['dataset']} {r['algorithm']}: now {r['current']}")
+            else:
+                print(f"REGRESSION {r['dataset']} {r['algorithm']} {r['metric']}: "
+                      f"{r['baseline']:.4f} -> {r['current']:.4f} (x{r['ratio']:.2f})")
+        print(f"{len(regressions)} regressions against {args.compare}")
+        exit_code = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+    if args.csv:
+        write_csv(results, args.csv)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
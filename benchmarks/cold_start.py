@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس زمن بدء التشغيل البارد لحزمة ml واستهلاك الذاكرة
+
+يشغّل `import ml` في عمليات مستقلة عدة مرات ويقارن الوسيط بالميزانية.
+ينتهي برمز خروج 1 إذا تجاوز القياس الميزانية.
+
+الاستخدام:
+    python benchmarks/cold_start.py --runs 5 --max-seconds 3.0 --max-rss-mb 250
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# يُنفذ داخل العملية الفرعية: زمن الاستيراد وأقصى ذاكرة مقيمة والخوارزميات المحملة
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from ml.models import classification_algorithms, regression_algorithms, clustering_algorithms
+loaded = sum(r.is_loaded(n) for r in (classification_algorithms, regression_algorithms, clustering_algorithms) for n in r)
+heavy = [m for m in ('xgboost', 'lightgbm', 'catboost', 'sklearn.ensemble', 'sklearn.gaussian_process',
+                     'sklearn.neural_network', 'sklearn.cluster', 'sklearn.svm') if m in sys.modules]
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb, 'loaded_algorithms': loaded, 'heavy_modules': heavy}}))
+"""
+
+
+def measure(module='ml', runs=5):
+    """تشغيل الاستيراد في عمليات مستقلة وإرجاع القياسات"""
+    samples = []
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module)],
+            capture_output=True, text=True, check=True, env=env, cwd=REPO_ROOT
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'module': module,
+        'runs': runs,
+        'median_seconds': statistics.median(s['seconds'] for s in samples),
+        'max_seconds': max(s['seconds'] for s in samples),
+        'median_rss_mb': statistics.median(s['rss_mb'] for s in samples),
+        'loaded_algorithms': samples[-1]['loaded_algorithms'],
+        'heavy_modules': samples[-1]['heavy_modules']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start budget check for the ml package')
+    parser.add_argument('--module', default='ml')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=float(os.environ.get('PEERAI_COLD_START_SECONDS', 3.0)))
+    parser.add_argument('--max-rss-mb', type=float, default=float(os.environ.get('PEERAI_COLD_START_RSS_MB', 250)))
+    args = parser.parse_args()
+
+    result = measure(args.module, args.runs)
+    result['budget'] = {'seconds': args.max_seconds, 'rss_mb': args.max_rss_mb}
+    result['within_budget'] = (
+        result['median_seconds'] <= args.max_seconds and result['median_rss_mb'] <= args.max_rss_mb
+    )
+    print(json.dumps(result, indent=2))
+    return 0 if result['within_budget'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
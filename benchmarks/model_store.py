@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس حجم ملفات النماذج وزمن تحميلها وذاكرة كل عامل حسب صيغة الحفظ
+
+يدرب نماذج ذات مصفوفات كبيرة (انحدار لوجستي عريض، غابة عشوائية، خط
+أنابيب TF-IDF)، ويحفظ كلًا منها بمستويات ضغط مختلفة، ثم يحمّله في عمليات
+مستقلة مع mmap وبدونه. الذاكرة الخاصة (RssAnon) هي ما يكلفه كل عامل إضافي،
+أما صفحات الملف (RssFile) فتتشاركها العمليات عبر ذاكرة نظام التشغيل.
+
+الاستخدام:
+    python benchmarks/model_store.py --runs 3 --compress 0 3 9 --output store.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# يُنفذ داخل العملية الفرعية: زمن التحميل والذاكرة المقيمة قبله وبعده
+PROBE = """
+import json, time
+import sklearn.pipeline, sklearn.linear_model, sklearn.ensemble, sklearn.feature_extraction.text
+from ml.models import load_model
+
+def rss():
+    fields = {{}}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('RssAnon', 'RssFile'):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+before = rss()
+start = time.perf_counter()
+model = load_model({path!r}, mmap_mode={mmap_mode!r})
+elapsed = time.perf_counter() - start
+after = rss()
+print(json.dumps({{'seconds': elapsed,
+                  'anon_mb': after.get('RssAnon', 0) - before.get('RssAnon', 0),
+                  'file_mb': after.get('RssFile', 0) - before.get('RssFile', 0)}}))
+"""
+
+
+def build_models(n_samples=20000, random_state=42):
+    """نماذج تمثيلية بمصفوفات كبيرة"""
+    import numpy as np
+    from sklearn.datasets import make_classification
+    from ml.models import train_algorithm
+    from ml.nlp_utils import TextClassifier
+
+    X, y = make_classification(n_samples, 400, n_informative=60, n_classes=20,
+                               n_clusters_per_class=1, random_state=random_state)
+    X_wide, y_wide = make_classification(4000, 5000, n_informative=100, n_classes=50,
+                                         n_clusters_per_class=1, random_state=random_state)
+    models = {
+        'logistic_regression': train_algorithm(X_wide, y_wide, 'logistic_regression', max_iter=30),
+        'random_forest': train_algorithm(X[:5000], y[:5000], 'random_forest',
+                                         n_estimators=100, random_state=random_state)
+    }
+
+    rng = np.random.default_rng(random_state)
+    vocabulary = np.array([f'w{i}' for i in range(50000)])
+    texts = [' '.join(rng.choice(vocabulary, 30)) for _ in range(n_samples)]
+    labels = rng.choice(['positive', 'negative', 'neutral'], n_samples)
+    pipeline = TextClassifier().create_pipeline('tfidf', 'logistic_regression')
+    pipeline.fit(texts, labels)
+    models['tfidf_pipeline'] = pipeline
+    return models
+
+
+def measure(path, mmap_mode, runs):
+    """تحميل الملف في عمليات مستقلة وإرجاع الوسيط"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', PROBE.format(path=path, mmap_mode=mmap_mode)],
+            capture_output=True, text=True, check=True, env=env, cwd=REPO_ROOT
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'load_seconds': statistics.median(s['seconds'] for s in samples),
+        'worker_private_mb': statistics.median(s['anon_mb'] for s in samples),
+        'shared_file_mb': statistics.median(s['file_mb'] for s in samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Model store size, load time and per-worker memory')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--compress', type=int, nargs='+', default=[0, 3, 9])
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    from ml.models import save_model
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, model in build_models(args.samples).items():
+            for compress in args.compress:
+                path = os.path.join(directory, f'{name}_c{compress}.pkl')
+                save_model(model, path, compress=compress)
+                # الملفات المضغوطة لا تدعم mmap
+                for mmap_mode in ([None, 'r'] if compress == 0 else [None]):
+                    row = {'model': name, 'compress': compress, 'mmap_mode': mmap_mode,
+                           'file_mb': os.path.getsize(path) / (1024 * 1024)}
+                    row.update(measure(path, mmap_mode, args.runs))
+                    results.append(row)
+                    print(f"{name:20s} compress={compress} mmap={str(mmap_mode):4s} "
+                          f"size={row['file_mb']:8.2f}MB load={row['load_seconds']:.3f}s "
+                          f"private={row['worker_private_mb']:8.2f}MB shared={row['shared_file_mb']:8.2f}MB")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,20 +4,38 @@
 
 from .models import (
     train_algorithm, save_model, load_model, get_available_algorithms,
-    train_with_gridsearch, train_with_randomized_search, get_algorithm_info
+    train_with_gridsearch, train_with_randomized_search, get_algorithm_info,
+    train_algorithm_streaming, create_algorithm
 )
 
 from .data_utils import (
     load_data, split_data, preprocess_data, get_data_info, 
-    validate_data, create_sample_data, save_sample_data
+    validate_data, create_sample_data, save_sample_data, optimize_dtypes,
+    iter_data_chunks, DataPreprocessor, preprocessor_path, split_indices,
+    prepare_matrix, split_matrix, profile_data
 )
 
 from .predict import (
     predict, predict_proba, evaluate, evaluate_classification,
-    evaluate_regression, evaluate_clustering, cross_validate_model
+    evaluate_regression, evaluate_clustering, cross_validate_model,
+    evaluate_classification_chunks
 )
 
+from .metrics import ConfusionAccumulator, classification_metrics
+
+from .validation import cross_validate, fold_assignments
+
+from .plotting import PlotRenderer, plot_renderer, render_figure
+
 from .nlp_utils import TextClassifier, TextPreprocessor
 
+from .model_cache import ModelCache, model_cache, load_cached_model
+
+from .data_cache import load_prepared_data, file_fingerprint, clear_data_cache
+
+from .search import hyperparameter_search, clear_search_cache
+
+from .tuning import bayesian_search, TPESampler, Study
+
 __version__ = "2.0.0"
 __author__ = "ML System Team" 
\ No newline at end of file
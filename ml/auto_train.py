@@ -1,11 +1,303 @@
+import math
+import time
+import multiprocessing
+from multiprocessing.connection import wait
 import pandas as pd
 from ml.models import classification_algorithms, regression_algorithms, clustering_algorithms
-from ml.data_utils import load_data, split_data, preprocess_data
+from ml.data_cache import load_prepared_data
 from ml.predict import evaluate
+from sklearn.model_selection import train_test_split
 import warnings
 
+# ترتيب تقريبي لتكلفة التدريب (الأقل أولًا) حتى نجد نموذجًا جيدًا مبكرًا ضمن الميزانية
+ALGORITHM_COST = {
+    # التصنيف
+    "naive_bayes": 1, "lda": 2, "ridge_classifier": 2, "decision_tree": 3, "perceptron": 3,
+    "sgd_classifier": 3, "passive_aggressive": 3, "logistic_regression": 4, "qda": 4,
+    "knn": 5, "lightgbm_classifier": 6, "xgboost_classifier": 7, "extra_trees": 8,
+    "random_forest": 9, "bagging": 9, "ada_boost": 10, "catboost_classifier": 11,
+    "gradient_boosting": 12, "neural_network": 13, "svm": 14, "gaussian_process_classifier": 20,
+    # الانحدار
+    "linear_regression": 1, "ridge_regression": 1, "lasso_regression": 2, "elastic_net": 2,
+    "decision_tree_regressor": 3, "huber_regressor": 4, "passive_aggressive_regressor": 3,
+    "knn_regressor": 5, "lightgbm_regressor": 6, "xgboost_regressor": 7,
+    "random_forest_regressor": 9, "gradient_boosting_regressor": 12,
+    "neural_network_regressor": 13, "svr": 14, "gaussian_process_regressor": 20,
+    # التجميع
+    "minibatch_kmeans": 1, "kmeans": 2, "birch": 3, "dbscan": 5, "agglomerative_clustering": 8,
+    "optics": 12, "mean_shift": 12, "spectral_clustering": 15,
+}
+
+def _get_algorithms(task_type):
+    """قاموس الخوارزميات لنوع المهمة"""
+    if task_type == 'classification':
+        return classification_algorithms
+    elif task_type == 'regression':
+        return regression_algorithms
+    elif task_type == 'clustering':
+        return clustering_algorithms
+    raise ValueError("Unknown task_type")
+
+def order_by_cost(names):
+    """ترتيب الخوارزميات من الأرخص إلى الأغلى"""
+    return sorted(names, key=lambda name: ALGORITHM_COST.get(name, 10))
+
+def evaluate_candidate(name, task_type, X_train, y_train=None, X_test=None, y_test=None):
+    """
+    تدريب وتقييم خوارزمية واحدة
+
+    Returns:
+        dict: اسم الخوارزمية والنتيجة وزمن التدريب وزمن التنبؤ
+    """
+    model = _get_algorithms(task_type)[name]()
+
+    start = time.perf_counter()
+    if task_type == 'clustering':
+        model.fit(X_train)
+    else:
+        model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if task_type == 'clustering':
+        labels = model.labels_ if hasattr(model, 'labels_') else model.predict(X_train)
+        predict_time = time.perf_counter() - start
+        score = evaluate(None, labels, 'clustering', X_train)['silhouette_score']
+        if score is None:
+            raise ValueError(f"Silhouette is undefined for {name}: fewer than 2 clusters")
+    else:
+        y_pred = model.predict(X_test)
+        predict_time = time.perf_counter() - start
+        metric = 'accuracy' if task_type == 'classification' else 'r2_score'
+        score = evaluate(y_test, y_pred, task_type)[metric]
+
+    return {
+        'algorithm': name,
+        'status': 'ok',
+        'score': float(score),
+        'fit_time': fit_time,
+        'predict_time': predict_time
+    }
+
+def _candidate_process(conn, name, task_type, data):
+    """تشغيل مرشح واحد داخل عملية فرعية وإرسال النتيجة عبر الأنبوب"""
+    warnings.filterwarnings('ignore')
+    try:
+        result = evaluate_candidate(name, task_type, *data)
+    except Exception as e:
+        result = {'algorithm': name, 'status': 'failed', 'error': str(e)}
+    conn.send(result)
+    conn.close()
+
+def run_candidates(names, task_type, data, n_jobs=1, timeout_per_algorithm=None,
+                   time_budget=None, verbose=True):
+    """
+    تشغيل المرشحين بالتوازي مع مهلة لكل خوارزمية وميزانية زمنية إجمالية
+
+    Args:
+        names: أسماء الخوارزميات (تُشغل بهذا الترتيب)
+        task_type: نوع المهمة
+        data: (X_train, y_train, X_test, y_test)
+        n_jobs: عدد العمليات المتزامنة (-1 لكل الأنوية)
+        timeout_per_algorithm: المهلة القصوى لكل خوارزمية بالثواني
+        time_budget: الميزانية الزمنية الإجمالية بالثواني
+        verbose: طباعة التقدم
+
+    Returns:
+        list: نتيجة لكل خوارزمية (ok / failed / timeout / cancelled / skipped)
+    """
+    if n_jobs is not None and n_jobs < 0:
+        n_jobs = multiprocessing.cpu_count()
+    n_jobs = max(1, n_jobs or 1)
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    results = []
+
+    # التشغيل داخل العملية نفسها عندما لا حاجة للإلغاء القسري
+    if n_jobs == 1 and timeout_per_algorithm is None:
+        for i, name in enumerate(names):
+            if deadline is not None and time.monotonic() >= deadline:
+                results.extend({'algorithm': n, 'status': 'skipped'} for n in names[i:])
+                break
+            if verbose:
+                print(f"Training {name} ...")
+            try:
+                results.append(evaluate_candidate(name, task_type, *data))
+            except Exception as e:
+                if verbose:
+                    print(f"Failed: {name} ({e})")
+                results.append({'algorithm': name, 'status': 'failed', 'error': str(e)})
+        return results
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    pending = list(names)
+    running = {}
+
+    while pending or running:
+        now = time.monotonic()
+        budget_left = deadline is None or now < deadline
+
+        # بدء مرشحين جدد ضمن حدود التوازي والميزانية
+        while pending and len(running) < n_jobs and budget_left:
+            name = pending.pop(0)
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            process = context.Process(target=_candidate_process, args=(child_conn, name, task_type, data))
+            process.daemon = True
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (process, name, time.monotonic())
+            if verbose:
+                print(f"Training {name} ...")
+
+        if not budget_left:
+            results.extend({'algorithm': name, 'status': 'skipped'} for name in pending)
+            pending = []
+
+        if not running:
+            continue
+
+        # انتظار أول نتيجة أو أقرب مهلة
+        waits = [1.0]
+        if timeout_per_algorithm is not None:
+            waits += [start + timeout_per_algorithm - now for _, _, start in running.values()]
+        if deadline is not None:
+            waits.append(deadline - now)
+        for conn in wait(list(running), timeout=max(0.0, min(waits))):
+            process, name, start = running.pop(conn)
+            try:
+                result = conn.recv()
+            except EOFError:
+                result = {'algorithm': name, 'status': 'failed', 'error': 'worker exited unexpectedly'}
+            conn.close()
+            process.join()
+            if verbose and result['status'] == 'failed':
+                print(f"Failed: {name} ({result.get('error')})")
+            results.append(result)
+
+        # إلغاء المتأخرين
+        now = time.monotonic()
+        for conn, (process, name, start) in list(running.items()):
+            if timeout_per_algorithm is not None and now - start >= timeout_per_algorithm:
+                status = 'timeout'
+            elif deadline is not None and now >= deadline:
+                status = 'cancelled'
+            else:
+                continue
+            process.terminate()
+            process.join()
+            conn.close()
+            del running[conn]
+            if verbose:
+                print(f"Stopped: {name} ({status})")
+            results.append({'algorithm': name, 'status': status, 'fit_time': now - start})
+
+    return results
+
+def build_leaderboard(results):
+    """ترتيب النتائج: الناجحة حسب أبعد جولة ثم النتيجة تنازليًا، ثم البقية"""
+    succeeded = sorted(
+        (r for r in results if r['status'] == 'ok'),
+        key=lambda r: (r.get('round', 0), r['score']), reverse=True
+    )
+    others = [r for r in results if r['status'] != 'ok']
+    leaderboard = succeeded + others
+    for rank, entry in enumerate(leaderboard, start=1):
+        entry['rank'] = rank
+    return leaderboard
+
+def _subsample(X, y, n_samples, task_type, random_state):
+    """عينة فرعية (طبقية للتصنيف) من بيانات التدريب"""
+    if n_samples >= len(X):
+        return X, y
+    if task_type == 'clustering':
+        return X.sample(n=n_samples, random_state=random_state), None
+    stratify = y if task_type == 'classification' else None
+    try:
+        X_sub, _, y_sub, _ = train_test_split(
+            X, y, train_size=n_samples, random_state=random_state, stratify=stratify
+        )
+    except ValueError:
+        # فئات نادرة جدًا لا تسمح بالتقسيم الطبقي
+        X_sub, _, y_sub, _ = train_test_split(X, y, train_size=n_samples, random_state=random_state)
+    return X_sub, y_sub
+
+def successive_halving(names, task_type, data, eta=3, min_samples=None, random_state=42,
+                       time_budget=None, verbose=True, **runner_kwargs):
+    """
+    اختيار الخوارزمية بالتنصيف المتتالي
+
+    تُقيَّم كل الخوارزميات على عينة صغيرة، ثم يُرقّى أفضل 1/eta منها إلى
+    عينة أكبر بـ eta مرة، حتى تتدرب الخوارزميات النهائية على كامل البيانات.
+
+    Args:
+        names: أسماء الخوارزميات
+        task_type: نوع المهمة
+        data: (X_train, y_train, X_test, y_test)
+        eta: معامل التقليص والتكبير في كل جولة
+        min_samples: حجم عينة الجولة الأولى (افتراضيًا يُحسب من عدد الجولات)
+        random_state: البذرة العشوائية
+        time_budget: الميزانية الزمنية الإجمالية بالثواني
+        verbose: طباعة التقدم
+        **runner_kwargs: معاملات run_candidates (n_jobs، timeout_per_algorithm)
+
+    Returns:
+        list: آخر نتيجة لكل خوارزمية مع الجولة التي بلغتها وحجم عينتها
+    """
+    X_train, y_train, X_test, y_test = data
+    n_total = len(X_train)
+    n_rounds = int(math.floor(math.log(max(len(names), 1), eta))) + 1
+    if min_samples is None:
+        min_samples = max(n_total // (eta ** (n_rounds - 1)), 1)
+
+    deadline = time.monotonic() + time_budget if time_budget else None
+    latest = {}
+    survivors = list(names)
+    n_samples = min_samples
+    round_index = 0
+
+    while survivors:
+        # الجولة الأخيرة (أو آخر خوارزمية متبقية) تتدرب على كامل البيانات
+        if round_index >= n_rounds - 1 or len(survivors) == 1:
+            n_samples = n_total
+        n_samples = min(n_total, int(n_samples))
+        if verbose:
+            print(f"\n--- Round {round_index}: {len(survivors)} algorithms on {n_samples} samples ---")
+        remaining = None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+        X_sub, y_sub = _subsample(X_train, y_train, n_samples, task_type, random_state)
+        results = run_candidates(
+            survivors, task_type, (X_sub, y_sub, X_test, y_test),
+            time_budget=remaining, verbose=verbose, **runner_kwargs
+        )
+        for result in results:
+            result['round'] = round_index
+            result['n_samples'] = n_samples
+            latest[result['algorithm']] = result
+
+        if n_samples >= n_total:
+            break
+
+        # ترقية أفضل 1/eta إلى الجولة التالية
+        succeeded = sorted((r for r in results if r['status'] == 'ok'), key=lambda r: r['score'], reverse=True)
+        n_keep = max(1, int(math.ceil(len(survivors) / eta)))
+        survivors = [r['algorithm'] for r in succeeded[:n_keep]]
+        n_samples *= eta
+        round_index += 1
+
+    # الخوارزميات التي لم تبدأ بسبب انتهاء الميزانية
+    for name in names:
+        latest.setdefault(name, {'algorithm': name, 'status': 'skipped'})
+    return [latest[name] for name in names]
+
 def auto_train_best_algorithm(
-    data_path, target_column=None, task_type='classification', test_size=0.2, random_state=42
+    data_path, target_column=None, task_type='classification', test_size=0.2, random_state=42,
+    n_jobs=1, timeout_per_algorithm=None, time_budget=None, algorithms=None, verbose=True,
+    strategy='full', eta=3, min_samples=None, use_cache=True, preprocessor_path=None
 ):
     """
     يجرب جميع الخوارزميات المتاحة لنوع المهمة ويطبع النتائج مرتبة ويحدد الأفضل.
@@ -15,57 +307,65 @@ def auto_train_best_algorithm(
         task_type: 'classification' أو 'regression' أو 'clustering'
         test_size: نسبة بيانات الاختبار
         random_state: البذرة العشوائية
+        n_jobs: عدد الخوارزميات التي تُدرب بالتوازي (-1 لكل الأنوية)
+        timeout_per_algorithm: المهلة القصوى لكل خوارزمية بالثواني
+        time_budget: الميزانية الزمنية الإجمالية بالثواني
+        algorithms: قائمة أسماء الخوارزميات (افتراضيًا كل المسجلة)
+        verbose: طباعة التقدم والنتائج
+        strategy: 'full' (كل الخوارزميات على كامل البيانات) أو 'halving' (تنصيف متتالي)
+        eta: معامل التنصيف المتتالي
+        min_samples: حجم عينة الجولة الأولى في التنصيف المتتالي
+        use_cache: إعادة استخدام البيانات المعالجة المحفوظة لنفس الملف
+        preprocessor_path: مسار حفظ المعالج المدرب (لتطبيقه عند التنبؤ بالنموذج الفائز)
+    Returns:
+        list: لوحة النتائج (الخوارزمية، النتيجة، زمن التدريب، زمن التنبؤ، الحالة، الترتيب)
     """
-    data = load_data(data_path)
-    if task_type != 'clustering':
-        data = preprocess_data(data, target_column)
-        X_train, X_test, y_train, y_test = split_data(data, target_column, test_size, random_state)
-    else:
-        data = preprocess_data(data)
-        X_train = data
-    
-    if task_type == 'classification':
-        algos = classification_algorithms
-        metric = lambda y_true, y_pred: evaluate(y_true, y_pred, 'classification')['accuracy']
-    elif task_type == 'regression':
-        algos = regression_algorithms
-        metric = lambda y_true, y_pred: evaluate(y_true, y_pred, 'regression')['r2_score']
-    elif task_type == 'clustering':
-        algos = clustering_algorithms
-        metric = lambda X, labels: evaluate(None, labels, 'clustering', X)['silhouette_score']
+    X_train, X_test, y_train, y_test, preprocessor = load_prepared_data(
+        data_path, target_column, task_type, test_size, random_state, use_cache=use_cache
+    )
+    if preprocessor_path and preprocessor is not None:
+        preprocessor.save(preprocessor_path)
+
+    names = order_by_cost(algorithms or list(_get_algorithms(task_type).keys()))
+    if strategy == 'halving':
+        results = successive_halving(
+            names, task_type, (X_train, y_train, X_test, y_test),
+            eta=eta, min_samples=min_samples, random_state=random_state,
+            n_jobs=n_jobs, timeout_per_algorithm=timeout_per_algorithm,
+            time_budget=time_budget, verbose=verbose
+        )
+    elif strategy == 'full':
+        results = run_candidates(
+            names, task_type, (X_train, y_train, X_test, y_test),
+            n_jobs=n_jobs, timeout_per_algorithm=timeout_per_algorithm,
+            time_budget=time_budget, verbose=verbose
+        )
     else:
-        raise ValueError("Unknown task_type")
+        raise ValueError(f"Unknown strategy: {strategy}")
+    leaderboard = build_leaderboard(results)
 
-    results = []
-    for name, algo in algos.items():
-        try:
-            print(f"Training {name} ...")
-            model = algo()
-            if task_type == 'clustering':
-                model.fit(X_train)
-                labels = model.predict(X_train)
-                score = metric(X_train, labels)
+    if verbose:
+        print("\n=== Results ===")
+        for entry in leaderboard:
+            if entry['status'] == 'ok':
+                stage = f", {entry['n_samples']} samples" if 'n_samples' in entry else ""
+                print(f"{entry['algorithm']}: {entry['score']:.4f} "
+                      f"(fit {entry['fit_time']:.2f}s, predict {entry['predict_time']:.3f}s{stage})")
             else:
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-                score = metric(y_test, y_pred)
-            results.append((name, score))
-        except Exception as e:
-            print(f"Failed: {name} ({e})")
-            continue
+                print(f"{entry['algorithm']}: {entry['status']}")
 
-    # ترتيب النتائج
-    results.sort(key=lambda x: x[1], reverse=True)
-    print("\n=== Results ===")
-    for name, score in results:
-        print(f"{name}: {score:.4f}")
+        if leaderboard and leaderboard[0]['status'] == 'ok':
+            print(f"\nBest algorithm: {leaderboard[0]['algorithm']} (score: {leaderboard[0]['score']:.4f})")
+        else:
+            print("No algorithm succeeded.")
 
-    if results:
-        print(f"\nBest algorithm: {results[0][0]} (score: {results[0][1]:.4f})")
-    else:
-        print("No algorithm succeeded.")
+    return leaderboard
 
 # مثال الاستخدام:
 # auto_train_best_algorithm('sample_data/iris.csv', 'species', task_type='classification')
 # auto_train_best_algorithm('sample_data/housing.csv', 'target', task_type='regression')
-# auto_train_best_algorithm('sample_data/iris.csv', task_type='clustering') 
\ No newline at end of file
+# auto_train_best_algorithm('sample_data/iris.csv', task_type='clustering')
+# auto_train_best_algorithm('sample_data/housing.csv', 'target', task_type='regression',
+#                           n_jobs=-1, timeout_per_algorithm=60, time_budget=600)
+# auto_train_best_algorithm('sample_data/housing.csv', 'target', task_type='regression',
+#                           strategy='halving', eta=3)
@@ -0,0 +1,191 @@
+# =============================================================================
+# تجميع طلبات التنبؤ الصغيرة في دفعات (Micro-batching)
+# =============================================================================
+
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+# الإعدادات الافتراضية (قابلة للتغيير عبر متغيرات البيئة)
+BATCHING_ENABLED = os.environ.get('PEERAI_BATCHING', '0') == '1'
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get('PEERAI_BATCH_MAX_SIZE', 256))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get('PEERAI_BATCH_MAX_WAIT_MS', 5))
+DEFAULT_MAX_QUEUE_DEPTH = int(os.environ.get('PEERAI_BATCH_QUEUE_DEPTH', 1000))
+DEFAULT_MAX_KEYS = int(os.environ.get('PEERAI_BATCH_MAX_KEYS', 64))
+DEFAULT_IDLE_TIMEOUT = float(os.environ.get('PEERAI_BATCH_IDLE_TIMEOUT', 60))
+
+
+class QueueFullError(RuntimeError):
+    """طابور النموذج ممتلئ ولا يقبل طلبات جديدة"""
+
+
+class _PendingRequest:
+    def __init__(self, payload, n_rows):
+        self.payload = payload
+        self.n_rows = n_rows
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    يجمع الطلبات المتزامنة لكل نموذج لبضعة أجزاء من الثانية أو حتى عدد
+    محدد من الصفوف، ثم ينفذ تنبؤًا واحدًا ويعيد لكل طالب جزءه من النتيجة.
+
+    لكل مفتاح طابور وخيط عامل؛ المفاتيح تأتي من الطلبات، لذا يُحدد عددها
+    وينتهي العامل ويُحذف طابوره بعد مدة خمول.
+    """
+
+    def __init__(self, max_batch_size=None, max_wait_ms=None, max_queue_depth=None,
+                 max_keys=None, idle_timeout=None):
+        """
+        Args:
+            max_batch_size: الحد الأقصى لعدد الصفوف في الدفعة
+            max_wait_ms: أقصى زمن انتظار لتجميع الدفعة بالميلي ثانية
+            max_queue_depth: أقصى عدد طلبات منتظرة لكل نموذج
+            max_keys: أقصى عدد مفاتيح (طوابير وخيوط عاملة) نشطة في آن واحد
+            idle_timeout: ثوانٍ بلا طلبات قبل إنهاء عامل المفتاح وحذف طابوره
+        """
+        self.max_batch_size = max_batch_size or DEFAULT_MAX_BATCH_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else DEFAULT_MAX_WAIT_MS) / 1000.0
+        self.max_queue_depth = max_queue_depth or DEFAULT_MAX_QUEUE_DEPTH
+        self.max_keys = max_keys or DEFAULT_MAX_KEYS
+        self.idle_timeout = idle_timeout if idle_timeout is not None else DEFAULT_IDLE_TIMEOUT
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batch_rows_histogram = Counter()
+        self.batch_requests_histogram = Counter()
+        self.n_batches = 0
+        self.n_requests = 0
+        self.n_rejected = 0
+
+    def submit(self, key, payload, n_rows, batch_fn):
+        """
+        إرسال طلب والانتظار حتى تنفيذ دفعته
+
+        Args:
+            key: مفتاح النموذج (الطلبات بنفس المفتاح تُجمع معًا)
+            payload: بيانات الطلب
+            n_rows: عدد الصفوف في الطلب
+            batch_fn: دالة تستقبل قائمة الحمولات وتعيد قائمة النتائج بنفس الترتيب
+
+        Returns:
+            نتيجة هذا الطلب
+        """
+        request = _PendingRequest(payload, n_rows)
+        try:
+            self._enqueue(key, request, batch_fn)
+        except QueueFullError:
+            with self._stats_lock:
+                self.n_rejected += 1
+            raise
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _enqueue(self, key, request, batch_fn):
+        # الإضافة تحت القفل نفسه الذي يحذف به العامل الخامل طابوره،
+        # فلا يُضاف طلب إلى طابور لم يعد له عامل
+        with self._lock:
+            q = self._queues.get(key)
+            if q is None:
+                if len(self._queues) >= self.max_keys:
+                    raise QueueFullError(f"Too many active batch queues ({len(self._queues)})")
+                q = queue.Queue(maxsize=self.max_queue_depth)
+                worker = threading.Thread(target=self._worker, args=(key, q, batch_fn), daemon=True)
+                self._queues[key] = q
+                worker.start()
+            try:
+                q.put_nowait(request)
+            except queue.Full:
+                raise QueueFullError(f"Batch queue is full for model: {key}")
+
+    def _worker(self, key, q, batch_fn):
+        """حلقة تجميع الطلبات وتنفيذ الدفعات لنموذج واحد، تنتهي بعد مدة خمول"""
+        carry = None
+        while True:
+            if carry is not None:
+                first = carry
+            else:
+                try:
+                    first = q.get(timeout=self.idle_timeout)
+                except queue.Empty:
+                    with self._lock:
+                        if q.empty():
+                            del self._queues[key]
+                            return
+                    continue
+            carry = None
+            batch = [first]
+            rows = first.n_rows
+            deadline = time.monotonic() + self.max_wait
+
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if rows + request.n_rows > self.max_batch_size:
+                    # الطلب لا يتسع في هذه الدفعة: يبدأ الدفعة التالية
+                    carry = request
+                    break
+                batch.append(request)
+                rows += request.n_rows
+
+            self._run_batch(batch, rows, batch_fn)
+
+    def _run_batch(self, batch, rows, batch_fn):
+        try:
+            results = list(batch_fn([request.payload for request in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} requests")
+            for request, result in zip(batch, results):
+                request.result = result
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            with self._stats_lock:
+                self.n_batches += 1
+                self.n_requests += len(batch)
+                self.batch_rows_histogram[self._bucket(rows)] += 1
+                self.batch_requests_histogram[self._bucket(len(batch))] += 1
+            for request in batch:
+                request.done.set()
+
+    @staticmethod
+    def _bucket(n):
+        """تقريب العدد لأقرب قوة للعدد 2 (حدود فئات المدرج التكراري)"""
+        bucket = 1
+        while bucket < n:
+            bucket *= 2
+        return bucket
+
+    def stats(self):
+        """إحصائيات الدفعات والمدرجات التكرارية لأحجامها"""
+        with self._lock:
+            queue_depths = {str(k): q.qsize() for k, q in self._queues.items()}
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'max_queue_depth': self.max_queue_depth,
+                'max_keys': self.max_keys,
+                'idle_timeout': self.idle_timeout,
+                'n_batches': self.n_batches,
+                'n_requests': self.n_requests,
+                'n_rejected': self.n_rejected,
+                'mean_requests_per_batch': self.n_requests / self.n_batches if self.n_batches else 0.0,
+                'batch_rows_histogram': {f"<={k}": v for k, v in sorted(self.batch_rows_histogram.items())},
+                'batch_requests_histogram': {f"<={k}": v for k, v in sorted(self.batch_requests_histogram.items())},
+                'queue_depths': queue_depths
+            }
@@ -0,0 +1,299 @@
+# =============================================================================
+# ذاكرة مؤقتة للبيانات المعالجة (حسب محتوى الملف وخيارات المعالجة)
+# =============================================================================
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .data_utils import (
+    load_data, preprocess_data, split_data, split_indices, prepare_matrix, split_matrix,
+    DataPreprocessor
+)
+
+# مجلد الذاكرة المؤقتة (قابل للتغيير عبر متغير البيئة)
+CACHE_DIR = os.environ.get('PEERAI_DATA_CACHE_DIR', os.path.join('.peerai_cache', 'data'))
+
+# الحد الأقصى لحجم الذاكرة المؤقتة بالميغابايت (0 = بلا حد)؛ تُحذف الأقدم استخدامًا أولًا
+CACHE_MAX_MB = float(os.environ.get('PEERAI_DATA_CACHE_MAX_MB', 2048))
+
+# يُرفع عند تغيير طريقة المعالجة حتى لا تُستخدم نسخ قديمة
+CACHE_VERSION = 2
+
+_fingerprint_lock = threading.Lock()
+_fingerprints = {}
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """
+    بصمة SHA-256 لمحتوى الملف
+
+    تُحفظ البصمة في الذاكرة حسب (المسار، الحجم، وقت التعديل) حتى لا يُعاد
+    حسابها للملف نفسه ما لم يتغير.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        if key in _fingerprints:
+            return _fingerprints[key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprints[key] = fingerprint
+    return fingerprint
+
+
+def _cache_key(fingerprint, options):
+    payload = json.dumps({'fingerprint': fingerprint, 'version': CACHE_VERSION, **options}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _is_numeric_matrix(obj):
+    if isinstance(obj, pd.DataFrame):
+        dtypes = set(obj.dtypes)
+        return len(dtypes) == 1 and pd.api.types.is_numeric_dtype(next(iter(dtypes)))
+    return isinstance(obj, pd.Series) and pd.api.types.is_numeric_dtype(obj.dtype)
+
+
+def _save_part(obj, directory, name):
+    """حفظ جزء من البيانات: مصفوفة .npy للبيانات الرقمية وjoblib لغيرها"""
+    if obj is None:
+        return None
+    if _is_numeric_matrix(obj) and pd.api.types.is_integer_dtype(obj.index.dtype):
+        np.save(os.path.join(directory, f'{name}.npy'), obj.to_numpy())
+        np.save(os.path.join(directory, f'{name}.index.npy'), obj.index.to_numpy())
+        if isinstance(obj, pd.DataFrame):
+            return {'kind': 'frame', 'columns': [str(c) for c in obj.columns]}
+        return {'kind': 'series', 'name': obj.name}
+    joblib.dump(obj, os.path.join(directory, f'{name}.pkl'))
+    return {'kind': 'pickle'}
+
+
+def _load_part(meta, directory, name):
+    """تحميل جزء من البيانات بنمط mmap"""
+    if meta is None:
+        return None
+    if meta['kind'] == 'pickle':
+        return joblib.load(os.path.join(directory, f'{name}.pkl'), mmap_mode='r')
+    values = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+    index = np.load(os.path.join(directory, f'{name}.index.npy'))
+    if meta['kind'] == 'frame':
+        return pd.DataFrame(values, columns=meta['columns'], index=index, copy=False)
+    return pd.Series(values, index=index, name=meta['name'], copy=False)
+
+
+def load_prepared_data(data_path, target_column=None, task_type='classification', test_size=0.2,
+                       random_state=42, preprocess=True, scale_features=True,
+                       encode_categorical=True, use_cache=True, cache_dir=None, low_memory=False):
+    """
+    تحميل البيانات ومعالجتها وتقسيمها مع إعادة استخدام النتيجة المحفوظة
+
+    المفتاح هو بصمة محتوى الملف مع خيارات المعالجة والتقسيم، فأي استدعاء
+    لاحق على البيانات نفسها يعيد المصفوفات المحفوظة بنمط mmap دون قراءة
+    CSV أو ترميز الفئات أو إعادة تدريب StandardScaler. حجم المجلد محدود
+    بـ CACHE_MAX_MB (تُحذف النسخ الأقدم استخدامًا بعد كل كتابة)، ويحذفها
+    clear_data_cache كلها.
+
+    Args:
+        data_path: مسار ملف البيانات
+        target_column: اسم عمود الهدف (ليس مطلوباً للتجميع)
+        task_type: نوع المهمة ('classification', 'regression', 'clustering')
+        test_size: نسبة بيانات الاختبار
+        random_state: البذرة العشوائية
+        preprocess: تطبيق preprocess_data (يُدرب على بيانات التدريب ويُطبق على الاختبار)
+        scale_features: تطبيع الميزات الرقمية
+        encode_categorical: ترميز الميزات الفئوية
+        use_cache: استخدام الذاكرة المؤقتة على القرص
+        cache_dir: مجلد الذاكرة المؤقتة (افتراضيًا CACHE_DIR)
+        low_memory: بناء مصفوفة float32 واحدة وتقسيمها في مكانها (يستلزم المعالجة)
+
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test, preprocessor)
+        preprocessor هو DataPreprocessor المدرب (None بدون معالجة)
+        للتجميع: X_train هو كامل البيانات والبقية None
+    """
+    options = {
+        'target_column': target_column,
+        'task_type': task_type,
+        'test_size': test_size,
+        'random_state': random_state,
+        'preprocess': preprocess,
+        'scale_features': scale_features,
+        'encode_categorical': encode_categorical,
+        'low_memory': low_memory
+    }
+
+    directory = None
+    if use_cache:
+        cache_dir = cache_dir or CACHE_DIR
+        directory = os.path.join(cache_dir, _cache_key(file_fingerprint(data_path), options))
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            parts = tuple(_load_part(meta['parts'][name], directory, name)
+                          for name in ('X_train', 'X_test', 'y_train', 'y_test'))
+            preprocessor_path = os.path.join(directory, 'preprocessor.pkl')
+            preprocessor = joblib.load(preprocessor_path) if os.path.exists(preprocessor_path) else None
+            # وقت التعديل هو ترتيب الاستخدام عند الحذف
+            os.utime(meta_path)
+            return parts + (preprocessor,)
+
+    # المعالجة الكاملة: التقسيم أولًا ثم تدريب المعالج على بيانات التدريب فقط
+    data = load_data(data_path)
+    if low_memory:
+        parts, preprocessor = _prepare_low_memory(
+            data, target_column if task_type != 'clustering' else None,
+            test_size, random_state, scale_features, encode_categorical
+        )
+        del data
+        if directory is not None:
+            _write_cache(directory, parts, preprocessor, options)
+        return parts + (preprocessor,)
+
+    if task_type == 'clustering':
+        parts = (data, None, None, None)
+    else:
+        parts = split_data(data, target_column, test_size, random_state)
+
+    preprocessor = None
+    if preprocess:
+        X_train, X_test, y_train, y_test = parts
+        X_train, preprocessor = preprocess_data(
+            X_train, scale_features=scale_features, encode_categorical=encode_categorical,
+            return_transformers=True
+        )
+        if X_test is not None:
+            X_test = preprocess_data(X_test, preprocessor=preprocessor)
+        parts = (X_train, X_test, y_train, y_test)
+
+    if directory is not None:
+        _write_cache(directory, parts, preprocessor, options)
+    return parts + (preprocessor,)
+
+
+def _prepare_low_memory(data, target_column, test_size, random_state, scale_features,
+                        encode_categorical, chunk_size=100000):
+    """
+    معالجة وتقسيم بذاكرة منخفضة
+
+    يُدرب المعالج على صفوف التدريب على دفعات (دون نسخ إطار التدريب كاملًا)،
+    ثم تُكتب كل البيانات في مصفوفة float32 واحدة وتُقسم في مكانها.
+    """
+    preprocessor = DataPreprocessor(target_column, scale_features=scale_features,
+                                    encode_categorical=encode_categorical)
+    if target_column is None:
+        for start in range(0, len(data), chunk_size):
+            preprocessor.partial_fit(data.iloc[start:start + chunk_size])
+        X, _, _ = prepare_matrix(data, preprocessor=preprocessor)
+        columns = preprocessor.get_feature_names_out()
+        return (pd.DataFrame(X, columns=columns, index=data.index, copy=False), None, None, None), preprocessor
+
+    indices = split_indices(data[target_column], test_size, random_state)
+    train_idx = np.sort(indices[0])
+    for start in range(0, len(train_idx), chunk_size):
+        preprocessor.partial_fit(data.iloc[train_idx[start:start + chunk_size]])
+
+    X, y, _ = prepare_matrix(data, target_column, preprocessor=preprocessor)
+    X_train, X_test, y_train, y_test, order = split_matrix(X, y, indices=indices)
+    columns = preprocessor.get_feature_names_out()
+    index = data.index.to_numpy()[order]
+    n_train = len(X_train)
+    parts = (
+        pd.DataFrame(X_train, columns=columns, index=index[:n_train], copy=False),
+        pd.DataFrame(X_test, columns=columns, index=index[n_train:], copy=False),
+        pd.Series(y_train, index=index[:n_train], name=target_column),
+        pd.Series(y_test, index=index[n_train:], name=target_column)
+    )
+    return parts, preprocessor
+
+
+def _write_cache(directory, parts, preprocessor, options):
+    """كتابة النسخة في مجلد مؤقت ثم نقله دفعة واحدة"""
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    tmp_directory = f'{directory}.tmp{os.getpid()}'
+    os.makedirs(tmp_directory, exist_ok=True)
+    try:
+        meta = {'options': options, 'parts': {}}
+        for name, part in zip(('X_train', 'X_test', 'y_train', 'y_test'), parts):
+            meta['parts'][name] = _save_part(part, tmp_directory, name)
+        if preprocessor is not None:
+            joblib.dump(preprocessor, os.path.join(tmp_directory, 'preprocessor.pkl'))
+        with open(os.path.join(tmp_directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_directory, directory)
+    except OSError:
+        # عملية أخرى كتبت النسخة نفسها أولًا
+        pass
+    finally:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+    prune_data_cache(os.path.dirname(directory), keep=directory)
+
+
+def _directory_size(directory):
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def prune_data_cache(cache_dir=None, max_mb=None, keep=None):
+    """
+    حذف النسخ الأقدم استخدامًا حتى يصبح حجم الذاكرة المؤقتة ضمن الحد
+
+    Args:
+        cache_dir: مجلد الذاكرة المؤقتة (افتراضيًا CACHE_DIR)
+        max_mb: الحد بالميغابايت (افتراضيًا CACHE_MAX_MB، و0 بلا حد)
+        keep: مجلد نسخة لا يُحذف (النسخة المكتوبة للتو)
+
+    Returns:
+        int: عدد النسخ المحذوفة
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    max_mb = CACHE_MAX_MB if max_mb is None else max_mb
+    if max_mb <= 0 or not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        meta_path = os.path.join(cache_dir, name, 'meta.json')
+        try:
+            entries.append((os.path.getmtime(meta_path), os.path.join(cache_dir, name)))
+        except OSError:
+            # مجلد مؤقت قيد الكتابة أو ليس نسخة
+            continue
+    sizes = {directory: _directory_size(directory) for _, directory in entries}
+    total = sum(sizes.values())
+
+    removed = 0
+    for _, directory in sorted(entries):
+        if total <= max_mb * 1024 * 1024:
+            break
+        if keep is not None and os.path.abspath(directory) == os.path.abspath(keep):
+            continue
+        shutil.rmtree(directory, ignore_errors=True)
+        total -= sizes[directory]
+        removed += 1
+    return removed
+
+
+def clear_data_cache(cache_dir=None):
+    """حذف كل البيانات المعالجة المحفوظة"""
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
+    with _fingerprint_lock:
+        _fingerprints.clear()
@@ -5,15 +5,30 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler
+import hashlib
+import importlib.util
+import joblib
+import json
 import os
 
-def load_data(file_path):
+# محرك pyarrow اختياري (يُفحص دون استيراده)
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# صيغ الأعمدة المدعومة أصلًا
+COLUMNAR_EXTENSIONS = ('.parquet', '.pq', '.feather', '.arrow', '.ipc')
+
+def load_data(file_path, fast=False, dtype=None, downcast=False, cache=False):
     """
-    تحميل البيانات من ملف CSV
+    تحميل البيانات من ملف CSV أو Excel أو Parquet أو Feather/Arrow IPC
     
     Args:
         file_path: مسار ملف البيانات
+        fast: استخدام محرك pyarrow لقراءة CSV (إن كان متاحًا)
+        dtype: مخطط الأعمدة {العمود: النوع} لتجاوز الاستدلال التلقائي
+        downcast: تصغير الأنواع (float32، أعداد صحيحة أصغر، category)
+        cache: حفظ نسخة Parquet بجانب الملف المصدر لإعادة التحميل الفوري
+            (نسخة مستقلة لكل تركيبة من fast و dtype و downcast)
         
     Returns:
         DataFrame: البيانات المحملة
@@ -21,17 +36,135 @@ def load_data(file_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"ملف البيانات غير موجود: {file_path}")
     
+    # النسخة المحفوظة إذا كانت أحدث من الملف المصدر
+    cache_path = _columnar_cache_path(file_path, downcast, dtype, fast) if cache else None
+    if cache_path and not PYARROW_AVAILABLE:
+        raise ImportError("Parquet cache requires pyarrow. Install with: pip install pyarrow")
+    if cache_path and os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+        return pd.read_parquet(cache_path)
+    
     # تحديد نوع الملف
-    if file_path.endswith('.csv'):
-        data = pd.read_csv(file_path)
-    elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-        data = pd.read_excel(file_path)
+    lower_path = file_path.lower()
+    if lower_path.endswith('.csv'):
+        if fast and PYARROW_AVAILABLE:
+            data = pd.read_csv(file_path, engine='pyarrow', dtype=dtype)
+        else:
+            data = pd.read_csv(file_path, dtype=dtype)
+    elif lower_path.endswith('.xlsx') or lower_path.endswith('.xls'):
+        data = pd.read_excel(file_path, dtype=dtype)
+    elif lower_path.endswith(('.parquet', '.pq')):
+        data = pd.read_parquet(file_path)
+    elif lower_path.endswith(('.feather', '.arrow', '.ipc')):
+        data = pd.read_feather(file_path)
     else:
         raise ValueError(f"نوع الملف غير مدعوم: {file_path}")
     
+    if dtype is not None and lower_path.endswith(COLUMNAR_EXTENSIONS):
+        data = data.astype(dtype)
+    
+    if downcast:
+        data = optimize_dtypes(data)
+    
+    if cache_path:
+        tmp_path = f"{cache_path}.tmp{os.getpid()}"
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    
     return data
 
-def split_data(data, target_column, test_size=0.2, random_state=42, stratify=None):
+def _columnar_cache_path(file_path, downcast, dtype=None, fast=False):
+    """
+    مسار نسخة Parquet المحفوظة بجانب الملف المصدر
+    
+    خيارات القراءة التي تغير المخطط (dtype و fast) تدخل في الاسم كبصمة قصيرة،
+    فلا تُعاد نسخة محفوظة بمخطط مختلف عن المطلوب.
+    """
+    if file_path.lower().endswith(COLUMNAR_EXTENSIONS):
+        return None
+    directory, name = os.path.split(file_path)
+    suffix = '.compact' if downcast else ''
+    if dtype is not None or fast:
+        if isinstance(dtype, dict):
+            schema = {str(column): _dtype_name(value) for column, value in dtype.items()}
+        else:
+            schema = _dtype_name(dtype) if dtype is not None else None
+        payload = json.dumps({'dtype': schema, 'fast': bool(fast and PYARROW_AVAILABLE)}, sort_keys=True)
+        suffix += '.' + hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(directory, f".{name}{suffix}.parquet")
+
+def _dtype_name(value):
+    """اسم موحد للنوع ('float32' و np.float32 يعطيان الاسم نفسه)"""
+    try:
+        return str(pd.api.types.pandas_dtype(value))
+    except TypeError:
+        return str(value)
+
+def is_categorical_column(series):
+    """هل العمود فئوي (نصوص أو category)"""
+    return (
+        isinstance(series.dtype, pd.CategoricalDtype)
+        or pd.api.types.is_object_dtype(series.dtype)
+        or pd.api.types.is_string_dtype(series.dtype)
+    )
+
+def optimize_dtypes(data, categorical_threshold=0.5):
+    """
+    تصغير أنواع الأعمدة لتقليل الذاكرة
+    
+    Args:
+        data: DataFrame البيانات
+        categorical_threshold: أقصى نسبة قيم فريدة لتحويل عمود نصي إلى category
+        
+    Returns:
+        DataFrame: البيانات بأنواع مضغوطة
+    """
+    optimized = {}
+    for column in data.columns:
+        series = data[column]
+        if pd.api.types.is_bool_dtype(series.dtype):
+            optimized[column] = series
+        elif pd.api.types.is_float_dtype(series.dtype):
+            optimized[column] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            downcast = 'unsigned' if len(series) and series.min() >= 0 else 'integer'
+            optimized[column] = pd.to_numeric(series, downcast=downcast)
+        elif is_categorical_column(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            n_unique = series.nunique(dropna=True)
+            if len(series) and n_unique / len(series) <= categorical_threshold:
+                optimized[column] = series.astype('category')
+            else:
+                optimized[column] = series
+        else:
+            optimized[column] = series
+    return pd.DataFrame(optimized, index=data.index)
+
+def split_indices(y, test_size=0.2, random_state=42, stratify=None):
+    """
+    تقسيم مواقع الصفوف إلى تدريب واختبار دون نسخ البيانات
+    
+    يعطي نفس التقسيم الذي يعطيه split_data للبيانات نفسها.
+    
+    Args:
+        y: عمود الهدف (أو عدد الصفوف عند عدم وجود هدف)
+        test_size: نسبة بيانات الاختبار
+        random_state: البذرة العشوائية
+        stratify: التقسيم الطبقي (افتراضيًا حسب الهدف إذا كان فئويًا)
+        
+    Returns:
+        tuple: (train_idx, test_idx) مصفوفتا مواقع
+    """
+    if isinstance(y, (int, np.integer)):
+        n_samples, y = int(y), None
+    else:
+        n_samples = len(y)
+    if stratify is None and y is not None and is_categorical_column(pd.Series(y, copy=False)):
+        stratify = y
+    return train_test_split(
+        np.arange(n_samples), test_size=test_size, random_state=random_state, stratify=stratify
+    )
+
+def split_data(data, target_column, test_size=0.2, random_state=42, stratify=None,
+               return_indices=False):
     """
     تقسيم البيانات إلى تدريب واختبار
     
@@ -41,20 +174,25 @@ def split_data(data, target_column, test_size=0.2, random_state=42, stratify=Non
         test_size: نسبة بيانات الاختبار
         random_state: البذرة العشوائية
         stratify: التقسيم الطبقي (للتصنيف)
+        return_indices: إرجاع مواقع الصفوف فقط بدل نسخ الإطارات
         
     Returns:
         tuple: (X_train, X_test, y_train, y_test)
+        (أو tuple: (train_idx, test_idx) عند return_indices)
     """
     # التحقق من وجود عمود الهدف
     if target_column not in data.columns:
         raise ValueError(f"عمود الهدف غير موجود: {target_column}")
     
+    if return_indices:
+        return split_indices(data[target_column], test_size, random_state, stratify)
+    
     # فصل الميزات والهدف
     X = data.drop(columns=[target_column])
     y = data[target_column]
     
     # التقسيم الطبقي للتصنيف
-    if stratify is None and y.dtype == 'object':
+    if stratify is None and is_categorical_column(y):
         stratify = y
     
     # تقسيم البيانات
@@ -64,7 +202,8 @@ def split_data(data, target_column, test_size=0.2, random_state=42, stratify=Non
     
     return X_train, X_test, y_train, y_test
 
-def preprocess_data(data, target_column=None, scale_features=True, encode_categorical=True):
+def preprocess_data(data, target_column=None, scale_features=True, encode_categorical=True,
+                    return_transformers=False, preprocessor=None, dtype=np.float64):
     """
     معالجة البيانات مسبقًا
     
@@ -73,43 +212,523 @@ def preprocess_data(data, target_column=None, scale_features=True, encode_catego
         target_column: اسم عمود الهدف (اختياري)
         scale_features: تطبيع الميزات الرقمية
         encode_categorical: ترميز الميزات الفئوية
+        return_transformers: إرجاع المعالج المدرب أيضًا
+        preprocessor: DataPreprocessor مدرب مسبقًا (للتحويل فقط دون إعادة التدريب)
+        dtype: نوع الميزات المطبّعة (np.float32 لتقليل الذاكرة)
         
     Returns:
-        DataFrame: البيانات المعالجة
+        DataFrame: البيانات بنفس ترتيب أعمدتها؛ الأعمدة التي يعالجها المعالج تأتي
+            من DataPreprocessor.transform، وبقية الأعمدة (الهدف، التواريخ، والنصوص
+            دون ترميز) تبقى كما هي
+        (أو tuple: (البيانات، DataPreprocessor) عند return_transformers)
     """
-    processed_data = data.copy()
+    if preprocessor is None:
+        preprocessor = DataPreprocessor(target_column, scale_features=scale_features,
+                                        encode_categorical=encode_categorical).fit(data)
     
-    # ترميز الميزات الفئوية
-    if encode_categorical:
-        label_encoders = {}
-        for column in processed_data.columns:
-            if processed_data[column].dtype == 'object' and column != target_column:
-                le = LabelEncoder()
-                processed_data[column] = le.fit_transform(processed_data[column].astype(str))
-                label_encoders[column] = le
+    # مسار واحد للتدريب والتنبؤ: الأعمدة المعالجة هي ناتج transform() نفسه
+    features = preprocessor.transform(data, dtype=dtype)
+    processed_data = pd.DataFrame(
+        {column: features[column] if column in features.columns else data[column] for column in data.columns},
+        index=data.index
+    )
     
-    # تطبيع الميزات الرقمية
-    if scale_features:
-        numeric_columns = processed_data.select_dtypes(include=[np.number]).columns
-        if target_column and target_column in numeric_columns:
-            numeric_columns = numeric_columns.drop(target_column)
+    if return_transformers:
+        return processed_data, preprocessor
+    return processed_data
+
+def prepare_matrix(data, target_column=None, preprocessor=None, dtype=np.float32,
+                   scale_features=True, encode_categorical=True):
+    """
+    وضع الذاكرة المنخفضة: تحويل البيانات مباشرة إلى مصفوفة رقمية
+    
+    بدل نسخ الإطار وإعادة بناء أعمدته، تُكتب الميزات عمودًا عمودًا في مصفوفة
+    float32 واحدة (نصف حجم float64)، فتكون الذاكرة الإضافية بحجم المصفوفة فقط.
+    
+    Args:
+        data: DataFrame البيانات
+        target_column: اسم عمود الهدف (اختياري)
+        preprocessor: DataPreprocessor مدرب مسبقًا (اختياري)
+        dtype: نوع قيم المصفوفة
+        scale_features: تطبيع الميزات الرقمية
+        encode_categorical: ترميز الميزات الفئوية
         
-        if len(numeric_columns) > 0:
-            scaler = StandardScaler()
-            processed_data[numeric_columns] = scaler.fit_transform(processed_data[numeric_columns])
+    Returns:
+        tuple: (X مصفوفة NumPy، y أو None، DataPreprocessor)
+    """
+    if preprocessor is None:
+        preprocessor = DataPreprocessor(target_column, scale_features=scale_features,
+                                        encode_categorical=encode_categorical).fit(data)
+    X = preprocessor.transform_array(data, dtype=dtype)
+    y = data[target_column].to_numpy() if target_column is not None else None
+    return X, y, preprocessor
+
+def split_matrix(X, y, test_size=0.2, random_state=42, stratify=None, indices=None):
+    """
+    تقسيم مصفوفة إلى تدريب واختبار في مكانها
     
-    return processed_data
+    تُعاد ترتيب الصفوف عمودًا عمودًا بحيث تأتي صفوف التدريب أولًا، ثم تُعاد
+    شرائح (views) من المصفوفة نفسها بدل أربع نسخ جديدة.
+    
+    Args:
+        X: مصفوفة الميزات (يفضل بترتيب Fortran كما يعيدها prepare_matrix)
+        y: عمود الهدف
+        test_size: نسبة بيانات الاختبار
+        random_state: البذرة العشوائية
+        stratify: التقسيم الطبقي (افتراضيًا حسب الهدف إذا كان فئويًا)
+        indices: (train_idx, test_idx) محسوبة مسبقًا من split_indices (اختياري)
+        
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test, order)
+        order هي مواقع الصفوف الأصلية بالترتيب الجديد
+    """
+    if indices is None:
+        indices = split_indices(y, test_size, random_state, stratify)
+    train_idx, test_idx = indices
+    order = np.concatenate([train_idx, test_idx])
+    for j in range(X.shape[1]):
+        X[:, j] = X[order, j]
+    y = np.asarray(y)[order]
+    n_train = len(train_idx)
+    return X[:n_train], X[n_train:], y[:n_train], y[n_train:], order
+
+def iter_data_chunks(file_path, chunksize=10000):
+    """
+    قراءة ملف البيانات على دفعات دون تحميله كاملًا
+    
+    Args:
+        file_path: مسار ملف CSV أو Parquet
+        chunksize: عدد الصفوف في كل دفعة
+        
+    Yields:
+        DataFrame: دفعة من البيانات
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"ملف البيانات غير موجود: {file_path}")
+    
+    lower_path = file_path.lower()
+    if lower_path.endswith('.csv'):
+        yield from pd.read_csv(file_path, chunksize=chunksize)
+    elif lower_path.endswith(('.parquet', '.pq')):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Reading Parquet in chunks requires pyarrow. Install with: pip install pyarrow")
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"نوع الملف غير مدعوم للقراءة على دفعات: {file_path}")
+
+def _category_label(value):
+    """النص الذي تُرمَّز به قيمة فئوية (كل القيم المفقودة تصبح 'nan')"""
+    return 'nan' if pd.isna(value) else str(value)
+
+class DataPreprocessor:
+    """
+    معالج بيانات قابل للتدريب التدريجي (partial_fit) على دفعات
+    
+    يطابق preprocess_data: ترميز الأعمدة الفئوية حسب الترتيب الأبجدي لقيمها
+    النصية، ثم تطبيع كل الميزات (بما فيها الفئوية المرمزة) بالمتوسط والانحراف.
+    إحصاءات الأعمدة الفئوية المرمزة تُحسب من عدد تكرار كل فئة، فتكفي قراءة
+    واحدة للبيانات قبل التحويل.
+    """
+    
+    def __init__(self, target_column=None, scale_features=True, encode_categorical=True):
+        self.target_column = target_column
+        self.scale_features = scale_features
+        self.encode_categorical = encode_categorical
+        self.feature_columns_ = None
+        self.categorical_columns_ = []
+        self.numeric_columns_ = []
+        self.category_counts_ = {}
+        self.n_samples_seen_ = 0
+        self._numeric_scaler = None
+        self._fitted_state = None
+    
+    def partial_fit(self, data):
+        """تحديث الإحصاءات بدفعة جديدة"""
+        if self.feature_columns_ is None:
+            self.feature_columns_ = [c for c in data.columns if c != self.target_column]
+            for column in self.feature_columns_:
+                if self.encode_categorical and is_categorical_column(data[column]):
+                    self.categorical_columns_.append(column)
+                elif pd.api.types.is_numeric_dtype(data[column].dtype):
+                    self.numeric_columns_.append(column)
+            self._numeric_scaler = StandardScaler()
+        
+        for column in self.categorical_columns_:
+            # العد على القيم الأصلية ثم تحويل القيم الفريدة فقط إلى نص
+            # (القيم المفقودة فئة مستقلة 'nan' كما في ترميز LabelEncoder الأصلي)
+            counts = self.category_counts_.setdefault(column, {})
+            for value, count in data[column].value_counts(dropna=False).items():
+                value = _category_label(value)
+                counts[value] = counts.get(value, 0) + int(count)
+        
+        if self.numeric_columns_:
+            self._numeric_scaler.partial_fit(data[self.numeric_columns_].to_numpy(dtype=np.float64))
+        
+        self.n_samples_seen_ += len(data)
+        self._fitted_state = None
+        return self
+    
+    def fit(self, data):
+        """تدريب المعالج على البيانات كاملة"""
+        self.feature_columns_ = None
+        self.categorical_columns_ = []
+        self.numeric_columns_ = []
+        self.category_counts_ = {}
+        self.n_samples_seen_ = 0
+        return self.partial_fit(data)
+    
+    def _state(self):
+        """جداول الترميز ومعاملات التطبيع النهائية"""
+        if self._fitted_state is not None:
+            return self._fitted_state
+        if self.feature_columns_ is None:
+            raise ValueError("DataPreprocessor is not fitted yet")
+        
+        categories = {column: sorted(self.category_counts_.get(column, {})) for column in self.categorical_columns_}
+        # الأعمدة الناتجة بترتيب أعمدة التدريب
+        selected = set(self.categorical_columns_) | set(self.numeric_columns_)
+        columns = [c for c in self.feature_columns_ if c in selected]
+        position = {column: j for j, column in enumerate(columns)}
+        mean = np.zeros(len(columns))
+        scale = np.ones(len(columns))
+        
+        if self.scale_features:
+            for column in self.categorical_columns_:
+                j = position[column]
+                counts = self.category_counts_.get(column, {})
+                codes = np.arange(len(categories[column]), dtype=np.float64)
+                weights = np.array([counts[value] for value in categories[column]], dtype=np.float64)
+                if weights.sum() > 0:
+                    mean[j] = np.average(codes, weights=weights)
+                    std = np.sqrt(np.average((codes - mean[j]) ** 2, weights=weights))
+                    scale[j] = std if std > 0 else 1.0
+            if self.numeric_columns_:
+                numeric_positions = [position[c] for c in self.numeric_columns_]
+                mean[numeric_positions] = self._numeric_scaler.mean_
+                scale[numeric_positions] = self._numeric_scaler.scale_
+        
+        # جدول بحث مسبق (hash) لكل عمود فئوي
+        lookup = {column: pd.Index(values) for column, values in categories.items()}
+        self._fitted_state = {'categories': categories, 'lookup': lookup, 'columns': columns,
+                              'mean': mean, 'scale': scale}
+        return self._fitted_state
+    
+    @staticmethod
+    def _encode(series, lookup):
+        """
+        ترميز عمود فئوي عبر جدول البحث
+        
+        تُحوَّل القيم الفريدة فقط إلى نص، ثم يُطبَّق الجدول على رموز factorize
+        في عملية واحدة O(n). القيم المفقودة تُرمَّز كالفئة 'nan'، والقيم غير
+        المعروفة تأخذ الرمز -1.
+        """
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        table = lookup.get_indexer([_category_label(value) for value in uniques])
+        return table[codes]
+    
+    def get_feature_names_out(self):
+        """أسماء الميزات الناتجة عن التحويل بترتيبها"""
+        return list(self._state()['columns'])
+    
+    def transform_array(self, data, dtype=np.float64, out=None):
+        """
+        تحويل دفعة مباشرة إلى مصفوفة NumPy دون إطارات وسيطة
+        
+        تُكتب الأعمدة واحدًا تلو الآخر في مصفوفة بترتيب Fortran ويُطبَّق
+        التطبيع على كل عمود في مكانه، فلا تتجاوز الذاكرة الإضافية عمودًا واحدًا.
+        
+        Args:
+            data: DataFrame الدفعة
+            dtype: نوع القيم الناتجة (np.float32 لنصف الذاكرة)
+            out: مصفوفة جاهزة للكتابة فيها (اختياري)
+            
+        Returns:
+            numpy.ndarray: مصفوفة (عدد الصفوف × عدد الميزات)
+        """
+        state = self._state()
+        if out is None:
+            out = np.empty((len(data), len(state['columns'])), dtype=dtype, order='F')
+        for j, column in enumerate(state['columns']):
+            if column in state['lookup']:
+                out[:, j] = self._encode(data[column], state['lookup'][column])
+            else:
+                out[:, j] = data[column].to_numpy()
+            if self.scale_features:
+                out[:, j] -= state['mean'][j]
+                out[:, j] /= state['scale'][j]
+        return out
+    
+    def transform(self, data, dtype=np.float64):
+        """
+        تحويل دفعة إلى مصفوفة ميزات رقمية
+        
+        Returns:
+            DataFrame: الميزات المعالجة بنفس ترتيب أعمدة التدريب
+        """
+        values = self.transform_array(data, dtype=dtype)
+        return pd.DataFrame(values, columns=self.get_feature_names_out(), index=data.index, copy=False)
+    
+    def fit_transform(self, data, dtype=np.float64):
+        """تدريب المعالج ثم تحويل البيانات"""
+        return self.fit(data).transform(data, dtype=dtype)
+    
+    def __getstate__(self):
+        # جداول البحث تُبنى من جديد بعد التحميل
+        state = self.__dict__.copy()
+        state['_fitted_state'] = None
+        return state
+    
+    def save(self, path):
+        """
+        حفظ المعالج المدرب
+        
+        Args:
+            path: مسار الحفظ
+        """
+        self._state()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump(self, path)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        تحميل معالج محفوظ
+        
+        Args:
+            path: مسار الملف
+            
+        Returns:
+            DataPreprocessor: المعالج المحمل
+        """
+        preprocessor = joblib.load(path)
+        if not isinstance(preprocessor, cls):
+            raise TypeError(f"الملف لا يحتوي على DataPreprocessor: {path}")
+        return preprocessor
 
-def get_data_info(data):
+def preprocessor_path(model_path):
+    """
+    مسار ملف المعالج المحفوظ بجانب النموذج
+    
+    Args:
+        model_path: مسار النموذج (مثل models/rf_classification_model.pkl)
+        
+    Returns:
+        str: المسار (مثل models/rf_classification_preprocessor.pkl)
+    """
+    base, ext = os.path.splitext(model_path)
+    if base.endswith('_model'):
+        base = base[:-len('_model')]
+    return f"{base}_preprocessor{ext or '.pkl'}"
+
+# =============================================================================
+# ملف تعريف البيانات (Profiling)
+# =============================================================================
+
+# الملفات المحسوبة مسبقًا حسب البصمة (في الذاكرة، وعلى القرص عند توفر البصمة)
+_profiles = {}
+
+def _estimate_distinct(sample, n_rows):
+    """
+    تقدير عدد القيم الفريدة في العمود كاملًا من عينة
+    
+    تقدير بطريقة العزوم: يُحل d = D * (1 - exp(-k/D)) بالتنصيف، حيث d عدد
+    القيم الفريدة في عينة حجمها k. الأعمدة التي لا تكرار في عينتها تُعد فريدة.
+    """
+    counts = sample.value_counts(dropna=True)
+    if len(sample) >= n_rows:
+        return int(len(counts))
+    k, d = int(counts.sum()), len(counts)
+    if k == 0:
+        return 0
+    total_valid = n_rows * k / len(sample)
+    if d >= k:
+        return int(round(total_valid))
+    
+    low, high = float(d), total_valid
+    for _ in range(60):
+        mid = (low + high) / 2
+        if mid * -np.expm1(-k / mid) < d:
+            low = mid
+        else:
+            high = mid
+    return int(round(min(high, total_valid)))
+
+def _reservoir_update(reservoir, chunk, seen, sample_size, rng):
+    """
+    تحديث عينة الخزان (Algorithm R) بدفعة جديدة
+    
+    ترتيب الصفوف داخل العينة غير مهم، لذا تُحذف الصفوف المستبدلة وتُلحق
+    الصفوف الجديدة بدل الكتابة في مواضعها.
+    """
+    n_fill = max(0, min(sample_size - seen, len(chunk)))
+    parts = [reservoir] if reservoir is not None else []
+    if n_fill:
+        parts.append(chunk.iloc[:n_fill])
+        reservoir = pd.concat(parts, ignore_index=True)
+    if n_fill == len(chunk):
+        return reservoir
+    
+    positions = np.arange(seen + n_fill, seen + len(chunk))
+    slots = rng.integers(0, positions + 1)
+    accepted = np.flatnonzero(slots < sample_size)
+    if len(accepted) == 0:
+        return reservoir
+    
+    # عند تكرار الموضع نفسه يبقى آخر صف (كما في التنفيذ التسلسلي)
+    final = {}
+    for row in accepted:
+        final[slots[row]] = row
+    replaced = np.fromiter(final.keys(), dtype=np.int64)
+    rows = np.fromiter(final.values(), dtype=np.int64) + n_fill
+    keep = np.ones(len(reservoir), dtype=bool)
+    keep[replaced] = False
+    return pd.concat([reservoir.iloc[keep], chunk.iloc[np.sort(rows)]], ignore_index=True)
+
+def _profile_key(source, sample_size, random_state):
+    """مفتاح الملف التعريفي: بصمة محتوى الملف مع خيارات العينة"""
+    from .data_cache import file_fingerprint
+    return f"{file_fingerprint(source)}-{sample_size}-{random_state}"
+
+def _profile_cache_path(key):
+    from .data_cache import CACHE_DIR
+    return os.path.join(os.path.dirname(CACHE_DIR), 'profiles', f'{key}.json')
+
+def profile_data(source, sample_size=10000, chunksize=100000, random_state=42, use_cache=True):
+    """
+    ملف تعريفي سريع للبيانات الكبيرة
+    
+    الإحصاءات الرخيصة (عدد الصفوف، القيم المفقودة، أنواع الأعمدة، الحد الأدنى
+    والأقصى والمتوسط للأعمدة الرقمية، الذاكرة السطحية) تُحسب بدقة في مرور
+    واحد. أما المكلفة (الذاكرة العميقة للأعمدة النصية وعدد القيم الفريدة)
+    فتُقدَّر من عينة خزان (reservoir sample) بحجم sample_size.
+    
+    Args:
+        source: DataFrame أو مسار ملف بيانات (يُقرأ على دفعات)
+        sample_size: حجم العينة للإحصاءات المكلفة
+        chunksize: حجم الدفعة عند القراءة من ملف
+        random_state: البذرة العشوائية للعينة
+        use_cache: إعادة استخدام الملف المحفوظ لنفس البصمة (للملفات فقط)
+        
+    Returns:
+        dict: الملف التعريفي (قابل للتحويل إلى JSON)
+    """
+    key = None
+    if isinstance(source, str) and use_cache:
+        key = _profile_key(source, sample_size, random_state)
+        if key in _profiles:
+            return _profiles[key]
+        cache_path = _profile_cache_path(key)
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                _profiles[key] = json.load(f)
+            return _profiles[key]
+    
+    rng = np.random.default_rng(random_state)
+    chunks = iter_data_chunks(source, chunksize) if isinstance(source, str) else [source]
+    
+    n_rows = 0
+    shallow_bytes = 0
+    missing = None
+    numeric = {}
+    reservoir = None
+    columns = dtypes = None
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+            dtypes = chunk.dtypes
+            missing = pd.Series(0, index=chunk.columns, dtype=np.int64)
+        missing += chunk.isna().sum()
+        shallow_bytes += int(chunk.memory_usage(index=False, deep=False).sum())
+        for column in chunk.columns:
+            series = chunk[column]
+            if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+                stats = numeric.setdefault(column, {'min': np.inf, 'max': -np.inf, 'sum': 0.0, 'count': 0})
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                valid = values[~np.isnan(values)]
+                if len(valid):
+                    stats['min'] = min(stats['min'], float(valid.min()))
+                    stats['max'] = max(stats['max'], float(valid.max()))
+                    stats['sum'] += float(valid.sum())
+                    stats['count'] += len(valid)
+        
+        if isinstance(source, str):
+            reservoir = _reservoir_update(reservoir, chunk, n_rows, sample_size, rng)
+        elif len(chunk) > sample_size:
+            reservoir = chunk.iloc[np.sort(rng.choice(len(chunk), sample_size, replace=False))]
+        else:
+            reservoir = chunk
+        n_rows += len(chunk)
+    
+    if columns is None:
+        raise ValueError("البيانات فارغة")
+    
+    categorical_columns = [c for c in columns if is_categorical_column(reservoir[c])]
+    
+    # الذاكرة العميقة: الأعمدة النصية تُقدّر من متوسط حجم الصف في العينة
+    memory_bytes = shallow_bytes
+    sample_exact = len(reservoir) >= n_rows
+    if categorical_columns and len(reservoir):
+        deep = reservoir[categorical_columns].memory_usage(index=False, deep=True)
+        shallow = reservoir[categorical_columns].memory_usage(index=False, deep=False)
+        memory_bytes += int((deep - shallow).sum() / len(reservoir) * n_rows)
+    
+    profile = {
+        'n_rows': n_rows,
+        'n_columns': len(columns),
+        'columns': columns,
+        'dtypes': {c: str(dtypes[c]) for c in columns},
+        'missing_values': {c: int(missing[c]) for c in columns},
+        'numeric_columns': [c for c in columns if c in numeric],
+        'categorical_columns': categorical_columns,
+        'numeric_summary': {
+            c: {'min': stats['min'] if stats['count'] else None,
+                'max': stats['max'] if stats['count'] else None,
+                'mean': stats['sum'] / stats['count'] if stats['count'] else None}
+            for c, stats in numeric.items()
+        },
+        'nunique': {c: _estimate_distinct(reservoir[c], n_rows) for c in columns},
+        'memory_usage': memory_bytes / 1024 / 1024,  # MB
+        'sample_size': len(reservoir),
+        'exact': sample_exact
+    }
+    
+    if key is not None:
+        _profiles[key] = profile
+        cache_path = _profile_cache_path(key)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return profile
+
+def get_data_info(data, sample_size=None):
     """
     الحصول على معلومات عن البيانات
     
     Args:
         data: DataFrame البيانات
+        sample_size: تقدير الذاكرة العميقة من عينة بهذا الحجم بدل فحص كل الخلايا
         
     Returns:
         dict: معلومات البيانات
     """
+    if sample_size is not None:
+        profile = profile_data(data, sample_size=sample_size)
+        return {
+            'shape': data.shape,
+            'columns': profile['columns'],
+            'dtypes': data.dtypes.to_dict(),
+            'missing_values': profile['missing_values'],
+            'numeric_columns': profile['numeric_columns'],
+            'categorical_columns': profile['categorical_columns'],
+            'memory_usage': profile['memory_usage']  # MB (تقدير)
+        }
+    
     info = {
         'shape': data.shape,
         'columns': list(data.columns),
@@ -122,30 +741,40 @@ def get_data_info(data):
     
     return info
 
-def validate_data(data, required_columns=None, min_rows=10):
+def validate_data(data, required_columns=None, min_rows=10, profile=None):
     """
     التحقق من صحة البيانات
     
     Args:
-        data: DataFrame البيانات
+        data: DataFrame البيانات (يمكن أن يكون None عند تمرير profile)
         required_columns: الأعمدة المطلوبة
         min_rows: الحد الأدنى لعدد الصفوف
+        profile: ملف تعريفي من profile_data لتجنب فحص البيانات مرة أخرى
         
     Returns:
         bool: صحة البيانات
     """
+    if profile is not None:
+        n_rows, columns = profile['n_rows'], profile['columns']
+        n_missing = sum(profile['missing_values'].values())
+    else:
+        n_rows, columns = len(data), data.columns
+        n_missing = None
+    
     # التحقق من عدد الصفوف
-    if len(data) < min_rows:
-        raise ValueError(f"عدد الصفوف أقل من الحد الأدنى: {len(data)} < {min_rows}")
+    if n_rows < min_rows:
+        raise ValueError(f"عدد الصفوف أقل من الحد الأدنى: {n_rows} < {min_rows}")
     
     # التحقق من الأعمدة المطلوبة
     if required_columns:
-        missing_columns = set(required_columns) - set(data.columns)
+        missing_columns = set(required_columns) - set(columns)
         if missing_columns:
             raise ValueError(f"الأعمدة المفقودة: {missing_columns}")
     
     # التحقق من القيم المفقودة
-    missing_percentage = data.isnull().sum().sum() / (len(data) * len(data.columns)) * 100
+    if n_missing is None:
+        n_missing = data.isnull().sum().sum()
+    missing_percentage = n_missing / (n_rows * len(columns)) * 100
     if missing_percentage > 50:
         raise ValueError(f"نسبة القيم المفقودة عالية جداً: {missing_percentage:.2f}%")
     
@@ -0,0 +1,180 @@
+# =============================================================================
+# مهام التدريب غير المتزامنة
+# =============================================================================
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .batching import QueueFullError
+
+# الإعدادات الافتراضية (قابلة للتغيير عبر متغيرات البيئة)
+DEFAULT_MAX_WORKERS = int(os.environ.get('PEERAI_JOB_WORKERS', 1))
+DEFAULT_MAX_PENDING = int(os.environ.get('PEERAI_JOB_QUEUE_DEPTH', 16))
+DEFAULT_MAX_HISTORY = int(os.environ.get('PEERAI_JOB_HISTORY', 200))
+
+
+class JobCancelled(Exception):
+    """أُلغيت المهمة أثناء التنفيذ"""
+
+
+class Job:
+    """حالة مهمة واحدة وتقدمها"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.cancel_event = threading.Event()
+
+    def report(self, info):
+        """
+        دالة التقدم الممررة إلى التدريب
+
+        تُحدّث حالة المهمة وتوقفها إذا طُلب إلغاؤها (إلغاء تعاوني).
+        """
+        self.progress.update(info)
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def to_dict(self):
+        now = self.finished_at or time.time()
+        elapsed = now - self.started_at if self.started_at else 0.0
+        info = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'elapsed': elapsed,
+            'eta': self.progress.get('eta') if self.status == 'running' else None
+        }
+        if self.result is not None:
+            info['result'] = self.result
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+
+class JobManager:
+    """
+    تنفيذ مهام التدريب في مجموعة عمال محدودة
+
+    عدد المهام الثقيلة المتزامنة محدود بـ max_workers حتى لا تنافس طلبات
+    التنبؤ على المعالج، والمهام الزائدة تنتظر في طابور بحد أقصى max_pending.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, max_history=None):
+        """
+        Args:
+            max_workers: عدد المهام المتزامنة
+            max_pending: أقصى عدد مهام منتظرة أو قيد التنفيذ
+            max_history: عدد المهام المنتهية المحفوظة للاستعلام
+        """
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.max_pending = max_pending or DEFAULT_MAX_PENDING
+        self.max_history = max_history or DEFAULT_MAX_HISTORY
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='peerai-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, params):
+        """
+        إضافة مهمة إلى الطابور
+
+        Args:
+            kind: نوع المهمة (مثل 'train' أو 'nlp_train')
+            fn: دالة التنفيذ fn(params, progress_callback) تعيد نتيجة قابلة لـ JSON
+            params: معاملات المهمة
+
+        Returns:
+            Job: المهمة المضافة
+        """
+        job = Job(kind, params)
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j.status in ('queued', 'running'))
+            if active >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({active} active jobs)")
+            self._jobs[job.id] = job
+            self._trim()
+        job.future = self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        if job.cancel_event.is_set():
+            # أُلغيت بعد أن التقطها عامل وقبل أن تبدأ (future.cancel() لم يعد ممكنًا)
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn(job.params, job.report)
+            job.status = 'completed'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+
+    def _trim(self):
+        """حذف أقدم المهام المنتهية عند تجاوز الحد"""
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in ('completed', 'failed', 'cancelled')]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """المهمة بالمعرف (None إن لم توجد)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        إلغاء مهمة منتظرة فورًا أو قيد التنفيذ عند نقطة التقدم التالية
+
+        الإلغاء تعاوني: لا يمكن مقاطعة تدريب جارٍ (مثل fit واحد طويل)، فالمهمة
+        تتوقف فقط عند استدعائها التالي لـ report(). إذا انتهت دون استدعائه
+        تبقى حالتها 'completed'.
+
+        Returns:
+            Job: المهمة (None إن لم توجد)
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == 'queued' and job.future is not None and job.future.cancel():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+        return job
+
+    def list(self, status=None):
+        """كل المهام (أو المهام بحالة محددة)"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs if status is None or job.status == status]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            **{status: statuses.count(status) for status in ('queued', 'running', 'completed', 'failed', 'cancelled')}
+        }
@@ -0,0 +1,431 @@
+# =============================================================================
+# مقاييس التصنيف من مصفوفة الارتباك
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+
+
+class ConfusionAccumulator:
+    """
+    مصفوفة ارتباك تُبنى تدريجيًا على دفعات
+
+    كل دفعة تُرمَّز بـ pd.factorize (تجزئة دون ترتيب) وتُعد بـ np.bincount
+    واحدة، ثم تُشتق كل المقاييس وتقرير التصنيف من المصفوفة دون المرور على
+    البيانات مرة أخرى. الذاكرة لا تعتمد على عدد الصفوف، لذا يمكن تقييم
+    تنبؤات متدفقة دون الاحتفاظ بها.
+
+    Example:
+        accumulator = ConfusionAccumulator()
+        for y_true, y_pred in batches:
+            accumulator.update(y_true, y_pred)
+        metrics = accumulator.metrics()
+    """
+
+    def __init__(self, labels=None):
+        """
+        Args:
+            labels: قائمة فئات ثابتة (اختياري). إذا حُددت تُتجاهل الصفوف
+                التي تحمل فئات أخرى، كما في confusion_matrix(labels=...)
+        """
+        self.fixed_labels = labels is not None
+        self.labels_ = None
+        self._lookup = None
+        self.matrix_ = np.zeros((0, 0), dtype=np.int64)
+        if labels is not None:
+            self._set_labels(np.asarray(labels))
+            self.matrix_ = np.zeros((len(self.labels_),) * 2, dtype=np.int64)
+
+    def _set_labels(self, labels):
+        self.labels_ = labels
+        self._lookup = pd.Index(labels)
+
+    def _label_index(self, values):
+        """مواقع القيم في قائمة الفئات مع توسيعها بالفئات الجديدة"""
+        if not self.fixed_labels:
+            if self._lookup is None:
+                new = values
+            else:
+                new = values[self._lookup.get_indexer(values) < 0]
+            if len(new):
+                old_labels = self.labels_
+                combined = new if old_labels is None else np.concatenate([old_labels, new])
+                try:
+                    self._set_labels(np.sort(combined))
+                except TypeError:
+                    raise ValueError("Mix of label types (e.g. strings and numbers) is not supported")
+                matrix = np.zeros((len(self.labels_),) * 2, dtype=np.int64)
+                if old_labels is not None and len(old_labels):
+                    position = self._lookup.get_indexer(old_labels)
+                    matrix[np.ix_(position, position)] = self.matrix_
+                self.matrix_ = matrix
+        return self._lookup.get_indexer(values)
+
+    def _codes(self, values):
+        codes, uniques = pd.factorize(values)
+        if len(codes) and codes.min() < 0:
+            raise ValueError("Labels contain missing values")
+        return self._label_index(np.asarray(uniques))[codes]
+
+    def update(self, y_true, y_pred):
+        """
+        إضافة دفعة من القيم الحقيقية والتنبؤات
+
+        Args:
+            y_true: القيم الحقيقية للدفعة
+            y_pred: التنبؤات للدفعة
+
+        Returns:
+            ConfusionAccumulator: الكائن نفسه
+        """
+        y_true = np.asarray(y_true).ravel()
+        y_pred = np.asarray(y_pred).ravel()
+        if len(y_true) != len(y_pred):
+            raise ValueError(f"y_true and y_pred have different lengths: {len(y_true)} != {len(y_pred)}")
+        if not len(y_true):
+            return self
+
+        true_index = self._codes(y_true)
+        pred_index = self._codes(y_pred)
+        if self.fixed_labels:
+            known = (true_index >= 0) & (pred_index >= 0)
+            true_index, pred_index = true_index[known], pred_index[known]
+
+        n_labels = len(self.labels_)
+        self.matrix_ += np.bincount(
+            true_index * n_labels + pred_index, minlength=n_labels * n_labels
+        ).reshape(n_labels, n_labels)
+        return self
+
+    def merge(self, other):
+        """
+        دمج مجمّع آخر (مثل نتائج عامل آخر)
+
+        Returns:
+            ConfusionAccumulator: الكائن نفسه
+        """
+        if other.labels_ is None or not len(other.labels_):
+            return self
+        position = self._label_index(other.labels_)
+        known = position >= 0
+        self.matrix_[np.ix_(position[known], position[known])] += other.matrix_[np.ix_(known, known)]
+        return self
+
+    @property
+    def n_samples(self):
+        return int(self.matrix_.sum())
+
+    @property
+    def confusion_matrix(self):
+        """مصفوفة الارتباك (الصفوف: القيم الحقيقية، الأعمدة: التنبؤات)"""
+        return self.matrix_.copy()
+
+    def per_class(self):
+        """
+        الدقة والاستدعاء و F1 والدعم لكل فئة
+
+        القسمة على صفر تعطي 0.0 كما في sklearn (zero_division='warn').
+
+        Returns:
+            tuple: (precision، recall، f1، support) مصفوفات بطول عدد الفئات
+        """
+        true_positive = np.diag(self.matrix_).astype(np.float64)
+        support = self.matrix_.sum(axis=1)
+        predicted = self.matrix_.sum(axis=0)
+        errors = (support - true_positive) + (predicted - true_positive)
+
+        def ratio(numerator, denominator):
+            return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+        precision = ratio(true_positive, predicted.astype(np.float64))
+        recall = ratio(true_positive, support.astype(np.float64))
+        f1 = ratio(2 * true_positive, 2 * true_positive + errors)
+        return precision, recall, f1, support
+
+    def report(self):
+        """
+        تقرير التصنيف بصيغة classification_report(output_dict=True)
+
+        Returns:
+            dict: مقاييس كل فئة و 'accuracy' و 'macro avg' و 'weighted avg'
+        """
+        if not self.n_samples:
+            raise ValueError("No samples have been accumulated")
+        precision, recall, f1, support = self.per_class()
+        total = support.sum()
+
+        report = {}
+        for i, label in enumerate(self.labels_):
+            report[str(label)] = {
+                'precision': float(precision[i]),
+                'recall': float(recall[i]),
+                'f1-score': float(f1[i]),
+                'support': float(support[i])
+            }
+        report['accuracy'] = float(np.trace(self.matrix_) / total)
+        report['macro avg'] = {
+            'precision': float(precision.mean()),
+            'recall': float(recall.mean()),
+            'f1-score': float(f1.mean()),
+            'support': float(total)
+        }
+        report['weighted avg'] = {
+            'precision': float(np.average(precision, weights=support)),
+            'recall': float(np.average(recall, weights=support)),
+            'f1-score': float(np.average(f1, weights=support)),
+            'support': float(total)
+        }
+        return report
+
+    def metrics(self):
+        """
+        كل مقاييس التصنيف من مصفوفة الارتباك
+
+        Returns:
+            dict: نفس مفاتيح evaluate_classification (الدقة، المتوسطات
+                الموزونة، تقرير التصنيف، مصفوفة الارتباك)
+        """
+        report = self.report()
+        weighted = report['weighted avg']
+        return {
+            'accuracy': report['accuracy'],
+            'precision': weighted['precision'],
+            'recall': weighted['recall'],
+            'f1_score': weighted['f1-score'],
+            'classification_report': report,
+            'confusion_matrix': self.matrix_.tolist()
+        }
+
+
+def classification_metrics(y_true, y_pred, labels=None):
+    """
+    مقاييس التصنيف في مرور واحد على البيانات
+
+    Args:
+        y_true: القيم الحقيقية
+        y_pred: التنبؤات
+        labels: قائمة فئات ثابتة (اختياري)
+
+    Returns:
+        dict: مقاييس التقييم
+    """
+    return ConfusionAccumulator(labels).update(y_true, y_pred).metrics()
+
+
+# =============================================================================
+# مقاييس التجميع القابلة للتوسع
+# =============================================================================
+
+def cluster_codes(labels, noise_label=-1):
+    """ترميز التسميات 0..k-1 مع استبعاد الضوضاء (-1 في DBSCAN و OPTICS)"""
+    labels = np.asarray(labels).ravel()
+    clustered = labels != noise_label
+    codes, uniques = pd.factorize(labels[clustered], sort=True)
+    return codes, np.asarray(uniques), clustered
+
+
+def _cluster_sums(X, codes, n_clusters):
+    """مجموع صفوف كل عنقود بضرب مصفوفة انتماء متفرقة"""
+    from scipy.sparse import csr_matrix
+
+    membership = csr_matrix(
+        (np.ones(len(codes)), (codes, np.arange(len(codes)))), shape=(n_clusters, len(codes))
+    )
+    return np.asarray(membership @ X)
+
+
+def dispersion_scores(X, codes, n_clusters, chunk_size=65536):
+    """
+    مؤشرا Calinski-Harabasz و Davies-Bouldin في زمن خطي
+
+    المراكز ومجموع المربعات داخل العناقيد تُحسب من إحصاءات كافية (العدد
+    والمجموع ومجموع مربعات الأطوال)، ومتوسط بعد كل نقطة عن مركزها يُحسب
+    على دفعات، فلا تُنشأ مصفوفة مسافات بين النقاط.
+
+    Args:
+        X: مصفوفة البيانات (دون نقاط الضوضاء)
+        codes: رقم العنقود لكل صف (0..n_clusters-1)
+        n_clusters: عدد العناقيد
+        chunk_size: عدد الصفوف في كل دفعة
+
+    Returns:
+        tuple: (calinski_harabasz، davies_bouldin) أو (None، None) لأقل من عنقودين
+    """
+    n_samples = len(codes)
+    if n_clusters < 2 or n_clusters >= n_samples:
+        return None, None
+
+    counts = np.bincount(codes, minlength=n_clusters).astype(np.float64)
+    centroids = _cluster_sums(X, codes, n_clusters) / counts[:, None]
+    overall = np.asarray(X.mean(axis=0), dtype=np.float64)
+
+    within = 0.0
+    spread = np.zeros(n_clusters)
+    for start in range(0, n_samples, chunk_size):
+        block = np.asarray(X[start:start + chunk_size], dtype=np.float64)
+        block_codes = codes[start:start + chunk_size]
+        distances = np.sqrt(((block - centroids[block_codes]) ** 2).sum(axis=1))
+        within += float((distances ** 2).sum())
+        spread += np.bincount(block_codes, weights=distances, minlength=n_clusters)
+
+    between = float((counts * ((centroids - overall) ** 2).sum(axis=1)).sum())
+    calinski_harabasz = 1.0 if within == 0 else between * (n_samples - n_clusters) / (within * (n_clusters - 1))
+
+    spread /= counts
+    centroid_distances = np.sqrt(np.maximum(
+        (centroids ** 2).sum(axis=1)[:, None] + (centroids ** 2).sum(axis=1)[None, :] - 2 * centroids @ centroids.T,
+        0
+    ))
+    if np.allclose(spread, 0) or np.allclose(centroid_distances, 0):
+        davies_bouldin = 0.0
+    else:
+        np.fill_diagonal(centroid_distances, np.inf)
+        davies_bouldin = float(np.max((spread[:, None] + spread[None, :]) / centroid_distances, axis=1).mean())
+    return float(calinski_harabasz), davies_bouldin
+
+
+def stratified_cluster_sample(codes, sample_size, random_state=42, min_per_cluster=2):
+    """
+    عينة طبقية حسب العنقود
+
+    كل عنقود يأخذ حصة متناسبة مع حجمه، وبحد أدنى min_per_cluster نقطة حتى
+    يكون معامل silhouette معرّفًا لنقاطه.
+
+    Returns:
+        ndarray: مواقع الصفوف المختارة مرتبة
+    """
+    rng = np.random.default_rng(random_state)
+    counts = np.bincount(codes)
+    quota = np.maximum(np.round(counts * sample_size / len(codes)).astype(np.int64), min_per_cluster)
+    quota = np.minimum(quota, counts)
+
+    order = np.argsort(codes, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    chosen = [
+        order[start + rng.choice(count, size=take, replace=False)]
+        for start, count, take in zip(starts, counts, quota) if take
+    ]
+    return np.sort(np.concatenate(chosen))
+
+
+def silhouette_samples_chunked(X, codes, n_clusters, working_memory_mb=64):
+    """
+    معامل silhouette لكل نقطة مع ذاكرة محدودة
+
+    تُحسب المسافات من دفعة من الصفوف إلى كل النقاط، وتُجمع حسب العنقود
+    بضرب مصفوفة انتماء، فلا تتجاوز الذاكرة working_memory_mb مهما كان
+    عدد النقاط.
+
+    Args:
+        X: مصفوفة البيانات
+        codes: رقم العنقود لكل صف (0..n_clusters-1)
+        n_clusters: عدد العناقيد
+        working_memory_mb: أقصى حجم لمصفوفة المسافات الجزئية
+
+    Returns:
+        ndarray: معامل silhouette لكل صف
+    """
+    from sklearn.metrics import pairwise_distances
+
+    X = np.asarray(X, dtype=np.float64)
+    n_samples = len(codes)
+    counts = np.bincount(codes, minlength=n_clusters).astype(np.float64)
+    membership = np.zeros((n_samples, n_clusters))
+    membership[np.arange(n_samples), codes] = 1.0
+
+    chunk_rows = max(1, int(working_memory_mb * 1024 * 1024 // (8 * max(n_samples, n_clusters))))
+    scores = np.empty(n_samples)
+    for start in range(0, n_samples, chunk_rows):
+        stop = min(start + chunk_rows, n_samples)
+        cluster_distance = pairwise_distances(X[start:stop], X) @ membership
+        own = codes[start:stop]
+        rows = np.arange(stop - start)
+
+        own_size = counts[own] - 1
+        intra = np.divide(cluster_distance[rows, own], own_size,
+                          out=np.zeros(stop - start), where=own_size > 0)
+        cluster_distance /= counts
+        cluster_distance[rows, own] = np.inf
+        inter = cluster_distance.min(axis=1)
+
+        denominator = np.maximum(intra, inter)
+        chunk_scores = np.divide(inter - intra, denominator,
+                                 out=np.zeros(stop - start), where=denominator > 0)
+        # نقاط العناقيد ذات العنصر الواحد قيمتها 0 كما في sklearn
+        chunk_scores[own_size == 0] = 0.0
+        scores[start:stop] = chunk_scores
+    return scores
+
+
+def _stratified_estimate(scores, codes, weights):
+    """متوسط موزون لمتوسطات العناقيد"""
+    n_clusters = len(weights)
+    drawn = np.bincount(codes, minlength=n_clusters).astype(np.float64)
+    means = np.bincount(codes, weights=scores, minlength=n_clusters) / drawn
+    return float((weights * means).sum()), means, drawn
+
+
+def sampled_silhouette(X, codes, n_clusters, sample_size=10000, random_state=42,
+                       confidence=0.95, working_memory_mb=64, n_groups=10):
+    """
+    تقدير silhouette من عينة طبقية مع فترة ثقة
+
+    التقدير متوسط موزون لمتوسطات العناقيد في العينة (أوزانها نسب أحجام
+    العناقيد في البيانات كاملة). معاملات النقاط في العينة مترابطة لأنها
+    تُقاس إلى مجموعة مرجعية واحدة، لذا يُقدَّر التباين بطريقة المجموعات
+    العشوائية: تُقسم العينة إلى n_groups عينات طبقية منفصلة، ويُحسب التقدير
+    في كل منها، وتباين التقديرات مقسومًا على n_groups هو تباين التقدير
+    الكلي. إذا كانت العناقيد أصغر من أن تُقسم يُستخدم تباين العينة الطبقية.
+    تصحيح المجتمع المحدود يجعل الفترة صفرية عندما تشمل العينة كل النقاط.
+
+    Returns:
+        dict: 'score' و 'ci' و 'sample_size'، أو None لأقل من عنقودين
+    """
+    from scipy.stats import t as student_t
+
+    n_samples = len(codes)
+    if n_clusters < 2 or n_clusters >= n_samples:
+        return None
+
+    if sample_size is None or n_samples <= sample_size:
+        positions = np.arange(n_samples)
+    else:
+        positions = stratified_cluster_sample(codes, sample_size, random_state)
+    sample_codes = codes[positions]
+    scores = silhouette_samples_chunked(X[positions], sample_codes, n_clusters, working_memory_mb)
+
+    population = np.bincount(codes, minlength=n_clusters).astype(np.float64)
+    weights = population / n_samples
+    estimate, means, drawn = _stratified_estimate(scores, sample_codes, weights)
+    finite_population = max(0.0, 1 - len(positions) / n_samples)
+
+    if drawn.min() >= 2 * n_groups:
+        # ترتيب عشوائي داخل كل عنقود ثم توزيع دوري على المجموعات
+        rng = np.random.default_rng(random_state)
+        order = np.lexsort((rng.random(len(positions)), sample_codes))
+        rank = np.empty(len(positions), dtype=np.int64)
+        rank[order] = np.arange(len(positions))
+        starts = np.concatenate([[0], np.cumsum(drawn.astype(np.int64))[:-1]])
+        group = (rank - starts[sample_codes]) % n_groups
+
+        replicates = []
+        for g in range(n_groups):
+            members = positions[group == g]
+            member_codes = codes[members]
+            replicate_scores = silhouette_samples_chunked(X[members], member_codes, n_clusters, working_memory_mb)
+            replicates.append(_stratified_estimate(replicate_scores, member_codes, weights)[0])
+        variance = float(np.var(replicates, ddof=1)) / n_groups * finite_population
+        quantile = student_t.ppf(0.5 + confidence / 2, n_groups - 1)
+    else:
+        squares = np.bincount(sample_codes, weights=scores ** 2, minlength=n_clusters)
+        variances = np.divide(squares - drawn * means ** 2, drawn - 1,
+                              out=np.zeros(n_clusters), where=drawn > 1)
+        variance = float((weights ** 2 * np.maximum(variances, 0) / drawn * (1 - drawn / population)).sum())
+        quantile = student_t.ppf(0.5 + confidence / 2, max(1, len(positions) - n_clusters))
+
+    margin = float(quantile * np.sqrt(variance))
+    return {
+        'score': estimate,
+        'ci': [estimate - margin, estimate + margin],
+        'sample_size': int(len(positions))
+    }
@@ -0,0 +1,165 @@
+# =============================================================================
+# ذاكرة تخزين مؤقت للنماذج المحملة (LRU)
+# =============================================================================
+
+import os
+import threading
+from collections import OrderedDict
+
+# الميزانية الافتراضية للذاكرة بالميغابايت (قابلة للتغيير عبر متغير البيئة)
+DEFAULT_MAX_MB = float(os.environ.get('PEERAI_MODEL_CACHE_MB', 1024))
+
+# نمط ربط مصفوفات النماذج بالذاكرة ('r' افتراضيًا، وقيمة فارغة لتعطيله)
+DEFAULT_MMAP_MODE = os.environ.get('PEERAI_MODEL_MMAP', 'r') or None
+
+
+def load_model_file(path, mmap_mode=None):
+    """
+    تحميل ملف نموذج مع ربط مصفوفاته بالذاكرة عند الإمكان
+
+    العمليات التي تحمّل الملف نفسه بنمط mmap تتشارك نسخة واحدة من صفحاته
+    في ذاكرة نظام التشغيل بدل نسخة خاصة لكل عامل.
+    """
+    from .models import load_model
+    return load_model(path, mmap_mode=mmap_mode if mmap_mode is not None else DEFAULT_MMAP_MODE)
+
+
+class ModelCache:
+    """
+    سجل مشترك للنماذج المحملة مع إخلاء الأقدم استخدامًا (LRU)
+
+    المفتاح هو المسار المطلق مع وقت التعديل والحجم، لذلك يُعاد تحميل
+    النموذج تلقائيًا إذا تغير الملف على القرص. يُستخدم حجم الملف
+    كتقدير لحجم النموذج في الذاكرة عند حساب الميزانية.
+    """
+
+    def __init__(self, max_bytes=None, loader=None):
+        """
+        Args:
+            max_bytes: ميزانية الذاكرة بالبايت (None للقيمة الافتراضية)
+            loader: دالة تحميل النموذج من المسار (افتراضيًا load_model_file)
+        """
+        if max_bytes is None:
+            max_bytes = int(DEFAULT_MAX_MB * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.loader = loader or load_model_file
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _file_key(path):
+        """مفتاح الملف: (المسار المطلق، وقت التعديل، الحجم)"""
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def get(self, path):
+        """
+        استرجاع النموذج من الذاكرة أو تحميله من القرص
+
+        Args:
+            path: مسار ملف النموذج
+
+        Returns:
+            النموذج المحمل
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model not found at {path}")
+
+        abs_path, mtime, size = self._file_key(path)
+        with self._lock:
+            entry = self._entries.get(abs_path)
+            if entry is not None and entry['mtime'] == mtime and entry['size'] == size:
+                self._entries.move_to_end(abs_path)
+                self.hits += 1
+                return entry['model']
+            self.misses += 1
+            if entry is not None:
+                # الملف تغير على القرص: إزالة النسخة القديمة
+                self._remove(abs_path)
+
+        # التحميل خارج القفل حتى لا تتوقف الطلبات الأخرى
+        model = self.loader(path)
+
+        with self._lock:
+            if size <= self.max_bytes:
+                if abs_path in self._entries:
+                    self._remove(abs_path)
+                self._entries[abs_path] = {'model': model, 'mtime': mtime, 'size': size}
+                self.current_bytes += size
+                self._evict()
+        return model
+
+    def warm(self, paths):
+        """
+        تحميل مسبق لقائمة نماذج (يتجاهل الملفات غير الموجودة)
+
+        Args:
+            paths: قائمة مسارات النماذج
+
+        Returns:
+            list: المسارات التي تم تحميلها
+        """
+        loaded = []
+        for path in paths:
+            if path and os.path.exists(path):
+                self.get(path)
+                loaded.append(path)
+        return loaded
+
+    def _remove(self, abs_path):
+        entry = self._entries.pop(abs_path)
+        self.current_bytes -= entry['size']
+
+    def _evict(self):
+        """إخلاء النماذج الأقدم استخدامًا حتى الالتزام بالميزانية"""
+        while self.current_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, path=None):
+        """
+        إبطال نموذج محدد أو كل النماذج
+
+        Args:
+            path: مسار النموذج (None لإفراغ الذاكرة بالكامل)
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+                return
+            abs_path = os.path.abspath(path)
+            if abs_path in self._entries:
+                self._remove(abs_path)
+
+    def stats(self):
+        """إحصائيات الذاكرة المؤقتة"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'models': list(self._entries.keys()),
+                'current_mb': self.current_bytes / (1024 * 1024),
+                'max_mb': self.max_bytes / (1024 * 1024),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+# السجل المشترك على مستوى العملية
+model_cache = ModelCache()
+
+# النماذج المطلوب تحميلها مسبقًا عند بدء التشغيل (مفصولة بفواصل)
+PRELOAD_MODELS = [p.strip() for p in os.environ.get('PEERAI_PRELOAD_MODELS', '').split(',') if p.strip()]
+
+
+def load_cached_model(path):
+    """تحميل النموذج عبر السجل المشترك"""
+    return model_cache.get(path)
@@ -2,134 +2,175 @@
 # جميع خوارزميات التعلم الآلي من scikit-learn والمكتبات الإضافية
 # =============================================================================
 
+import importlib
+import importlib.util
+import os
+import time
+import warnings
+from collections.abc import Mapping
+from functools import lru_cache, partial
+
 import joblib
 import numpy as np
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+
+# مستوى ضغط ملفات النماذج الافتراضي (0 يسمح بتحميلها بنمط mmap)
+DEFAULT_COMPRESS = int(os.environ.get('PEERAI_MODEL_COMPRESS', 0))
 
 # =============================================================================
-# استيراد جميع الخوارزميات
+# سجل الخوارزميات الكسول
 # =============================================================================
+# لا تُستورد أي عائلة خوارزميات عند استيراد الحزمة؛ يُحمّل الصنف فقط عند
+# أول طلب له من train_algorithm() أو من يستخدم السجل مباشرة.
 
-from sklearn.linear_model import (
-    LogisticRegression, RidgeClassifier, SGDClassifier, Perceptron, PassiveAggressiveClassifier,
-    LinearRegression, Ridge, Lasso, ElasticNet, HuberRegressor, PassiveAggressiveRegressor
-)
-
-from sklearn.ensemble import (
-    RandomForestClassifier, RandomForestRegressor, AdaBoostClassifier, GradientBoostingClassifier,
-    BaggingClassifier, ExtraTreesClassifier, GradientBoostingRegressor
-)
-
-from sklearn.svm import SVC, SVR
-from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
-from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
-from sklearn.naive_bayes import GaussianNB
-from sklearn.neural_network import MLPClassifier, MLPRegressor
-from sklearn.discriminant_analysis import LinearDiscriminantAnalysis, QuadraticDiscriminantAnalysis
-from sklearn.gaussian_process import GaussianProcessClassifier, GaussianProcessRegressor
-from sklearn.cluster import (
-    KMeans, DBSCAN, AgglomerativeClustering, SpectralClustering, 
-    MeanShift, OPTICS, Birch, MiniBatchKMeans
-)
+@lru_cache(maxsize=None)
+def is_backend_available(module_name):
+    """فحص توفر مكتبة دون استيرادها (النتيجة محفوظة)"""
+    return importlib.util.find_spec(module_name) is not None
 
 # خوارزميات خارجية
-try:
-    from xgboost import XGBClassifier, XGBRegressor
-    XGBOOST_AVAILABLE = True
-except ImportError:
-    XGBOOST_AVAILABLE = False
+XGBOOST_AVAILABLE = is_backend_available('xgboost')
+if not XGBOOST_AVAILABLE:
     print("Warning: XGBoost not available. Install with: pip install xgboost")
 
-try:
-    from lightgbm import LGBMClassifier, LGBMRegressor
-    LIGHTGBM_AVAILABLE = True
-except ImportError:
-    LIGHTGBM_AVAILABLE = False
+LIGHTGBM_AVAILABLE = is_backend_available('lightgbm')
+if not LIGHTGBM_AVAILABLE:
     print("Warning: LightGBM not available. Install with: pip install lightgbm")
 
-try:
-    from catboost import CatBoostClassifier
-    CATBOOST_AVAILABLE = True
-except ImportError:
-    CATBOOST_AVAILABLE = False
+CATBOOST_AVAILABLE = is_backend_available('catboost')
+if not CATBOOST_AVAILABLE:
     print("Warning: CatBoost not available. Install with: pip install catboost")
 
+class LazyAlgorithmRegistry(Mapping):
+    """
+    قاموس خوارزميات يحمّل الصنف عند أول وصول إليه
+
+    كل مدخل هو (الوحدة، اسم الصنف، معاملات افتراضية اختيارية). المدخلات
+    التي لا تتوفر مكتبتها تُستبعد دون استيرادها.
+    """
+
+    def __init__(self, specs):
+        self._specs = {
+            name: spec for name, spec in specs.items()
+            if is_backend_available(spec[0].split('.')[0])
+        }
+        self._resolved = {}
+
+    def __getitem__(self, name):
+        if name not in self._resolved:
+            module_name, class_name, *defaults = self._specs[name]
+            algorithm_class = getattr(importlib.import_module(module_name), class_name)
+            if defaults:
+                algorithm_class = partial(algorithm_class, **defaults[0])
+            self._resolved[name] = algorithm_class
+        return self._resolved[name]
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self):
+        return len(self._specs)
+
+    def class_name(self, name):
+        """اسم الصنف دون استيراده"""
+        return self._specs[name][1]
+
+    def is_loaded(self, name):
+        """هل تم استيراد صنف الخوارزمية بالفعل"""
+        return name in self._resolved
+
 # =============================================================================
 # قواميس الخوارزميات
 # =============================================================================
 
 # التصنيف
-classification_algorithms = {
-    "logistic_regression": LogisticRegression,
-    "random_forest": RandomForestClassifier,
-    "svm": SVC,
-    "knn": KNeighborsClassifier,
-    "decision_tree": DecisionTreeClassifier,
-    "naive_bayes": GaussianNB,
-    "neural_network": MLPClassifier,
-    "bagging": BaggingClassifier,
-    "ada_boost": AdaBoostClassifier,
-    "gradient_boosting": GradientBoostingClassifier,
-    "extra_trees": ExtraTreesClassifier,
-    "ridge_classifier": RidgeClassifier,
-    "sgd_classifier": SGDClassifier,
-    "perceptron": Perceptron,
-    "lda": LinearDiscriminantAnalysis,
-    "qda": QuadraticDiscriminantAnalysis,
-    "gaussian_process_classifier": GaussianProcessClassifier,
-    "passive_aggressive": PassiveAggressiveClassifier,
-}
-
-# إضافة الخوارزميات الخارجية إذا كانت متاحة
-if CATBOOST_AVAILABLE:
-    classification_algorithms["catboost_classifier"] = lambda: CatBoostClassifier(verbose=0)
-
-if XGBOOST_AVAILABLE:
-    classification_algorithms["xgboost_classifier"] = XGBClassifier
-
-if LIGHTGBM_AVAILABLE:
-    classification_algorithms["lightgbm_classifier"] = LGBMClassifier
+classification_algorithms = LazyAlgorithmRegistry({
+    "logistic_regression": ("sklearn.linear_model", "LogisticRegression"),
+    "random_forest": ("sklearn.ensemble", "RandomForestClassifier"),
+    "svm": ("sklearn.svm", "SVC"),
+    "knn": ("sklearn.neighbors", "KNeighborsClassifier"),
+    "decision_tree": ("sklearn.tree", "DecisionTreeClassifier"),
+    "naive_bayes": ("sklearn.naive_bayes", "GaussianNB"),
+    "neural_network": ("sklearn.neural_network", "MLPClassifier"),
+    "bagging": ("sklearn.ensemble", "BaggingClassifier"),
+    "ada_boost": ("sklearn.ensemble", "AdaBoostClassifier"),
+    "gradient_boosting": ("sklearn.ensemble", "GradientBoostingClassifier"),
+    "extra_trees": ("sklearn.ensemble", "ExtraTreesClassifier"),
+    "ridge_classifier": ("sklearn.linear_model", "RidgeClassifier"),
+    "sgd_classifier": ("sklearn.linear_model", "SGDClassifier"),
+    "perceptron": ("sklearn.linear_model", "Perceptron"),
+    "lda": ("sklearn.discriminant_analysis", "LinearDiscriminantAnalysis"),
+    "qda": ("sklearn.discriminant_analysis", "QuadraticDiscriminantAnalysis"),
+    "gaussian_process_classifier": ("sklearn.gaussian_process", "GaussianProcessClassifier"),
+    "passive_aggressive": ("sklearn.linear_model", "PassiveAggressiveClassifier"),
+    # الخوارزميات الخارجية (تُستبعد تلقائيًا إذا لم تكن متاحة)
+    "catboost_classifier": ("catboost", "CatBoostClassifier", {"verbose": 0}),
+    "xgboost_classifier": ("xgboost", "XGBClassifier"),
+    "lightgbm_classifier": ("lightgbm", "LGBMClassifier"),
+})
 
 # الانحدار
-regression_algorithms = {
-    "linear_regression": LinearRegression,
-    "ridge_regression": Ridge,
-    "lasso_regression": Lasso,
-    "elastic_net": ElasticNet,
-    "random_forest_regressor": RandomForestRegressor,
-    "svr": SVR,
-    "knn_regressor": KNeighborsRegressor,
-    "decision_tree_regressor": DecisionTreeRegressor,
-    "neural_network_regressor": MLPRegressor,
-    "gradient_boosting_regressor": GradientBoostingRegressor,
-    "gaussian_process_regressor": GaussianProcessRegressor,
-    "huber_regressor": HuberRegressor,
-    "passive_aggressive_regressor": PassiveAggressiveRegressor,
-}
-
-# إضافة الخوارزميات الخارجية للانحدار إذا كانت متاحة
-if XGBOOST_AVAILABLE:
-    regression_algorithms["xgboost_regressor"] = XGBRegressor
-
-if LIGHTGBM_AVAILABLE:
-    regression_algorithms["lightgbm_regressor"] = LGBMRegressor
+regression_algorithms = LazyAlgorithmRegistry({
+    "linear_regression": ("sklearn.linear_model", "LinearRegression"),
+    "ridge_regression": ("sklearn.linear_model", "Ridge"),
+    "lasso_regression": ("sklearn.linear_model", "Lasso"),
+    "elastic_net": ("sklearn.linear_model", "ElasticNet"),
+    "random_forest_regressor": ("sklearn.ensemble", "RandomForestRegressor"),
+    "svr": ("sklearn.svm", "SVR"),
+    "knn_regressor": ("sklearn.neighbors", "KNeighborsRegressor"),
+    "decision_tree_regressor": ("sklearn.tree", "DecisionTreeRegressor"),
+    "neural_network_regressor": ("sklearn.neural_network", "MLPRegressor"),
+    "gradient_boosting_regressor": ("sklearn.ensemble", "GradientBoostingRegressor"),
+    "gaussian_process_regressor": ("sklearn.gaussian_process", "GaussianProcessRegressor"),
+    "huber_regressor": ("sklearn.linear_model", "HuberRegressor"),
+    "passive_aggressive_regressor": ("sklearn.linear_model", "PassiveAggressiveRegressor"),
+    # الخوارزميات الخارجية للانحدار (تُستبعد تلقائيًا إذا لم تكن متاحة)
+    "xgboost_regressor": ("xgboost", "XGBRegressor"),
+    "lightgbm_regressor": ("lightgbm", "LGBMRegressor"),
+})
 
 # التجميع
-clustering_algorithms = {
-    "kmeans": KMeans,
-    "dbscan": DBSCAN,
-    "agglomerative_clustering": AgglomerativeClustering,
-    "spectral_clustering": SpectralClustering,
-    "mean_shift": MeanShift,
-    "optics": OPTICS,
-    "birch": Birch,
-    "minibatch_kmeans": MiniBatchKMeans
-}
+clustering_algorithms = LazyAlgorithmRegistry({
+    "kmeans": ("sklearn.cluster", "KMeans"),
+    "dbscan": ("sklearn.cluster", "DBSCAN"),
+    "agglomerative_clustering": ("sklearn.cluster", "AgglomerativeClustering"),
+    "spectral_clustering": ("sklearn.cluster", "SpectralClustering"),
+    "mean_shift": ("sklearn.cluster", "MeanShift"),
+    "optics": ("sklearn.cluster", "OPTICS"),
+    "birch": ("sklearn.cluster", "Birch"),
+    "minibatch_kmeans": ("sklearn.cluster", "MiniBatchKMeans"),
+})
 
 # =============================================================================
 # دوال التدريب
 # =============================================================================
 
+def create_algorithm(algorithm_name, task_type='classification', **kwargs):
+    """
+    إنشاء نموذج غير مدرب من السجل
+    
+    Args:
+        algorithm_name: اسم الخوارزمية
+        task_type: نوع المهمة ('classification', 'regression', 'clustering')
+        **kwargs: معاملات إضافية للخوارزمية
+    
+    Returns:
+        النموذج غير المدرب
+    """
+    registries = {
+        'classification': classification_algorithms,
+        'regression': regression_algorithms,
+        'clustering': clustering_algorithms
+    }
+    if task_type not in registries:
+        raise ValueError(f"Unknown task type: {task_type}")
+    if algorithm_name not in registries[task_type]:
+        raise ValueError(f"Unknown {task_type} algorithm: {algorithm_name}")
+    
+    algorithm_class = registries[task_type][algorithm_name]
+    if callable(algorithm_class):
+        return algorithm_class(**kwargs)
+    return algorithm_class
+
 def train_algorithm(X_train, y_train, algorithm_name, task_type='classification', **kwargs):
     """
     دالة عامة لتدريب أي خوارزمية
@@ -144,69 +185,169 @@ def train_algorithm(X_train, y_train, algorithm_name, task_type='classification'
     Returns:
         النموذج المدرب
     """
-    
-    if task_type == 'classification':
-        if algorithm_name in classification_algorithms:
-            algorithm_class = classification_algorithms[algorithm_name]
-            if callable(algorithm_class):
-                model = algorithm_class(**kwargs)
-            else:
-                model = algorithm_class
-            model.fit(X_train, y_train)
-            return model
-        else:
-            raise ValueError(f"Unknown classification algorithm: {algorithm_name}")
-    
-    elif task_type == 'regression':
-        if algorithm_name in regression_algorithms:
-            algorithm_class = regression_algorithms[algorithm_name]
-            if callable(algorithm_class):
-                model = algorithm_class(**kwargs)
-            else:
-                model = algorithm_class
-            model.fit(X_train, y_train)
-            return model
-        else:
-            raise ValueError(f"Unknown regression algorithm: {algorithm_name}")
-    
-    elif task_type == 'clustering':
-        if algorithm_name in clustering_algorithms:
-            algorithm_class = clustering_algorithms[algorithm_name]
-            if callable(algorithm_class):
-                model = algorithm_class(**kwargs)
-            else:
-                model = algorithm_class
-            model.fit(X_train)
-            return model
-        else:
-            raise ValueError(f"Unknown clustering algorithm: {algorithm_name}")
-    
+    model = create_algorithm(algorithm_name, task_type, **kwargs)
+    if task_type == 'clustering':
+        model.fit(X_train)
     else:
-        raise ValueError(f"Unknown task type: {task_type}")
+        model.fit(X_train, y_train)
+    return model
 
 def train_with_gridsearch(X_train, y_train, base_model, param_grid, cv=5):
-    """تدريب مع البحث في الشبكة"""
-    grid = GridSearchCV(base_model, param_grid, cv=cv, n_jobs=-1)
-    grid.fit(X_train, y_train)
-    return grid.best_estimator_
+    """تدريب مع البحث في الشبكة (النموذج الأساسي لا يحتاج تدريبًا مسبقًا)"""
+    from .search import hyperparameter_search
+    model, _ = hyperparameter_search(base_model, X_train, y_train, param_grid, search_type='grid', cv=cv)
+    return model
 
 def train_with_randomized_search(X_train, y_train, base_model, param_distributions, n_iter=100, cv=5):
-    """تدريب مع البحث العشوائي"""
-    random_search = RandomizedSearchCV(base_model, param_distributions, n_iter=n_iter, cv=cv, n_jobs=-1)
-    random_search.fit(X_train, y_train)
-    return random_search.best_estimator_
+    """تدريب مع البحث العشوائي (النموذج الأساسي لا يحتاج تدريبًا مسبقًا)"""
+    from .search import hyperparameter_search
+    model, _ = hyperparameter_search(base_model, X_train, y_train, param_distributions,
+                                     search_type='random', n_iter=n_iter, cv=cv, random_state=None)
+    return model
+
+def train_algorithm_streaming(data_path, target_column, algorithm_name, task_type='classification',
+                              chunksize=10000, scale_features=True, encode_categorical=True,
+                              progress_callback=None, verbose=False, **kwargs):
+    """
+    تدريب خارج الذاكرة للخوارزميات التي تدعم partial_fit
+    
+    القراءة الأولى للملف تدرّب المعالج (الفئات ومعاملات التطبيع) وتجمع
+    الفئات المستهدفة، والقراءة الثانية تحوّل كل دفعة وتمررها إلى
+    partial_fit. الذاكرة محدودة بحجم الدفعة مهما كان حجم الملف. قبل تدريب
+    كل دفعة يُقيَّم النموذج عليها (تقييم تتابعي) لمتابعة التقدم. الصفوف ذات
+    الهدف المفقود تُحذف من كل دفعة في القراءتين.
+    
+    Args:
+        data_path: مسار ملف البيانات (CSV أو Parquet)
+        target_column: اسم عمود الهدف (ليس مطلوباً للتجميع)
+        algorithm_name: اسم الخوارزمية
+        task_type: نوع المهمة ('classification', 'regression', 'clustering')
+        chunksize: عدد الصفوف في كل دفعة
+        scale_features: تطبيع الميزات الرقمية
+        encode_categorical: ترميز الميزات الفئوية
+        progress_callback: دالة تُستدعى بعد كل دفعة بمقاييسها
+        verbose: طباعة التقدم
+        **kwargs: معاملات إضافية للخوارزمية
+    
+    Returns:
+        tuple: (النموذج المدرب، {'preprocessor', 'history', 'classes', 'n_rows'})
+    """
+    from .data_utils import DataPreprocessor, iter_data_chunks
+    
+    model = create_algorithm(algorithm_name, task_type, **kwargs)
+    if not hasattr(model, 'partial_fit'):
+        raise ValueError(f"Algorithm does not support streaming training (partial_fit): {algorithm_name}")
+    
+    if task_type == 'clustering':
+        target_column = None
+    
+    def labeled_chunks():
+        """الدفعات بعد حذف الصفوف ذات الهدف المفقود (في القراءتين)"""
+        for chunk in iter_data_chunks(data_path, chunksize):
+            if target_column is not None:
+                chunk = chunk.dropna(subset=[target_column])
+            if len(chunk):
+                yield chunk
+    
+    # القراءة الأولى: إحصاءات المعالجة والفئات المستهدفة
+    preprocessor = DataPreprocessor(target_column, scale_features, encode_categorical)
+    classes = set()
+    for chunk in labeled_chunks():
+        preprocessor.partial_fit(chunk)
+        if task_type == 'classification':
+            classes.update(chunk[target_column].unique().tolist())
+    classes = np.array(sorted(classes)) if task_type == 'classification' else None
+    
+    # القراءة الثانية: التحويل والتدريب التدريجي
+    history = []
+    rows_seen = 0
+    started = time.time()
+    for i, chunk in enumerate(labeled_chunks()):
+        X = preprocessor.transform(chunk)
+        y = chunk[target_column] if target_column is not None else None
+        
+        # تقييم تتابعي على الدفعة قبل التدريب عليها
+        score = None
+        if i > 0 and hasattr(model, 'score'):
+            try:
+                score = float(model.score(X) if task_type == 'clustering' else model.score(X, y))
+            except Exception:
+                score = None
+        
+        if task_type == 'classification':
+            model.partial_fit(X, y, classes=classes)
+        elif task_type == 'regression':
+            model.partial_fit(X, y)
+        else:
+            model.partial_fit(X)
+        
+        rows_seen += len(chunk)
+        entry = {
+            'chunk': i + 1,
+            'rows': len(chunk),
+            'rows_seen': rows_seen,
+            'score': score,
+            'elapsed': time.time() - started
+        }
+        history.append(entry)
+        if progress_callback is not None:
+            progress_callback(entry)
+        if verbose:
+            score_text = f"{score:.4f}" if score is not None else "-"
+            print(f"Chunk {entry['chunk']}: {rows_seen} rows, score {score_text}")
+    
+    return model, {
+        'preprocessor': preprocessor,
+        'history': history,
+        'classes': classes.tolist() if classes is not None else None,
+        'n_rows': rows_seen
+    }
 
 # =============================================================================
 # دوال حفظ واسترجاع النماذج
 # =============================================================================
 
-def save_model(model, path):
-    """حفظ النموذج"""
-    joblib.dump(model, path)
+def save_model(model, path, compress=None):
+    """
+    حفظ النموذج
+    
+    بدون ضغط تُكتب مصفوفات NumPy (المعاملات، مصفوفات TF-IDF...) كما هي
+    داخل الملف، فيمكن تحميلها بـ load_model(path, mmap_mode='r') لتتشارك
+    العمليات نسخة واحدة من صفحات الملف. الكتابة في ملف مؤقت ثم استبداله،
+    فلا يتأثر عامل يقرأ النسخة القديمة بنمط mmap.
+    
+    Args:
+        model: النموذج
+        path: مسار الحفظ
+        compress: مستوى الضغط 0-9 للأرشفة (الملف المضغوط لا يدعم mmap)
+    """
+    if compress is None:
+        compress = DEFAULT_COMPRESS
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    try:
+        joblib.dump(model, tmp_path, compress=compress)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-def load_model(path):
-    """استرجاع النموذج"""
-    return joblib.load(path)
+def load_model(path, mmap_mode=None):
+    """
+    استرجاع النموذج
+    
+    Args:
+        path: مسار الملف
+        mmap_mode: 'r' لربط المصفوفات الكبيرة بالذاكرة بدل نسخها (للملفات غير المضغوطة)
+    """
+    if mmap_mode is None:
+        return joblib.load(path)
+    with warnings.catch_warnings():
+        # الملفات المضغوطة تُحمّل كاملة دون mmap
+        warnings.filterwarnings('ignore', message='.*mmap_mode.*compressed.*')
+        return joblib.load(path, mmap_mode=mmap_mode)
 
 # =============================================================================
 # دوال مساعدة
@@ -228,22 +369,17 @@ def get_algorithm_info():
         'clustering': {}
     }
     
-    for name, algo in classification_algorithms.items():
-        info['classification'][name] = {
-            'class': algo.__name__ if hasattr(algo, '__name__') else str(algo),
-            'available': True
-        }
-    
-    for name, algo in regression_algorithms.items():
-        info['regression'][name] = {
-            'class': algo.__name__ if hasattr(algo, '__name__') else str(algo),
-            'available': True
-        }
-    
-    for name, algo in clustering_algorithms.items():
-        info['clustering'][name] = {
-            'class': algo.__name__ if hasattr(algo, '__name__') else str(algo),
-            'available': True
-        }
+    registries = {
+        'classification': classification_algorithms,
+        'regression': regression_algorithms,
+        'clustering': clustering_algorithms
+    }
+    for task_type, registry in registries.items():
+        for name in registry:
+            info[task_type][name] = {
+                'class': registry.class_name(name),
+                'available': True,
+                'loaded': registry.is_loaded(name)
+            }
     
     return info 
\ No newline at end of file
@@ -3,18 +3,22 @@
 # =============================================================================
 
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from sklearn.linear_model import LogisticRegression, SGDClassifier
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.svm import SVC
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import joblib
+import json
+import multiprocessing
 import os
+import time
 import pandas as pd
 import numpy as np
 
+from .model_cache import model_cache
+from .models import save_model
+
 class TextClassifier:
     """
     مصنف النصوص المتقدم مع دعم متعدد للخوارزميات والميزات
@@ -45,16 +49,21 @@ class TextClassifier:
         else:
             raise ValueError(f"Unknown vectorizer type: {vectorizer_type}")
         
-        # اختيار المصنف
+        # اختيار المصنف (يُستورد عند الحاجة فقط)
         if classifier_type == 'logistic_regression':
+            from sklearn.linear_model import LogisticRegression
             self.classifier = LogisticRegression(**kwargs)
         elif classifier_type == 'naive_bayes':
+            from sklearn.naive_bayes import MultinomialNB
             self.classifier = MultinomialNB(**kwargs)
         elif classifier_type == 'svm':
+            from sklearn.svm import SVC
             self.classifier = SVC(**kwargs)
         elif classifier_type == 'random_forest':
+            from sklearn.ensemble import RandomForestClassifier
             self.classifier = RandomForestClassifier(**kwargs)
         elif classifier_type == 'sgd':
+            from sklearn.linear_model import SGDClassifier
             self.classifier = SGDClassifier(**kwargs)
         else:
             raise ValueError(f"Unknown classifier type: {classifier_type}")
@@ -67,6 +76,27 @@ class TextClassifier:
         
         return self.pipeline
 
+    def _load_pipeline(self):
+        """تحميل الخط الأنابيب من الذاكرة المشتركة (يُعاد التحميل إذا تغير الملف)"""
+        self.pipeline = model_cache.get(self.model_path)
+        self.classes = list(self.pipeline.classes_)
+        return self.pipeline
+
+    def _metadata_path(self):
+        return self.model_path + '.meta.json'
+
+    def _save_pipeline(self):
+        """حفظ الخط الأنابيب مع ملف وصفي خفيف يُقرأ دون فك النموذج"""
+        save_model(self.pipeline, self.model_path)
+        model_cache.invalidate(self.model_path)
+        metadata = {
+            'vectorizer': type(self.pipeline.named_steps['vectorizer']).__name__,
+            'classifier': type(self.pipeline.named_steps['classifier']).__name__,
+            'classes': [c.item() if hasattr(c, 'item') else c for c in self.pipeline.classes_]
+        }
+        with open(self._metadata_path(), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
     def train(self, data_path, text_column, target_column, vectorizer_type='tfidf', 
               classifier_type='logistic_regression', test_size=0.2, random_state=42, **kwargs):
         """
@@ -104,7 +134,7 @@ class TextClassifier:
         accuracy = accuracy_score(y_test, y_pred)
         
         # حفظ النموذج
-        joblib.dump(self.pipeline, self.model_path)
+        self._save_pipeline()
         
         # حفظ المعلومات
         self.classes = list(self.pipeline.classes_)
@@ -171,7 +201,7 @@ class TextClassifier:
         accuracy = accuracy_score(y_test, y_pred)
         
         # حفظ النموذج
-        joblib.dump(self.pipeline, self.model_path)
+        self._save_pipeline()
         
         # حفظ المعلومات
         self.classes = list(self.pipeline.classes_)
@@ -186,96 +216,254 @@ class TextClassifier:
             'confusion_matrix': confusion_matrix(y_test, y_pred).tolist()
         }
 
-    def predict(self, texts, load_model=True):
+    def _score(self, texts):
+        """
+        حساب التنبؤات والاحتمالات مع تحويل النصوص مرة واحدة فقط
+
+        Returns:
+            tuple: (predictions, probabilities) كمصفوفات NumPy
+        """
+        features = self.pipeline[:-1].transform(texts)
+        classifier = self.pipeline[-1]
+        return classifier.predict(features), classifier.predict_proba(features)
+
+    def predict(self, texts, load_model=True, columnar=False, include_text=True):
         """
         التنبؤ بتصنيف النصوص
         
         Args:
             texts: قائمة النصوص أو نص واحد
             load_model: تحميل النموذج إذا لم يكن محملًا
+            columnar: إرجاع النتائج كأعمدة (DataFrame) بدلًا من قائمة قواميس
+            include_text: تضمين النص الأصلي في النتائج
         """
         
         # تحميل النموذج إذا لزم الأمر
         if self.pipeline is None and load_model:
-            if os.path.exists(self.model_path):
-                self.pipeline = joblib.load(self.model_path)
-                self.classes = list(self.pipeline.classes_)
-            else:
-                raise FileNotFoundError(f"Model not found at {self.model_path}")
+            self._load_pipeline()
         
         # تحويل النص الواحد إلى قائمة
         if isinstance(texts, str):
             texts = [texts]
         
         # التنبؤ
-        predictions = self.pipeline.predict(texts)
-        probabilities = self.pipeline.predict_proba(texts)
+        predictions, probabilities = self._score(texts)
+        if self.classes is None:
+            self.classes = list(self.pipeline.classes_)
+        
+        # النتائج كأعمدة
+        if columnar:
+            columns = {}
+            if include_text:
+                columns['text'] = texts
+            columns['prediction'] = predictions
+            columns['confidence'] = probabilities.max(axis=1)
+            for j, cls in enumerate(self.classes):
+                columns[f'prob_{cls}'] = probabilities[:, j]
+            return pd.DataFrame(columns)
         
         # تنسيق النتائج
-        results = []
-        for i, (pred, prob) in enumerate(zip(predictions, probabilities)):
-            result = {
-                'text': texts[i],
-                'prediction': pred,
-                'confidence': float(max(prob)),
-                'probabilities': dict(zip(self.classes, prob.tolist()))
-            }
-            results.append(result)
+        results = self._build_records(
+            predictions.tolist(), probabilities.max(axis=1).tolist(), probabilities.tolist(),
+            texts if include_text else None
+        )
         
         return results if len(results) > 1 else results[0]
 
-    def predict_batch(self, texts_file, output_file=None):
+    def predict_batch(self, texts_file, output_file=None, chunk_size=10000, output_format=None,
+                      include_text=True, return_results=None, resume=False,
+                      progress_callback=None, verbose=False, n_jobs=1):
         """
         التنبؤ بمجموعة كبيرة من النصوص من ملف
         
+        يُقرأ الملف على دفعات (دون تحميله كاملًا في الذاكرة) وتُكتب نتائج
+        كل دفعة فور جاهزيتها. عند الكتابة إلى CSV يُحفظ ملف تقدم بجانب
+        ملف النتائج يسمح باستئناف العمل من آخر دفعة مكتملة بعد أي انقطاع.
+        
         Args:
             texts_file: مسار ملف النصوص
             output_file: مسار ملف النتائج (اختياري)
+            chunk_size: عدد النصوص في كل دفعة تنبؤ وكتابة
+            output_format: 'csv' أو 'parquet' (افتراضيًا حسب امتداد الملف)
+            include_text: تضمين النص الأصلي في النتائج
+            return_results: إرجاع النتائج في الذاكرة (افتراضيًا فقط عند عدم وجود ملف نتائج؛
+                False يتطلب output_file)
+            resume: الاستئناف من آخر دفعة مكتملة (CSV فقط)
+            progress_callback: دالة تُستدعى بعد كل دفعة بقاموس التقدم
+            verbose: طباعة التقدم والإنتاجية (صف/ثانية)
+            n_jobs: عدد العمليات المتوازية للتنبؤ (-1 لكل الأنوية)
+        
+        Returns:
+            list: النتائج، أو ملخص الكتابة عند الكتابة إلى ملف فقط
         """
         
-        # قراءة النصوص
-        if texts_file.endswith('.csv'):
-            data = pd.read_csv(texts_file)
-            texts = data.iloc[:, 0].tolist()  # العمود الأول
-        else:
-            with open(texts_file, 'r', encoding='utf-8') as f:
-                texts = [line.strip() for line in f if line.strip()]
+        if return_results is None:
+            return_results = output_file is None
+        if not return_results and not output_file:
+            raise ValueError("return_results=False requires an output_file")
         
-        # التنبؤ
-        results = self.predict(texts, load_model=True)
+        if self.pipeline is None:
+            self._load_pipeline()
         
-        # حفظ النتائج
+        # حالة الاستئناف
+        checkpoint = None
+        writer = None
         if output_file:
-            df_results = pd.DataFrame(results)
-            df_results.to_csv(output_file, index=False)
+            writer_format = output_format or ('parquet' if output_file.endswith(('.parquet', '.pq')) else 'csv')
+            if resume and writer_format != 'csv':
+                raise ValueError("Resume is only supported for CSV output")
+            checkpoint = _BatchCheckpoint(output_file, texts_file, chunk_size) if writer_format == 'csv' else None
+            state = checkpoint.load() if (checkpoint is not None and resume) else None
+            if state is not None:
+                # حذف أي دفعة كُتبت جزئيًا بعد آخر نقطة حفظ
+                os.truncate(output_file, state['output_offset'])
+            writer = _ResultWriter(output_file, writer_format, append=state is not None)
+        else:
+            state = None
+        
+        chunks_done = state['chunks_done'] if state else 0
+        rows_done = state['rows_done'] if state else 0
+        
+        # التنبؤ والكتابة على دفعات
+        frames = []
+        rows_this_run = 0
+        started = time.time()
+        try:
+            text_chunks = _iter_text_chunks(texts_file, chunk_size, skip_rows=rows_done)
+            for chunk_index, chunk in enumerate(
+                self._predict_chunks(text_chunks, include_text, n_jobs), start=chunks_done
+            ):
+                if writer is not None:
+                    writer.write(chunk)
+                if return_results:
+                    frames.append(chunk)
+                
+                rows_done += len(chunk)
+                rows_this_run += len(chunk)
+                if checkpoint is not None:
+                    checkpoint.save(chunk_index + 1, rows_done, writer.tell())
+                
+                elapsed = time.time() - started
+                progress = {
+                    'chunk': chunk_index + 1,
+                    'rows_done': rows_done,
+                    'elapsed': elapsed,
+                    'rows_per_sec': rows_this_run / elapsed if elapsed > 0 else 0.0
+                }
+                if progress_callback is not None:
+                    progress_callback(progress)
+                if verbose:
+                    print(f"Chunk {progress['chunk']}: {rows_done} rows ({progress['rows_per_sec']:.0f} rows/s)")
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        # اكتمل العمل: لا حاجة لملف التقدم
+        if checkpoint is not None:
+            checkpoint.clear()
+        
+        if not return_results:
+            elapsed = time.time() - started
+            return {
+                'output_file': output_file,
+                'format': writer.format,
+                'n_rows': rows_done,
+                'resumed': state is not None,
+                'elapsed': elapsed,
+                'rows_per_sec': rows_this_run / elapsed if elapsed > 0 else 0.0
+            }
         
-        return results
+        return self._frames_to_records(frames, include_text)
+
+    def _predict_chunks(self, text_chunks, include_text=True, n_jobs=1):
+        """
+        التنبؤ بدفعات النصوص بالترتيب، تسلسليًا أو عبر مجموعة عمليات
+
+        كل عملية تحمل الخط الأنابيب مرة واحدة فقط: نسخة موروثة عند fork،
+        أو تحميل من القرص بنمط mmap عند عدم توفر fork.
+        """
+        if n_jobs is not None and n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        if not n_jobs or n_jobs == 1:
+            for texts in text_chunks:
+                yield self.predict(texts, columnar=True, include_text=include_text)
+            return
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        if context.get_start_method() == 'fork':
+            # العمليات الفرعية ترث الخط الأنابيب دون أي نسخ أو تسلسل
+            _WORKER_STATE['pipeline'] = self.pipeline
+        try:
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context,
+                                     initializer=_init_predict_worker,
+                                     initargs=(self.model_path,)) as executor:
+                # نافذة محدودة من الدفعات الجارية للحفاظ على الترتيب والذاكرة
+                pending = deque()
+                for texts in text_chunks:
+                    pending.append(executor.submit(_predict_chunk_worker, texts, include_text))
+                    if len(pending) >= 2 * n_jobs:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        finally:
+            _WORKER_STATE.pop('pipeline', None)
+
+    def _build_records(self, predictions, confidences, probabilities, texts=None):
+        """بناء قائمة قواميس النتائج من قوائم Python جاهزة"""
+        if texts is None:
+            return [
+                {'prediction': pred, 'confidence': conf, 'probabilities': dict(zip(self.classes, prob))}
+                for pred, conf, prob in zip(predictions, confidences, probabilities)
+            ]
+        return [
+            {'text': text, 'prediction': pred, 'confidence': conf, 'probabilities': dict(zip(self.classes, prob))}
+            for text, pred, conf, prob in zip(texts, predictions, confidences, probabilities)
+        ]
+
+    def _frames_to_records(self, frames, include_text=True):
+        """تحويل نتائج الأعمدة إلى قائمة قواميس بنفس شكل predict()"""
+        if not frames:
+            return []
+        df = pd.concat(frames, ignore_index=True)
+        probabilities = df[[f'prob_{cls}' for cls in self.classes]].to_numpy().tolist()
+        texts = df['text'].tolist() if include_text else None
+        return self._build_records(df['prediction'].tolist(), df['confidence'].tolist(), probabilities, texts)
 
     def model_info(self):
         """معلومات عن النموذج"""
-        if os.path.exists(self.model_path):
-            self.pipeline = joblib.load(self.model_path)
-            return {
-                'model_path': self.model_path,
-                'vectorizer': type(self.pipeline.named_steps['vectorizer']).__name__,
-                'classifier': type(self.pipeline.named_steps['classifier']).__name__,
-                'classes': list(self.pipeline.classes_),
-                'n_classes': len(self.pipeline.classes_),
-                'model_size_mb': os.path.getsize(self.model_path) / (1024 * 1024)
-            }
-        else:
+        if not os.path.exists(self.model_path):
             return {'error': 'Model not found'}
 
+        # قراءة الملف الوصفي إذا كان أحدث من النموذج، وإلا الرجوع للذاكرة المشتركة
+        meta_path = self._metadata_path()
+        if os.path.exists(meta_path) and os.path.getmtime(meta_path) >= os.path.getmtime(self.model_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        else:
+            pipeline = model_cache.get(self.model_path)
+            metadata = {
+                'vectorizer': type(pipeline.named_steps['vectorizer']).__name__,
+                'classifier': type(pipeline.named_steps['classifier']).__name__,
+                'classes': list(pipeline.classes_)
+            }
+
+        return {
+            'model_path': self.model_path,
+            'vectorizer': metadata['vectorizer'],
+            'classifier': metadata['classifier'],
+            'classes': metadata['classes'],
+            'n_classes': len(metadata['classes']),
+            'model_size_mb': os.path.getsize(self.model_path) / (1024 * 1024)
+        }
+
     def evaluate(self, test_data_path, text_column, target_column):
         """
         تقييم النموذج على بيانات اختبار جديدة
         """
         
         if self.pipeline is None:
-            if os.path.exists(self.model_path):
-                self.pipeline = joblib.load(self.model_path)
-            else:
-                raise FileNotFoundError(f"Model not found at {self.model_path}")
+            self._load_pipeline()
         
         # قراءة بيانات الاختبار
         test_data = pd.read_csv(test_data_path)
@@ -299,6 +487,135 @@ class TextClassifier:
             'probabilities': y_prob.tolist()
         }
 
+# حالة عمليات التنبؤ المتوازي (الخط الأنابيب المحمل مرة واحدة لكل عملية)
+_WORKER_STATE = {}
+
+def _init_predict_worker(model_path):
+    """تهيئة عملية التنبؤ: استخدام النسخة الموروثة أو التحميل بنمط mmap"""
+    pipeline = _WORKER_STATE.get('pipeline')
+    if pipeline is None:
+        pipeline = joblib.load(model_path, mmap_mode='r')
+    classifier = TextClassifier(model_path=model_path)
+    classifier.pipeline = pipeline
+    classifier.classes = list(pipeline.classes_)
+    _WORKER_STATE['classifier'] = classifier
+
+def _predict_chunk_worker(texts, include_text):
+    """التنبؤ بدفعة واحدة داخل عملية فرعية"""
+    return _WORKER_STATE['classifier'].predict(texts, columnar=True, include_text=include_text)
+
+def _iter_text_chunks(texts_file, chunk_size, skip_rows=0):
+    """
+    قراءة النصوص من ملف على دفعات دون تحميله كاملًا
+
+    Args:
+        texts_file: ملف CSV (العمود الأول) أو ملف نصي (سطر لكل نص)
+        chunk_size: عدد النصوص في كل دفعة
+        skip_rows: عدد النصوص المعالجة سابقًا التي يتم تخطيها
+    """
+    if texts_file.endswith('.csv'):
+        skiprows = (lambda i: 0 < i <= skip_rows) if skip_rows else None
+        for frame in pd.read_csv(texts_file, chunksize=chunk_size, skiprows=skiprows):
+            yield frame.iloc[:, 0].tolist()  # العمود الأول
+    else:
+        with open(texts_file, 'r', encoding='utf-8') as f:
+            texts = []
+            skipped = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if skipped < skip_rows:
+                    skipped += 1
+                    continue
+                texts.append(line)
+                if len(texts) == chunk_size:
+                    yield texts
+                    texts = []
+            if texts:
+                yield texts
+
+class _BatchCheckpoint:
+    """
+    ملف تقدم التنبؤ الدفعي: عدد الدفعات والصفوف المكتملة وموضع نهاية ملف النتائج
+    """
+
+    def __init__(self, output_file, texts_file, chunk_size):
+        self.path = output_file + '.progress.json'
+        self.texts_file = os.path.abspath(texts_file)
+        self.chunk_size = chunk_size
+
+    def load(self):
+        """قراءة نقطة الحفظ إذا كانت تخص نفس الملف ونفس حجم الدفعة"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('texts_file') != self.texts_file or state.get('chunk_size') != self.chunk_size:
+            return None
+        return state
+
+    def save(self, chunks_done, rows_done, output_offset):
+        state = {
+            'texts_file': self.texts_file,
+            'chunk_size': self.chunk_size,
+            'chunks_done': chunks_done,
+            'rows_done': rows_done,
+            'output_offset': output_offset
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class _ResultWriter:
+    """
+    كاتب نتائج تدريجي (CSV أو Parquet) يكتب كل دفعة فور جاهزيتها
+    """
+
+    def __init__(self, path, output_format=None, append=False):
+        if output_format is None:
+            output_format = 'parquet' if path.endswith(('.parquet', '.pq')) else 'csv'
+        if output_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.path = path
+        self.format = output_format
+        self._file = None
+        self._parquet_writer = None
+        self._write_header = not append
+        if output_format == 'csv':
+            self._file = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self._file, header=self._write_header, index=False)
+            self._write_header = False
+            self._file.flush()
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Parquet output requires pyarrow. Install with: pip install pyarrow")
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+
+    def tell(self):
+        """موضع نهاية البيانات المكتوبة (CSV فقط)"""
+        return self._file.tell() if self._file is not None else None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
 class TextPreprocessor:
     """
     معالج النصوص المسبق
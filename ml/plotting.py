@@ -0,0 +1,270 @@
+# =============================================================================
+# رسم التقارير دون واجهة رسومية
+# =============================================================================
+
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .metrics import ConfusionAccumulator
+from .models import is_backend_available
+
+MATPLOTLIB_AVAILABLE = is_backend_available('matplotlib')
+
+# الإعدادات الافتراضية (قابلة للتغيير عبر متغيرات البيئة)
+DEFAULT_MAX_POINTS = int(os.environ.get('PEERAI_PLOT_MAX_POINTS', 5000))
+DEFAULT_WORKERS = int(os.environ.get('PEERAI_PLOT_WORKERS', 2))
+DEFAULT_POOL = os.environ.get('PEERAI_PLOT_POOL', 'thread')
+
+# صيغ الإخراج ونوع المحتوى لكل منها
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# أقصى عدد فئات تُكتب قيمها داخل خلايا مصفوفة الارتباك
+MAX_ANNOTATED_CLASSES = 30
+
+
+def _new_figure(figsize):
+    """
+    شكل مستقل عن pyplot
+
+    الأشكال المنشأة بـ Figure مباشرة لا تُسجل في الحالة العامة لـ pyplot،
+    فلا تبقى في الذاكرة بعد انتهاء استخدامها ويمكن رسمها من عدة خيوط.
+    """
+    if not MATPLOTLIB_AVAILABLE:
+        raise ImportError("Plotting requires matplotlib. Install with: pip install matplotlib")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def downsample_points(x, y, max_points=None, random_state=42):
+    """
+    عينة عشوائية ثابتة البذرة من نقاط الرسم
+
+    Args:
+        x: الإحداثيات الأفقية
+        y: الإحداثيات الرأسية
+        max_points: أقصى عدد نقاط (None = DEFAULT_MAX_POINTS)
+        random_state: البذرة العشوائية
+
+    Returns:
+        tuple: (x، y، العدد الكلي للنقاط)
+    """
+    x, y = np.asarray(x).ravel(), np.asarray(y).ravel()
+    max_points = max_points or DEFAULT_MAX_POINTS
+    if len(x) <= max_points:
+        return x, y, len(x)
+    rng = np.random.default_rng(random_state)
+    keep = np.sort(rng.choice(len(x), size=max_points, replace=False))
+    return x[keep], y[keep], len(x)
+
+
+def confusion_matrix_figure(matrix, classes=None):
+    """
+    رسم مصفوفة الارتباك كخريطة حرارية
+
+    Args:
+        matrix: مصفوفة الارتباك
+        classes: أسماء الفئات
+
+    Returns:
+        Figure: الشكل (غير مسجل في pyplot)
+    """
+    matrix = np.asarray(matrix)
+    figure = _new_figure((8, 6))
+    ax = figure.add_subplot()
+    image = ax.imshow(matrix, cmap='Blues', aspect='auto')
+    figure.colorbar(image, ax=ax)
+
+    ticks = np.arange(matrix.shape[0])
+    labels = [str(c) for c in classes] if classes is not None else [str(t) for t in ticks]
+    ax.set_xticks(ticks)
+    ax.set_xticklabels(labels)
+    ax.set_yticks(ticks)
+    ax.set_yticklabels(labels)
+
+    if matrix.shape[0] <= MAX_ANNOTATED_CLASSES:
+        threshold = matrix.max() / 2 if matrix.size else 0
+        for i, j in np.ndindex(matrix.shape):
+            ax.text(j, i, f'{matrix[i, j]:d}', ha='center', va='center',
+                    color='white' if matrix[i, j] > threshold else 'black')
+
+    ax.set_title('مصفوفة الارتباك')
+    ax.set_ylabel('القيم الحقيقية')
+    ax.set_xlabel('التنبؤات')
+    figure.tight_layout()
+    return figure
+
+
+def regression_results_figure(y_true, y_pred, max_points=None, random_state=42):
+    """
+    رسم التنبؤات مقابل القيم الحقيقية وتحليل الفروق
+
+    نقاط الانتشار تُختزل إلى max_points بعينة ثابتة البذرة، أما خط المطابقة
+    فيُحسب من كل البيانات.
+
+    Args:
+        y_true: القيم الحقيقية
+        y_pred: التنبؤات
+        max_points: أقصى عدد نقاط في كل رسم انتشار
+        random_state: بذرة العينة
+
+    Returns:
+        Figure: الشكل (غير مسجل في pyplot)
+    """
+    y_true = np.asarray(y_true, dtype=np.float64).ravel()
+    y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+    low, high = float(y_true.min()), float(y_true.max())
+    true_shown, pred_shown, total = downsample_points(y_true, y_pred, max_points, random_state)
+
+    figure = _new_figure((10, 4))
+
+    # رسم التنبؤات مقابل القيم الحقيقية
+    ax = figure.add_subplot(1, 2, 1)
+    ax.scatter(true_shown, pred_shown, alpha=0.5, s=8, rasterized=True)
+    ax.plot([low, high], [low, high], 'r--', lw=2)
+    ax.set_xlabel('القيم الحقيقية')
+    ax.set_ylabel('التنبؤات')
+    ax.set_title('التنبؤات مقابل القيم الحقيقية')
+
+    # رسم الفروق
+    ax = figure.add_subplot(1, 2, 2)
+    ax.scatter(pred_shown, true_shown - pred_shown, alpha=0.5, s=8, rasterized=True)
+    ax.axhline(y=0, color='r', linestyle='--')
+    ax.set_xlabel('التنبؤات')
+    ax.set_ylabel('الفروق')
+    ax.set_title('تحليل الفروق')
+
+    if len(true_shown) < total:
+        figure.text(0.99, 0.01, f'{len(true_shown)} / {total}', ha='right', va='bottom', fontsize=8)
+    figure.tight_layout()
+    return figure
+
+
+def render_figure(figure, fmt='png', dpi=100):
+    """
+    تحويل الشكل إلى بايتات PNG أو SVG ثم تفريغه
+
+    Args:
+        figure: الشكل
+        fmt: 'png' أو 'svg'
+        dpi: الدقة
+
+    Returns:
+        bytes: الصورة
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported image format: {fmt}. Choose from {tuple(FORMATS)}")
+    buffer = io.BytesIO()
+    try:
+        figure.savefig(buffer, format=fmt, dpi=dpi)
+    finally:
+        figure.clear()
+    return buffer.getvalue()
+
+
+def render_confusion_matrix(y_true, y_pred, classes=None, fmt='png', dpi=100):
+    """رسم مصفوفة الارتباك مباشرة إلى بايتات"""
+    accumulator = ConfusionAccumulator(classes).update(y_true, y_pred)
+    return render_figure(confusion_matrix_figure(accumulator.matrix_, accumulator.labels_), fmt, dpi)
+
+
+def render_regression_results(y_true, y_pred, max_points=None, random_state=42, fmt='png', dpi=100):
+    """رسم نتائج الانحدار مباشرة إلى بايتات"""
+    return render_figure(regression_results_figure(y_true, y_pred, max_points, random_state), fmt, dpi)
+
+
+# أنواع الرسوم المتاحة عبر PlotRenderer
+RENDERERS = {
+    'confusion_matrix': render_confusion_matrix,
+    'regression_results': render_regression_results
+}
+
+
+def render(kind, **kwargs):
+    """رسم تقرير حسب نوعه (دالة على مستوى الوحدة لتعمل في عمليات فرعية)"""
+    if kind not in RENDERERS:
+        raise ValueError(f"Unknown plot kind: {kind}. Choose from {tuple(RENDERERS)}")
+    return RENDERERS[kind](**kwargs)
+
+
+class PlotRenderer:
+    """
+    مجموعة عمال لرسم التقارير خارج خيوط الطلبات
+
+    'thread' (الافتراضي) يكفي لعزل الرسم عن خيوط الطلبات، و 'process'
+    يرسم عدة تقارير على عدة أنوية فعليًا (البيانات تُنقل إلى العامل، لذا
+    يُفضل تمرير بيانات مختزلة). مجموعة العمال تُنشأ عند أول طلب.
+    """
+
+    def __init__(self, max_workers=None, pool=None):
+        """
+        Args:
+            max_workers: عدد العمال (None = PEERAI_PLOT_WORKERS)
+            pool: 'thread' أو 'process' (None = PEERAI_PLOT_POOL)
+        """
+        self.max_workers = max_workers or DEFAULT_WORKERS
+        self.pool = pool or DEFAULT_POOL
+        if self.pool not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool type: {self.pool}. Choose 'thread' or 'process'")
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.pool == 'process':
+                    import multiprocessing
+                    # fork من خادم متعدد الخيوط قد ينسخ أقفالًا محجوزة
+                    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                    self._executor = ProcessPoolExecutor(
+                        self.max_workers, mp_context=multiprocessing.get_context(method)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='peerai-plot')
+            return self._executor
+
+    def submit(self, kind, **kwargs):
+        """
+        إضافة طلب رسم
+
+        Args:
+            kind: نوع الرسم (من RENDERERS)
+            **kwargs: معاملات دالة الرسم (بما فيها fmt و dpi)
+
+        Returns:
+            Future: نتيجته بايتات الصورة
+        """
+        if kind not in RENDERERS:
+            raise ValueError(f"Unknown plot kind: {kind}. Choose from {tuple(RENDERERS)}")
+        return self._get_executor().submit(render, kind, **kwargs)
+
+    def render_many(self, requests, timeout=None):
+        """
+        رسم عدة تقارير بالتوازي
+
+        Args:
+            requests: قائمة قواميس {'kind': ..., ...معاملات الرسم}
+            timeout: أقصى زمن انتظار لكل تقرير بالثواني
+
+        Returns:
+            list: بايتات كل صورة بترتيب الطلبات
+        """
+        futures = [self.submit(**request) for request in requests]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# مجموعة العمال المشتركة
+plot_renderer = PlotRenderer()
@@ -2,15 +2,27 @@
 # التنبؤ والتقييم
 # =============================================================================
 
+import os
+import re
+import uuid
+
 import numpy as np
 import pandas as pd
 from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    classification_report, confusion_matrix,
-    mean_squared_error, mean_absolute_error, r2_score,
-    silhouette_score, calinski_harabasz_score
+    mean_squared_error, mean_absolute_error, r2_score
 )
 
+from .metrics import ConfusionAccumulator, cluster_codes, dispersion_scores, sampled_silhouette
+
+# حجم عينة silhouette الافتراضي (قابل للتغيير عبر متغيرات البيئة)
+DEFAULT_SILHOUETTE_SAMPLE = int(os.environ.get('PEERAI_SILHOUETTE_SAMPLE', 10000))
+
+# مجلد ملفات التنبؤات الجانبية للتقارير
+REPORT_DIR = os.environ.get('PEERAI_REPORT_DIR', os.path.join('models', 'reports'))
+REPORT_FORMATS = ('npy', 'parquet')
+REPORT_ROW_GROUP = 65536
+MAX_REPORT_PAGE = 1000
+
 def predict(model, X):
     """
     التنبؤ باستخدام النموذج
@@ -47,6 +59,9 @@ def evaluate_classification(y_true, y_pred, y_prob=None):
     """
     تقييم نموذج التصنيف
     
+    كل المقاييس تُشتق من مصفوفة ارتباك واحدة تُبنى في مرور واحد
+    (انظر ConfusionAccumulator).
+    
     Args:
         y_true: القيم الحقيقية
         y_pred: التنبؤات
@@ -55,14 +70,7 @@ def evaluate_classification(y_true, y_pred, y_prob=None):
     Returns:
         dict: مقاييس التقييم
     """
-    evaluation = {
-        'accuracy': accuracy_score(y_true, y_pred),
-        'precision': precision_score(y_true, y_pred, average='weighted'),
-        'recall': recall_score(y_true, y_pred, average='weighted'),
-        'f1_score': f1_score(y_true, y_pred, average='weighted'),
-        'classification_report': classification_report(y_true, y_pred, output_dict=True),
-        'confusion_matrix': confusion_matrix(y_true, y_pred).tolist()
-    }
+    evaluation = ConfusionAccumulator().update(y_true, y_pred).metrics()
     
     # إضافة مقاييس إضافية إذا كانت الاحتمالات متاحة
     if y_prob is not None:
@@ -75,6 +83,22 @@ def evaluate_classification(y_true, y_pred, y_prob=None):
     
     return evaluation
 
+def evaluate_classification_chunks(chunks, labels=None):
+    """
+    تقييم تنبؤات تصنيف متدفقة دون الاحتفاظ بها في الذاكرة
+    
+    Args:
+        chunks: أزواج (y_true, y_pred) لكل دفعة
+        labels: قائمة فئات ثابتة (اختياري)
+        
+    Returns:
+        dict: مقاييس التقييم (مثل evaluate_classification دون الاحتمالات)
+    """
+    accumulator = ConfusionAccumulator(labels)
+    for y_true, y_pred in chunks:
+        accumulator.update(y_true, y_pred)
+    return accumulator.metrics()
+
 def evaluate_regression(y_true, y_pred):
     """
     تقييم نموذج الانحدار
@@ -98,23 +122,54 @@ def evaluate_regression(y_true, y_pred):
     
     return evaluation
 
-def evaluate_clustering(X, labels):
+def evaluate_clustering(X, labels, sample_size=None, random_state=42, confidence=0.95,
+                        metrics=('silhouette', 'calinski_harabasz', 'davies_bouldin')):
     """
     تقييم نموذج التجميع
     
+    silhouette تكلفته تربيعية، لذا يُقدَّر من عينة طبقية حسب العنقود مع فترة
+    ثقة ويُحسب على دفعات بذاكرة محدودة. Calinski-Harabasz و Davies-Bouldin
+    يُحسبان على كل البيانات في زمن خطي. نقاط الضوضاء (التسمية -1) تُستبعد
+    من المقاييس وتُعد في 'n_noise'.
+    
     Args:
         X: البيانات
         labels: تسميات العناقيد
+        sample_size: حجم عينة silhouette (None = PEERAI_SILHOUETTE_SAMPLE،
+            0 = كل البيانات)
+        random_state: بذرة العينة
+        confidence: مستوى فترة الثقة
+        metrics: المقاييس المطلوبة
         
     Returns:
-        dict: مقاييس التقييم
+        dict: مقاييس التقييم (None للمقاييس غير المعرّفة لأقل من عنقودين)
     """
+    if sample_size is None:
+        sample_size = DEFAULT_SILHOUETTE_SAMPLE
+    codes, clusters, clustered = cluster_codes(labels)
+    X = np.asarray(X, dtype=np.float64)
+    if not clustered.all():
+        X = X[clustered]
+    n_clusters = len(clusters)
+    
     evaluation = {
-        'silhouette_score': silhouette_score(X, labels),
-        'calinski_harabasz_score': calinski_harabasz_score(X, labels),
-        'n_clusters': len(np.unique(labels)),
-        'cluster_sizes': np.bincount(labels).tolist()
+        'n_clusters': n_clusters,
+        'n_noise': int((~clustered).sum()),
+        'cluster_sizes': np.bincount(codes, minlength=n_clusters).tolist()
     }
+    if 'silhouette' in metrics:
+        silhouette = sampled_silhouette(X, codes, n_clusters, sample_size or None,
+                                        random_state, confidence)
+        evaluation['silhouette_score'] = silhouette['score'] if silhouette else None
+        evaluation['silhouette_ci'] = silhouette['ci'] if silhouette else None
+        evaluation['silhouette_sample_size'] = silhouette['sample_size'] if silhouette else 0
+        evaluation['confidence'] = confidence
+    if 'calinski_harabasz' in metrics or 'davies_bouldin' in metrics:
+        calinski_harabasz, davies_bouldin = dispersion_scores(X, codes, n_clusters)
+        if 'calinski_harabasz' in metrics:
+            evaluation['calinski_harabasz_score'] = calinski_harabasz
+        if 'davies_bouldin' in metrics:
+            evaluation['davies_bouldin_score'] = davies_bouldin
     
     return evaluation
 
@@ -143,110 +198,233 @@ def evaluate(y_true, y_pred, task_type='classification', X=None, y_prob=None):
     else:
         raise ValueError(f"نوع المهمة غير مدعوم: {task_type}")
 
-def cross_validate_model(model, X, y, cv=5, task_type='classification'):
+def cross_validate_model(model, X, y, cv=5, task_type='classification', scoring=None, n_jobs=1,
+                         backend=None, dataset_fingerprint=None, abort_threshold=None, **kwargs):
     """
     التحقق المتقاطع من النموذج
     
+    الطيات تُدرَّب بالتوازي وتوزيعها يُحفظ حسب بصمة البيانات، وكل المقاييس
+    تُحسب من تنبؤ واحد لكل طية (انظر validation.cross_validate).
+    
     Args:
         model: النموذج
         X: البيانات
         y: الهدف
         cv: عدد الطيات
         task_type: نوع المهمة
+        scoring: مقياس أو قائمة مقاييس (افتراضيًا accuracy أو r2)
+        n_jobs: عدد الطيات المتوازية
+        backend: واجهة joblib الخلفية
+        dataset_fingerprint: بصمة البيانات لحفظ توزيع الطيات
+        abort_threshold: إيقاف التحقق مبكرًا إذا كان المقياس الرئيسي أسوأ من الحد
+        **kwargs: معاملات إضافية لـ cross_validate
         
     Returns:
         dict: نتائج التحقق المتقاطع
     """
-    from sklearn.model_selection import cross_val_score
-    
-    if task_type == 'classification':
-        scoring = 'accuracy'
-    elif task_type == 'regression':
-        scoring = 'r2'
-    else:
-        scoring = 'accuracy'
+    from .validation import cross_validate
     
-    scores = cross_val_score(model, X, y, cv=cv, scoring=scoring)
-    
-    return {
-        'cv_scores': scores.tolist(),
-        'mean_score': scores.mean(),
-        'std_score': scores.std(),
-        'min_score': scores.min(),
-        'max_score': scores.max()
-    }
+    return cross_validate(model, X, y, cv=cv, task_type=task_type, scoring=scoring, n_jobs=n_jobs,
+                          backend=backend, dataset_fingerprint=dataset_fingerprint,
+                          abort_threshold=abort_threshold, **kwargs)
 
 def plot_confusion_matrix(y_true, y_pred, classes=None):
     """
     رسم مصفوفة الارتباك
     
+    الشكل لا يُسجل في pyplot، فيُحرر بمجرد انتهاء استخدامه. لرسمه مباشرة
+    إلى PNG/SVG استخدم plotting.render_confusion_matrix أو plot_renderer.
+    
     Args:
         y_true: القيم الحقيقية
         y_pred: التنبؤات
         classes: أسماء الفئات
         
     Returns:
-        matplotlib figure: الرسم البياني
+        matplotlib Figure: الرسم البياني
     """
-    import matplotlib.pyplot as plt
-    import seaborn as sns
-    
-    cm = confusion_matrix(y_true, y_pred)
-    
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                xticklabels=classes, yticklabels=classes)
-    plt.title('مصفوفة الارتباك')
-    plt.ylabel('القيم الحقيقية')
-    plt.xlabel('التنبؤات')
-    plt.tight_layout()
+    from .plotting import confusion_matrix_figure
     
-    return plt.gcf()
+    accumulator = ConfusionAccumulator().update(y_true, y_pred)
+    return confusion_matrix_figure(accumulator.matrix_, classes if classes is not None else accumulator.labels_)
 
-def plot_regression_results(y_true, y_pred):
+def plot_regression_results(y_true, y_pred, max_points=None):
     """
     رسم نتائج الانحدار
     
     Args:
         y_true: القيم الحقيقية
         y_pred: التنبؤات
+        max_points: أقصى عدد نقاط في رسوم الانتشار (None = PEERAI_PLOT_MAX_POINTS)
+        
+    Returns:
+        matplotlib Figure: الرسم البياني
+    """
+    from .plotting import regression_results_figure
+    
+    return regression_results_figure(y_true, y_pred, max_points)
+
+def _report_columns(y_pred, y_true=None, y_prob=None, classes=None):
+    """أعمدة ملف التنبؤات (النصوص تُحول إلى عرض ثابت لتُحفظ دون pickle)"""
+    def column(values):
+        values = np.asarray(values).ravel()
+        return values.astype(str) if values.dtype.kind == 'O' else values
+
+    columns = {'prediction': column(y_pred)}
+    if y_true is not None:
+        columns['actual'] = column(y_true)
+    if y_prob is not None:
+        labels = classes if classes is not None else range(y_prob.shape[1])
+        for i, label in enumerate(labels):
+            columns[f'prob_{label}'] = np.asarray(y_prob[:, i], dtype=np.float32)
+    return columns
+
+def write_prediction_file(columns, path, fmt=None):
+    """
+    كتابة أعمدة التنبؤات إلى ملف مضغوط الحجم
+    
+    'npy' مصفوفة مهيكلة يمكن ربطها بالذاكرة (mmap) وقراءة أي نطاق صفوف منها
+    دون تحميل الملف، و 'parquet' ملف عمودي بمجموعات صفوف. الكتابة ذرية.
+    
+    Args:
+        columns: قاموس {اسم العمود: مصفوفة}
+        path: مسار الملف
+        fmt: 'npy' أو 'parquet' (افتراضيًا حسب امتداد المسار)
+        
+    Returns:
+        str: مسار الملف
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report format: {fmt}. Choose from {REPORT_FORMATS}")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    
+    if fmt == 'npy':
+        n_rows = len(next(iter(columns.values())))
+        table = np.empty(n_rows, dtype=[(name, values.dtype) for name, values in columns.items()])
+        for name, values in columns.items():
+            table[name] = values
+        with open(tmp_path, 'wb') as f:
+            np.save(f, table)
+    else:
+        from .data_utils import PYARROW_AVAILABLE
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Parquet reports require pyarrow. Install with: pip install pyarrow")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table(columns), tmp_path, row_group_size=REPORT_ROW_GROUP)
+    os.replace(tmp_path, path)
+    return path
+
+def _page_rows(columns):
+    """صفوف الصفحة كقواميس (قيم float32 تُكتب بأقصر تمثيل عشري لها)"""
+    values = [
+        [float(str(v)) for v in column] if column.dtype == np.float32 else column.tolist()
+        for column in columns.values()
+    ]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+def read_prediction_rows(path, offset=0, limit=100):
+    """
+    قراءة صفحة من صفوف ملف التنبؤات
+    
+    ملفات npy تُربط بالذاكرة وملفات parquet تُقرأ منها مجموعات الصفوف التي
+    تغطي الصفحة فقط، فالزمن والذاكرة يعتمدان على حجم الصفحة لا حجم الملف.
+    
+    Args:
+        path: مسار ملف التنبؤات
+        offset: رقم أول صف
+        limit: عدد الصفوف (بحد أقصى MAX_REPORT_PAGE)
         
     Returns:
-        matplotlib figure: الرسم البياني
+        dict: الصفوف والعدد الكلي وموضع الصفحة التالية
     """
-    import matplotlib.pyplot as plt
-    
-    plt.figure(figsize=(10, 4))
-    
-    # رسم التنبؤات مقابل القيم الحقيقية
-    plt.subplot(1, 2, 1)
-    plt.scatter(y_true, y_pred, alpha=0.5)
-    plt.plot([y_true.min(), y_true.max()], [y_true.min(), y_true.max()], 'r--', lw=2)
-    plt.xlabel('القيم الحقيقية')
-    plt.ylabel('التنبؤات')
-    plt.title('التنبؤات مقابل القيم الحقيقية')
-    
-    # رسم الفروق
-    plt.subplot(1, 2, 2)
-    residuals = y_true - y_pred
-    plt.scatter(y_pred, residuals, alpha=0.5)
-    plt.axhline(y=0, color='r', linestyle='--')
-    plt.xlabel('التنبؤات')
-    plt.ylabel('الفروق')
-    plt.title('تحليل الفروق')
-    
-    plt.tight_layout()
-    return plt.gcf()
+    offset, limit = int(offset), int(limit)
+    if offset < 0 or not 1 <= limit <= MAX_REPORT_PAGE:
+        raise ValueError(f"offset must be >= 0 and limit between 1 and {MAX_REPORT_PAGE}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Prediction file not found: {path}")
+    
+    if path.endswith('.npy'):
+        table = np.load(path, mmap_mode='r')
+        total = len(table)
+        page = table[offset:offset + limit]
+        rows = _page_rows({name: page[name] for name in page.dtype.names})
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path)
+        total = parquet.metadata.num_rows
+        groups, start, first_row = [], 0, None
+        for i in range(parquet.metadata.num_row_groups):
+            size = parquet.metadata.row_group(i).num_rows
+            if start + size > offset and start < offset + limit:
+                groups.append(i)
+                first_row = start if first_row is None else first_row
+            start += size
+        rows = []
+        if groups:
+            page = parquet.read_row_groups(groups).slice(offset - first_row, limit)
+            rows = _page_rows({name: page.column(name).to_numpy() for name in page.column_names})
+    
+    end = offset + len(rows)
+    return {
+        'offset': offset,
+        'limit': limit,
+        'total': int(total),
+        'rows': rows,
+        'next_offset': end if end < total else None
+    }
 
-def generate_prediction_report(model, X_test, y_test, task_type='classification'):
+def report_file_path(report_id, report_dir=None):
+    """مسار ملف تنبؤات تقرير محفوظ (None إن لم يوجد أو كان المعرف غير صالح)"""
+    if not re.fullmatch(r'[0-9a-f]{32}', str(report_id)):
+        return None
+    for fmt in REPORT_FORMATS:
+        path = os.path.join(report_dir or REPORT_DIR, f'{report_id}.{fmt}')
+        if os.path.exists(path):
+            return path
+    return None
+
+def _prediction_summary(y_pred, task_type, y_prob=None):
+    """ملخص التنبؤات بدل قائمتها الكاملة"""
+    if task_type == 'regression':
+        values = np.asarray(y_pred, dtype=np.float64)
+        p5, p50, p95 = np.percentile(values, [5, 50, 95])
+        return {
+            'mean': float(values.mean()), 'std': float(values.std()),
+            'min': float(values.min()), 'max': float(values.max()),
+            'p5': float(p5), 'median': float(p50), 'p95': float(p95)
+        }
+    counts = pd.Series(np.asarray(y_pred).ravel()).value_counts()
+    summary = {'prediction_counts': {str(label): int(count) for label, count in counts.items()}}
+    if y_prob is not None:
+        confidence = np.asarray(y_prob).max(axis=1)
+        summary['mean_confidence'] = float(confidence.mean())
+        summary['min_confidence'] = float(confidence.min())
+    return summary
+
+def generate_prediction_report(model, X_test, y_test, task_type='classification',
+                               output_path=None, output_format=None, report_dir=None):
     """
     إنشاء تقرير شامل للتنبؤ
     
+    افتراضيًا تُضمَّن التنبؤات والاحتمالات في التقرير كقوائم. إذا حُدد
+    output_path أو output_format تُكتب إلى ملف جانبي (npy أو parquet)
+    ويُعاد التقرير بمرجع الملف وملخص التنبؤات والمقاييس فقط؛ الصفوف تُقرأ
+    لاحقًا صفحة صفحة بـ read_prediction_rows.
+    
     Args:
         model: النموذج المدرب
         X_test: بيانات الاختبار
         y_test: القيم الحقيقية للاختبار
         task_type: نوع المهمة
+        output_path: مسار ملف التنبؤات (اختياري)
+        output_format: 'npy' أو 'parquet' (اختياري؛ يُنشئ ملفًا في report_dir)
+        report_dir: مجلد الملفات الجانبية (افتراضيًا REPORT_DIR)
         
     Returns:
         dict: التقرير الشامل
@@ -271,12 +449,33 @@ def generate_prediction_report(model, X_test, y_test, task_type='classification'
         'model_type': type(model).__name__,
         'n_samples': len(X_test),
         'n_features': X_test.shape[1] if hasattr(X_test, 'shape') else len(X_test[0]),
-        'predictions': y_pred.tolist() if hasattr(y_pred, 'tolist') else y_pred,
         'evaluation': evaluation
     }
     
-    # إضافة الاحتمالات إذا كانت متاحة
-    if y_prob is not None:
-        report['probabilities'] = y_prob.tolist()
+    if output_path is None and output_format is None:
+        report['predictions'] = y_pred.tolist() if hasattr(y_pred, 'tolist') else y_pred
+        # إضافة الاحتمالات إذا كانت متاحة
+        if y_prob is not None:
+            report['probabilities'] = y_prob.tolist()
+        return report
+    
+    # وضع الملف الجانبي
+    if output_path is None:
+        report_id = uuid.uuid4().hex
+        output_path = os.path.join(report_dir or REPORT_DIR, f'{report_id}.{output_format}')
+    else:
+        report_id = os.path.splitext(os.path.basename(output_path))[0]
+    columns = _report_columns(y_pred, y_test if task_type != 'clustering' else None,
+                              y_prob, getattr(model, 'classes_', None))
+    write_prediction_file(columns, output_path, output_format)
     
-    return report 
\ No newline at end of file
+    report['summary'] = _prediction_summary(y_pred, task_type, y_prob)
+    report['predictions_file'] = {
+        'report_id': report_id,
+        'path': output_path,
+        'format': output_format or os.path.splitext(output_path)[1].lstrip('.').lower(),
+        'n_rows': len(y_pred),
+        'columns': list(columns),
+        'size_bytes': os.path.getsize(output_path)
+    }
+    return report
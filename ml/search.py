@@ -0,0 +1,379 @@
+# =============================================================================
+# البحث عن المعاملات المثلى مع حفظ نتائج الطيات
+# =============================================================================
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+# مجلد نتائج الطيات المحفوظة (قابل للتغيير عبر متغير البيئة)
+CACHE_DIR = os.environ.get('PEERAI_SEARCH_CACHE_DIR', os.path.join('.peerai_cache', 'search'))
+
+SEARCH_TYPES = ('grid', 'random', 'halving_grid', 'halving_random')
+
+_cache_lock = threading.Lock()
+
+
+class FoldScoreCache:
+    """
+    نتائج (المعاملات، الطية) المحسوبة سابقًا لنموذج وبيانات محددة
+
+    ملف JSON واحد لكل (بصمة البيانات، صنف النموذج، التقسيم، المقياس)، فأي بحث
+    لاحق على البيانات نفسها لا يعيد حساب أي زوج سبق تقييمه.
+    """
+
+    def __init__(self, dataset_fingerprint, estimator, cv_key, scoring_key, cache_dir=None):
+        estimator_key = f"{type(estimator).__module__}.{type(estimator).__name__}"
+        payload = json.dumps([dataset_fingerprint, estimator_key, cv_key, scoring_key])
+        name = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+        self.path = os.path.join(cache_dir or CACHE_DIR, f'{name}.json')
+        self.scores = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.scores = json.load(f)
+
+    @staticmethod
+    def key(params, fold):
+        return f"{json.dumps(params, sort_keys=True, default=repr)}|{fold}"
+
+    def get(self, params, fold):
+        return self.scores.get(self.key(params, fold))
+
+    def put(self, params, fold, score, fit_time):
+        self.scores[self.key(params, fold)] = {'score': score, 'fit_time': fit_time}
+
+    def save(self):
+        """كتابة الملف دفعة واحدة (مع دمج ما كتبته عمليات أخرى)"""
+        with _cache_lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.scores = {**json.load(f), **self.scores}
+            tmp_path = f'{self.path}.tmp{os.getpid()}'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.scores, f)
+            os.replace(tmp_path, self.path)
+
+
+def _take(data, indices):
+    if data is None:
+        return None
+    if hasattr(data, 'iloc'):
+        return data.iloc[indices]
+    return data[indices]
+
+
+def _fit_and_score(estimator, params, X, y, train, test, scorer):
+    """
+    تدريب نسخة بالمعاملات على طية وتقييمها
+
+    فشل التدريب أو التقييم (مثل تركيبة معاملات لا يدعمها النموذج) لا يوقف
+    البحث: تُسجل الدرجة NaN مع رسالة الخطأ.
+
+    Returns:
+        list: [(المعاملات، الدرجة، زمن التدريب، الخطأ أو None)]
+    """
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    try:
+        model = clone(estimator).set_params(**params)
+        if y is None:
+            model.fit(_take(X, train))
+        else:
+            model.fit(_take(X, train), _take(y, train))
+        fit_time = time.perf_counter() - start
+        score = float(scorer(model, _take(X, test), _take(y, test)))
+    except Exception as e:
+        return [(params, np.nan, time.perf_counter() - start, f"{type(e).__name__}: {e}")]
+    return [(params, score, fit_time, None)]
+
+
+def _fit_and_score_warm(estimator, base_params, n_estimators_list, X, y, train, test, scorer):
+    """
+    تدريب مجموعة مرشحين تختلف فقط في n_estimators على طية واحدة
+
+    يُدرب نموذج واحد بـ warm_start ويُضاف إليه أشجار تدريجيًا بدل تدريب
+    كل مرشح من الصفر، ويُقيَّم بعد كل مرحلة. إذا فشلت مرحلة تُسجل هي وكل
+    المراحل التالية (المبنية عليها) بدرجة NaN.
+    """
+    from sklearn.base import clone
+
+    X_train, y_train = _take(X, train), _take(y, train)
+    X_test, y_test = _take(X, test), _take(y, test)
+    results = []
+    error = None
+    try:
+        model = clone(estimator).set_params(**base_params, warm_start=True)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    for n_estimators in sorted(n_estimators_list):
+        params = {**base_params, 'n_estimators': n_estimators}
+        if error is not None:
+            results.append((params, np.nan, 0.0, error))
+            continue
+        start = time.perf_counter()
+        try:
+            model.set_params(n_estimators=n_estimators)
+            if y is None:
+                model.fit(X_train)
+            else:
+                model.fit(X_train, y_train)
+            fit_time = time.perf_counter() - start
+            results.append((params, float(scorer(model, X_test, y_test)), fit_time, None))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            results.append((params, np.nan, time.perf_counter() - start, error))
+    return results
+
+
+def _supports_warm_start(estimator, candidates):
+    """هل يمكن تجميع المرشحين حسب n_estimators مع warm_start"""
+    params = estimator.get_params()
+    return ('warm_start' in params and 'n_estimators' in params
+            and any('n_estimators' in c for c in candidates)
+            and not any('warm_start' in c for c in candidates))
+
+
+def _build_tasks(estimator, candidates, pending):
+    """
+    تحويل أزواج (المرشح، الطية) غير المحفوظة إلى مهام تدريب
+
+    Args:
+        pending: قائمة (رقم المرشح، رقم الطية)
+
+    Returns:
+        list: مهام (الدالة، المعاملات، الطية)
+    """
+    warm = _supports_warm_start(estimator, candidates)
+    tasks, groups = [], {}
+    for i, fold in pending:
+        if not (warm and 'n_estimators' in candidates[i]):
+            tasks.append((_fit_and_score, (candidates[i],), fold))
+            continue
+        params = dict(candidates[i])
+        n_estimators = params.pop('n_estimators')
+        key = (json.dumps(params, sort_keys=True, default=repr), fold)
+        groups.setdefault(key, (params, []))[1].append(n_estimators)
+    tasks.extend((_fit_and_score_warm, (params, n_list), fold)
+                 for (_, fold), (params, n_list) in groups.items())
+    return tasks
+
+
+def _jsonable(params):
+    """تحويل قيم NumPy في المعاملات إلى أنواع Python"""
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in params.items()}
+
+
+def hyperparameter_search(estimator, X, y, param_grid=None, search_type='grid', n_iter=10, cv=5,
+                          scoring=None, n_jobs=-1, random_state=42, factor=3, use_cache=True,
+                          dataset_fingerprint=None, cache_dir=None, progress_callback=None,
+                          verbose=False):
+    """
+    البحث عن أفضل المعاملات دون تدريب نموذج أساسي مسبق
+
+    نتائج كل (معاملات، طية) تُحفظ حسب بصمة البيانات فلا تُعاد عبر الطلبات،
+    والنماذج التجميعية (غابات الأشجار وما يشبهها) تستخدم warm_start عند
+    البحث في n_estimators. البحث بالتنصيف يُفوَّض إلى HalvingGridSearchCV
+    وHalvingRandomSearchCV (دون حفظ النتائج لأن حجم البيانات يتغير بين الجولات).
+    الطيات التي يفشل تدريبها تُسجل بدرجة NaN ويُرتب المرشحون بمتوسط الطيات
+    الناجحة؛ وإذا فشل كل المرشحين يُرفع ValueError.
+
+    Args:
+        estimator: نموذج غير مدرب (من create_algorithm)
+        X: بيانات التدريب
+        y: الهدف (None للتجميع)
+        param_grid: شبكة المعاملات (أو توزيعاتها للبحث العشوائي)
+        search_type: 'grid' أو 'random' أو 'halving_grid' أو 'halving_random'
+        n_iter: عدد المرشحين في البحث العشوائي
+        cv: عدد الطيات أو مقسم sklearn
+        scoring: المقياس (افتراضيًا score الخاص بالنموذج)
+        n_jobs: عدد العمليات المتوازية
+        random_state: البذرة العشوائية
+        factor: معامل التنصيف
+        use_cache: استخدام نتائج الطيات المحفوظة
+        dataset_fingerprint: بصمة البيانات (افتراضيًا joblib.hash للبيانات)
+        cache_dir: مجلد النتائج المحفوظة (افتراضيًا CACHE_DIR)
+        progress_callback: دالة تُستدعى بعد كل مهمة بحالة التقدم
+        verbose: طباعة التقدم
+
+    Returns:
+        tuple: (أفضل نموذج مدرب على كامل البيانات، معلومات البحث)
+    """
+    from sklearn.base import clone, is_classifier
+    from sklearn.metrics import check_scoring
+    from sklearn.model_selection import ParameterGrid, ParameterSampler, check_cv
+
+    if search_type not in SEARCH_TYPES:
+        raise ValueError(f"Unknown search type: {search_type}. Choose from {SEARCH_TYPES}")
+    param_grid = param_grid or {}
+
+    if search_type.startswith('halving'):
+        return _halving_search(estimator, X, y, param_grid, search_type, n_iter, cv,
+                               scoring, n_jobs, random_state, factor, verbose)
+
+    if search_type == 'grid':
+        candidates = list(ParameterGrid(param_grid))
+    else:
+        candidates = list(ParameterSampler(param_grid, n_iter=n_iter, random_state=random_state))
+
+    cv_splitter = check_cv(cv, y, classifier=is_classifier(estimator))
+    splits = list(cv_splitter.split(X, y))
+    scorer = check_scoring(estimator, scoring=scoring)
+
+    # مقسم عشوائي بدون بذرة لا يعطي الطيات نفسها في كل مرة
+    cacheable = use_cache and isinstance(cv, (int, np.integer))
+    cache = None
+    if cacheable:
+        if dataset_fingerprint is None:
+            dataset_fingerprint = joblib.hash((X, y))
+        cache = FoldScoreCache(
+            dataset_fingerprint, estimator,
+            cv_key=f"{type(cv_splitter).__name__}-{len(splits)}",
+            scoring_key=str(scoring),
+            cache_dir=cache_dir
+        )
+
+    base_params = {k: v for k, v in clone(estimator).get_params(deep=False).items()}
+    scores = np.full((len(candidates), len(splits)), np.nan)
+    fit_times = np.zeros((len(candidates), len(splits)))
+    pending = []
+    for i, params in enumerate(candidates):
+        for fold in range(len(splits)):
+            hit = cache.get({**base_params, **params}, fold) if cache is not None else None
+            if hit is not None:
+                scores[i, fold] = hit['score']
+                fit_times[i, fold] = hit['fit_time']
+            else:
+                pending.append((i, fold))
+    n_cached = len(candidates) * len(splits) - len(pending)
+
+    index = {(FoldScoreCache.key(params, 0)): i for i, params in enumerate(candidates)}
+    tasks = _build_tasks(estimator, candidates, pending)
+    if verbose:
+        print(f"Search: {len(candidates)} candidates x {len(splits)} folds "
+              f"({n_cached} cached, {len(tasks)} fit tasks)")
+
+    errors = {}
+    start = time.perf_counter()
+    parallel = joblib.Parallel(n_jobs=n_jobs, return_as='generator')
+    outputs = parallel(
+        joblib.delayed(func)(estimator, *args, X, y, splits[fold][0], splits[fold][1], scorer)
+        for func, args, fold in tasks
+    )
+    try:
+        for completed, ((_, _, fold), results) in enumerate(zip(tasks, outputs), 1):
+            for params, score, fit_time, error in results:
+                i = index[FoldScoreCache.key(params, 0)]
+                scores[i, fold] = score
+                fit_times[i, fold] = fit_time
+                if error is not None:
+                    # الفشل لا يُحفظ، فيُعاد المحاولة في البحث التالي
+                    errors.setdefault(i, error)
+                    if verbose:
+                        print(f"Fit failed for {params} on fold {fold}: {error}")
+                elif cache is not None:
+                    cache.put({**base_params, **params}, fold, score, fit_time)
+            if progress_callback is not None:
+                elapsed = time.perf_counter() - start
+                progress_callback({
+                    'stage': 'search',
+                    'completed': completed,
+                    'total': len(tasks),
+                    'fold': int(fold),
+                    'candidate': results[-1][0],
+                    'elapsed': elapsed,
+                    'eta': elapsed / completed * (len(tasks) - completed)
+                })
+    finally:
+        if cache is not None:
+            cache.save()
+
+    failed = np.isnan(scores)
+    if failed.all():
+        first_error = next(iter(errors.values()), 'unknown error')
+        raise ValueError(f"All {len(candidates)} search candidates failed to fit. First error: {first_error}")
+
+    # المتوسط على الطيات الناجحة فقط؛ المرشح الفاشل في كل طياته يأتي أخيرًا
+    valid = ~failed.all(axis=1)
+    mean_scores = np.full(len(candidates), np.nan)
+    std_scores = np.full(len(candidates), np.nan)
+    mean_scores[valid] = np.nanmean(scores[valid], axis=1)
+    std_scores[valid] = np.nanstd(scores[valid], axis=1)
+    order = np.argsort(-np.where(valid, mean_scores, -np.inf), kind='stable')
+    best = int(order[0])
+    results = [
+        {
+            'params': _jsonable(candidates[i]),
+            'mean_score': float(mean_scores[i]) if valid[i] else None,
+            'std_score': float(std_scores[i]) if valid[i] else None,
+            'mean_fit_time': float(fit_times[i].mean()),
+            'n_failed_folds': int(failed[i].sum()),
+            'error': errors.get(i),
+            'rank': rank
+        }
+        for rank, i in enumerate(order, 1)
+    ]
+
+    # تدريب أفضل مرشح على كامل البيانات
+    model = clone(estimator).set_params(**candidates[best])
+    if y is None:
+        model.fit(X)
+    else:
+        model.fit(X, y)
+
+    info = {
+        'search_type': search_type,
+        'best_params': _jsonable(candidates[best]),
+        'best_score': float(mean_scores[best]),
+        'n_candidates': len(candidates),
+        'n_folds': len(splits),
+        'n_cached': n_cached,
+        'n_computed': len(pending),
+        'n_failed': int(failed.sum()),
+        'results': results
+    }
+    if verbose:
+        print(f"Best score: {info['best_score']:.4f} with {info['best_params']}")
+    return model, info
+
+
+def _halving_search(estimator, X, y, param_grid, search_type, n_iter, cv, scoring, n_jobs,
+                    random_state, factor, verbose):
+    """البحث بالتنصيف المتتالي عبر sklearn"""
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+
+    if search_type == 'halving_grid':
+        search = HalvingGridSearchCV(estimator, param_grid, factor=factor, cv=cv, scoring=scoring,
+                                     n_jobs=n_jobs, random_state=random_state,
+                                     verbose=1 if verbose else 0)
+    else:
+        search = HalvingRandomSearchCV(estimator, param_grid, n_candidates=n_iter, factor=factor,
+                                       cv=cv, scoring=scoring, n_jobs=n_jobs,
+                                       random_state=random_state, verbose=1 if verbose else 0)
+    search.fit(X, y)
+
+    info = {
+        'search_type': search_type,
+        'best_params': _jsonable(search.best_params_),
+        'best_score': float(search.best_score_),
+        'n_candidates': int(search.n_candidates_[0]),
+        'n_folds': search.n_splits_,
+        'n_iterations': int(search.n_iterations_),
+        'n_resources': [int(n) for n in search.n_resources_],
+        'n_cached': 0,
+        'n_computed': int(sum(search.n_candidates_)) * search.n_splits_
+    }
+    return search.best_estimator_, info
+
+
+def clear_search_cache(cache_dir=None):
+    """حذف كل نتائج الطيات المحفوظة"""
+    import shutil
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
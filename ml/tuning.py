@@ -0,0 +1,441 @@
+# =============================================================================
+# البحث البايزي عن المعاملات (TPE) مع إيقاف التجارب الضعيفة مبكرًا
+# =============================================================================
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from .models import create_algorithm, train_algorithm
+
+# مجلد الدراسات المحفوظة (قابل للتغيير عبر متغير البيئة)
+STUDY_DIR = os.environ.get('PEERAI_STUDY_DIR', os.path.join('models', 'studies'))
+
+# أسماء الدراسات المسموحة (تُستخدم أسماء ملفات داخل STUDY_DIR)
+STUDY_NAME_PATTERN = re.compile(r'[A-Za-z0-9_-]+')
+
+_study_lock = threading.Lock()
+
+
+# =============================================================================
+# فضاء البحث
+# =============================================================================
+
+def normalize_search_space(search_space):
+    """
+    توحيد صيغة فضاء البحث
+
+    كل معامل إما قائمة قيم (فئوي) أو قاموس:
+        {'type': 'float', 'low': 0.001, 'high': 10, 'log': True}
+        {'type': 'int', 'low': 2, 'high': 32}
+        {'type': 'categorical', 'choices': ['gini', 'entropy']}
+
+    Returns:
+        dict: فضاء البحث بالصيغة الكاملة
+    """
+    space = {}
+    for name, spec in search_space.items():
+        if isinstance(spec, (list, tuple)):
+            spec = {'type': 'categorical', 'choices': list(spec)}
+        spec = dict(spec)
+        kind = spec.get('type')
+        if kind == 'categorical':
+            if not spec.get('choices'):
+                raise ValueError(f"Parameter '{name}' needs a non-empty 'choices' list")
+        elif kind in ('float', 'int'):
+            if 'low' not in spec or 'high' not in spec or spec['low'] > spec['high']:
+                raise ValueError(f"Parameter '{name}' needs 'low' <= 'high'")
+            if spec.get('log') and spec['low'] <= 0:
+                raise ValueError(f"Parameter '{name}' needs 'low' > 0 for a log scale")
+            spec['log'] = bool(spec.get('log', False))
+        else:
+            raise ValueError(f"Unknown parameter type for '{name}': {kind}")
+        space[name] = spec
+    return space
+
+
+def _to_internal(spec, value):
+    """تحويل القيمة إلى المحور الداخلي (لوغاريتمي عند الحاجة)"""
+    return math.log(value) if spec['log'] else float(value)
+
+
+def _from_internal(spec, x):
+    value = math.exp(x) if spec['log'] else x
+    value = min(max(value, spec['low']), spec['high'])
+    return int(round(value)) if spec['type'] == 'int' else float(value)
+
+
+def _bounds(spec):
+    return _to_internal(spec, spec['low']), _to_internal(spec, spec['high'])
+
+
+# =============================================================================
+# مُعايِن TPE
+# =============================================================================
+
+class TPESampler:
+    """
+    Tree-structured Parzen Estimator
+
+    تُقسم التجارب المكتملة إلى جيدة (أفضل gamma) وسيئة، وتُبنى لكل معامل
+    كثافة Parzen لكل مجموعة. يُسحب عدد من المرشحين من كثافة الجيدة ويُختار
+    من يعظّم النسبة l(x)/g(x). أول n_startup_trials تجارب عشوائية.
+    """
+
+    def __init__(self, search_space, n_startup_trials=10, n_ei_candidates=24, gamma=0.25, seed=None):
+        self.space = normalize_search_space(search_space)
+        self.n_startup_trials = n_startup_trials
+        self.n_ei_candidates = n_ei_candidates
+        self.gamma = gamma
+        self.rng = np.random.default_rng(seed)
+
+    def sample_random(self):
+        params = {}
+        for name, spec in self.space.items():
+            if spec['type'] == 'categorical':
+                params[name] = spec['choices'][self.rng.integers(len(spec['choices']))]
+            else:
+                low, high = _bounds(spec)
+                params[name] = _from_internal(spec, self.rng.uniform(low, high))
+        return params
+
+    def sample(self, trials):
+        """
+        اقتراح معاملات التجربة التالية
+
+        Args:
+            trials: التجارب السابقة (قوائم قواميس بحقول params وvalue وstate)
+        """
+        scored = [t for t in trials if t['state'] in ('complete', 'pruned') and t['value'] is not None]
+        if len(scored) < self.n_startup_trials:
+            return self.sample_random()
+
+        # التجارب الموقوفة تُعد بقيمتها الجزئية (غالبًا في المجموعة السيئة)
+        scored.sort(key=lambda t: t['value'], reverse=True)
+        n_good = max(1, int(math.ceil(self.gamma * len(scored))))
+        good, bad = scored[:n_good], scored[n_good:]
+
+        params = {}
+        for name, spec in self.space.items():
+            good_values = [t['params'][name] for t in good if name in t['params']]
+            bad_values = [t['params'][name] for t in bad if name in t['params']]
+            if spec['type'] == 'categorical':
+                params[name] = self._sample_categorical(spec, good_values, bad_values)
+            else:
+                params[name] = self._sample_numeric(spec, good_values, bad_values)
+        return params
+
+    def _sample_categorical(self, spec, good_values, bad_values):
+        choices = spec['choices']
+        keys = [json.dumps(c) for c in choices]
+
+        def weights(values):
+            counts = np.ones(len(choices))
+            for value in values:
+                key = json.dumps(value)
+                if key in keys:
+                    counts[keys.index(key)] += 1
+            return counts / counts.sum()
+
+        l, g = weights(good_values), weights(bad_values)
+        candidates = self.rng.choice(len(choices), size=self.n_ei_candidates, p=l)
+        best = candidates[np.argmax(l[candidates] / g[candidates])]
+        return choices[int(best)]
+
+    def _parzen(self, spec, values):
+        """مراكز ونطاقات نوى Parzen مع توزيع مسبق منتظم على كامل المجال"""
+        low, high = _bounds(spec)
+        mus = np.array([_to_internal(spec, v) for v in values] + [(low + high) / 2])
+        span = max(high - low, 1e-12)
+        sigma = np.full(len(mus), max(span * len(mus) ** -0.2 / 2, span / 100))
+        sigma[-1] = span
+        return mus, sigma, low, high
+
+    @staticmethod
+    def _log_density(x, mus, sigma, low, high):
+        """لوغاريتم كثافة خليط نوى غاوسية مقطوعة على [low, high]"""
+        from scipy.special import ndtr
+        z = (x[:, None] - mus[None, :]) / sigma[None, :]
+        mass = ndtr((high - mus) / sigma) - ndtr((low - mus) / sigma)
+        pdf = np.exp(-0.5 * z ** 2) / (sigma * math.sqrt(2 * math.pi) * np.maximum(mass, 1e-12))
+        return np.log(pdf.mean(axis=1) + 1e-300)
+
+    def _sample_numeric(self, spec, good_values, bad_values):
+        mus, sigma, low, high = self._parzen(spec, good_values)
+        components = self.rng.integers(len(mus), size=self.n_ei_candidates)
+        candidates = self.rng.normal(mus[components], sigma[components])
+        candidates = np.clip(candidates, low, high)
+        if spec['type'] == 'int':
+            candidates = np.array([_to_internal(spec, _from_internal(spec, c)) for c in candidates])
+
+        score = (self._log_density(candidates, mus, sigma, low, high)
+                 - self._log_density(candidates, *self._parzen(spec, bad_values)))
+        return _from_internal(spec, float(candidates[np.argmax(score)]))
+
+
+# =============================================================================
+# الدراسة (التجارب المحفوظة)
+# =============================================================================
+
+class Study:
+    """
+    سجل تجارب البحث قابل للحفظ والاستئناف
+
+    يُحفظ كملف JSON بعد كل دفعة تجارب، فيكمل طلب لاحق بالاسم نفسه من
+    حيث توقف بدل البدء من جديد.
+    """
+
+    def __init__(self, search_space, path=None, metadata=None):
+        self.search_space = normalize_search_space(search_space)
+        self.path = path
+        self.metadata = metadata or {}
+        self.trials = []
+
+    @classmethod
+    def load_or_create(cls, search_space, path=None, metadata=None):
+        """
+        تحميل دراسة محفوظة أو إنشاء دراسة جديدة
+
+        Raises:
+            ValueError: إذا اختلف فضاء البحث أو أي من بيانات الدراسة (البيانات،
+                الخوارزمية، نوع المهمة، التقسيم، المقياس، المعاملات الثابتة)
+                عن الدراسة المحفوظة
+        """
+        study = cls(search_space, path, metadata)
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved['search_space'] != json.loads(json.dumps(study.search_space)):
+                raise ValueError(f"Study at {path} was created with a different search space")
+            saved_metadata = saved.get('metadata', {})
+            current = json.loads(json.dumps(study.metadata, default=repr))
+            changed = sorted(key for key in set(saved_metadata) | set(current)
+                             if saved_metadata.get(key) != current.get(key))
+            if 'dataset' in changed:
+                raise ValueError(f"Study at {path} was created for a different dataset")
+            if changed:
+                raise ValueError(f"Study at {path} was created with different settings: {', '.join(changed)}")
+            study.trials = saved['trials']
+        return study
+
+    def save(self):
+        if not self.path:
+            return
+        with _study_lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f'{self.path}.tmp{os.getpid()}'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'search_space': self.search_space, 'metadata': self.metadata,
+                           'trials': self.trials}, f, ensure_ascii=False, default=repr)
+            os.replace(tmp_path, self.path)
+
+    @property
+    def completed(self):
+        return [t for t in self.trials if t['state'] == 'complete']
+
+    @property
+    def best_trial(self):
+        completed = self.completed
+        return max(completed, key=lambda t: t['value']) if completed else None
+
+    def pruning_reference(self, min_trials=5):
+        """
+        وسيط المتوسط التراكمي لكل طية في التجارب المكتملة (لإيقاف التجارب بالوسيط)
+
+        لا يُوقف أي تجربة قبل اكتمال min_trials تجارب.
+        """
+        reference = {}
+        if len(self.completed) < min_trials:
+            return reference
+        for trial in self.completed:
+            running = np.cumsum(trial['intermediate']) / np.arange(1, len(trial['intermediate']) + 1)
+            for fold, value in enumerate(running):
+                reference.setdefault(fold, []).append(float(value))
+        return {fold: float(np.median(values)) for fold, values in reference.items()}
+
+
+# =============================================================================
+# تنفيذ التجارب
+# =============================================================================
+
+def _take(data, indices):
+    if data is None:
+        return None
+    if hasattr(data, 'iloc'):
+        return data.iloc[indices]
+    return data[indices]
+
+
+def _run_trial(number, params, algorithm_name, task_type, base_params, X, y, splits, scorer,
+               pruning_reference, n_warmup_folds):
+    """
+    تقييم تجربة واحدة طية بعد طية
+
+    بعد كل طية (بعد طيات الإحماء) يُقارن المتوسط التراكمي بوسيط التجارب
+    المكتملة عند الطية نفسها، وتُوقف التجربة إن كانت أسوأ منه.
+    """
+    start = time.perf_counter()
+    intermediate = []
+    try:
+        for fold, (train, test) in enumerate(splits):
+            model = train_algorithm(_take(X, train), _take(y, train), algorithm_name, task_type,
+                                    **{**base_params, **params})
+            intermediate.append(float(scorer(model, _take(X, test), _take(y, test))))
+            running = float(np.mean(intermediate))
+            if (fold + 1 >= n_warmup_folds and fold < len(splits) - 1
+                    and fold in pruning_reference and running < pruning_reference[fold]):
+                return {'number': number, 'params': params, 'state': 'pruned', 'value': running,
+                        'intermediate': intermediate, 'duration': time.perf_counter() - start}
+    except Exception as e:
+        return {'number': number, 'params': params, 'state': 'failed', 'value': None,
+                'intermediate': intermediate, 'error': str(e),
+                'duration': time.perf_counter() - start}
+    return {'number': number, 'params': params, 'state': 'complete', 'value': float(np.mean(intermediate)),
+            'intermediate': intermediate, 'duration': time.perf_counter() - start}
+
+
+def bayesian_search(X, y, algorithm_name, task_type, search_space, n_trials=30, cv=5, scoring=None,
+                    n_jobs=1, study_path=None, dataset_fingerprint=None, base_params=None,
+                    random_state=42, timeout=None, n_startup_trials=10, pruning=True,
+                    n_warmup_folds=1, progress_callback=None, verbose=False):
+    """
+    بحث بايزي (TPE) عن أفضل معاملات خوارزمية باستخدام train_algorithm
+
+    Args:
+        X: بيانات التدريب
+        y: الهدف
+        algorithm_name: اسم الخوارزمية
+        task_type: 'classification' أو 'regression'
+        search_space: فضاء البحث غير الفارغ (انظر normalize_search_space)
+        n_trials: العدد الكلي للتجارب في الدراسة (بما فيها المحفوظة)
+        cv: عدد الطيات أو مقسم sklearn
+        scoring: المقياس (افتراضيًا score الخاص بالنموذج)
+        n_jobs: عدد التجارب المتوازية
+        study_path: مسار حفظ الدراسة للاستئناف لاحقًا (اختياري)
+        dataset_fingerprint: بصمة البيانات (تمنع استئناف دراسة على بيانات أخرى)
+        base_params: معاملات ثابتة للخوارزمية
+        random_state: البذرة العشوائية
+        timeout: أقصى زمن للبحث بالثواني
+        n_startup_trials: عدد التجارب العشوائية قبل TPE
+        pruning: إيقاف التجارب الأسوأ من الوسيط مبكرًا
+        n_warmup_folds: عدد الطيات قبل السماح بالإيقاف
+        progress_callback: دالة تُستدعى بعد كل تجربة بحالة التقدم
+        verbose: طباعة التقدم
+
+    Returns:
+        tuple: (أفضل نموذج مدرب على كامل البيانات، معلومات البحث)
+    """
+    from sklearn.metrics import check_scoring
+    from sklearn.model_selection import check_cv
+
+    if task_type not in ('classification', 'regression'):
+        raise ValueError(f"Bayesian search supports classification and regression, not: {task_type}")
+    if not search_space:
+        raise ValueError("Bayesian search needs a non-empty search_space")
+    base_params = base_params or {}
+
+    metadata = {'algorithm': algorithm_name, 'task_type': task_type, 'dataset': dataset_fingerprint,
+                'cv': str(cv), 'scoring': str(scoring), 'base_params': base_params}
+    study = Study.load_or_create(search_space, study_path, metadata)
+    n_resumed = len(study.trials)
+
+    template = create_algorithm(algorithm_name, task_type, **base_params)
+    splits = list(check_cv(cv, y, classifier=task_type == 'classification').split(X, y))
+    scorer = check_scoring(template, scoring=scoring)
+
+    # بذرة مختلفة لكل استئناف حتى لا تتكرر التجارب العشوائية نفسها
+    sampler = TPESampler(study.search_space, n_startup_trials=n_startup_trials,
+                         seed=None if random_state is None else random_state + n_resumed)
+    n_jobs = joblib.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+    start = time.perf_counter()
+
+    with joblib.Parallel(n_jobs=n_jobs) as parallel:
+        while len(study.trials) < n_trials:
+            if timeout is not None and time.perf_counter() - start >= timeout:
+                break
+            batch = []
+            for _ in range(min(n_jobs, n_trials - len(study.trials))):
+                params = sampler.sample(study.trials + batch)
+                batch.append({'number': len(study.trials) + len(batch), 'params': params,
+                              'state': 'running', 'value': None})
+            reference = study.pruning_reference() if pruning else {}
+            results = parallel(
+                joblib.delayed(_run_trial)(
+                    trial['number'], trial['params'], algorithm_name, task_type, base_params,
+                    X, y, splits, scorer, reference, n_warmup_folds
+                )
+                for trial in batch
+            )
+            study.trials.extend(results)
+            study.save()
+
+            for trial in results:
+                if verbose:
+                    value = f"{trial['value']:.4f}" if trial['value'] is not None else '-'
+                    print(f"Trial {trial['number']}: {trial['state']} {value} {trial['params']}")
+                if progress_callback is not None:
+                    elapsed = time.perf_counter() - start
+                    done = len(study.trials) - n_resumed
+                    progress_callback({
+                        'stage': 'bayesian_search',
+                        'completed': len(study.trials),
+                        'total': n_trials,
+                        'trial': trial['number'],
+                        'state': trial['state'],
+                        'candidate': trial['params'],
+                        'elapsed': elapsed,
+                        'eta': elapsed / done * (n_trials - len(study.trials))
+                    })
+
+    best = study.best_trial
+    if best is None:
+        raise RuntimeError("No trial completed successfully")
+    model = train_algorithm(X, y, algorithm_name, task_type, **{**base_params, **best['params']})
+
+    states = [t['state'] for t in study.trials]
+    info = {
+        'search_type': 'bayesian',
+        'best_params': best['params'],
+        'best_score': best['value'],
+        'best_trial': best['number'],
+        'n_trials': len(study.trials),
+        'n_resumed': n_resumed,
+        'n_complete': states.count('complete'),
+        'n_pruned': states.count('pruned'),
+        'n_failed': states.count('failed'),
+        'study_path': study.path,
+        'elapsed': time.perf_counter() - start
+    }
+    if verbose:
+        print(f"Best score: {info['best_score']:.4f} with {info['best_params']} "
+              f"({info['n_pruned']} pruned of {info['n_trials']})")
+    return model, info
+
+
+def is_valid_study_name(study_name):
+    """اسم الدراسة يُستخدم اسم ملف، لذا يُقبل فقط من أحرف وأرقام و _ و -"""
+    return isinstance(study_name, str) and STUDY_NAME_PATTERN.fullmatch(study_name) is not None
+
+
+def study_path_for(algorithm_name, task_type, study_name=None, dataset_fingerprint=None):
+    """
+    مسار الدراسة الافتراضي: حسب الاسم أو الخوارزمية والبيانات
+
+    بدون اسم يُشتق الملف من تجزئة البصمة كاملة، فأي اختلاف في البيانات أو
+    الهدف أو معاملات التقسيم يعطي دراسة منفصلة.
+    """
+    if study_name is None:
+        digest = hashlib.sha256((dataset_fingerprint or 'default').encode('utf-8')).hexdigest()[:32]
+        study_name = f"{algorithm_name}_{task_type}_{digest}"
+    elif not is_valid_study_name(study_name):
+        raise ValueError(f"Invalid study name: {study_name!r} (allowed: letters, digits, '_' and '-')")
+    return os.path.join(STUDY_DIR, f"{study_name}.json")
@@ -0,0 +1,276 @@
+# =============================================================================
+# التحقق المتقاطع المتوازي مع حفظ توزيع الطيات
+# =============================================================================
+
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+
+from .metrics import ConfusionAccumulator
+
+# مجلد توزيعات الطيات المحفوظة (قابل للتغيير عبر متغير البيئة)
+FOLD_CACHE_DIR = os.environ.get('PEERAI_FOLD_CACHE_DIR', os.path.join('.peerai_cache', 'folds'))
+
+# المقاييس المحسوبة من تنبؤات الطية مباشرة (الأول هو الافتراضي)
+CV_METRICS = {
+    'classification': ('accuracy', 'precision', 'recall', 'f1', 'balanced_accuracy'),
+    'regression': ('r2', 'mse', 'rmse', 'mae')
+}
+
+# المقاييس التي تكون قيمتها الأقل أفضل
+LOWER_IS_BETTER = {'mse', 'rmse', 'mae'}
+
+
+def _take(data, indices):
+    if data is None:
+        return None
+    if hasattr(data, 'iloc'):
+        return data.iloc[indices]
+    return data[indices]
+
+
+def _fold_cache_path(dataset_fingerprint, n_samples, n_splits, task_type, random_state, cache_dir=None):
+    payload = json.dumps([dataset_fingerprint, int(n_samples), int(n_splits), task_type, random_state])
+    name = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(cache_dir or FOLD_CACHE_DIR, f'{name}.npy')
+
+
+def fold_assignments(y, n_splits=5, task_type='classification', random_state=42,
+                     dataset_fingerprint=None, use_cache=True, cache_dir=None):
+    """
+    رقم طية الاختبار لكل صف، محفوظ حسب بصمة البيانات
+
+    التصنيف يستخدم StratifiedKFold والانحدار KFold (كلاهما مع خلط ببذرة
+    ثابتة). التوزيع يُحفظ في ملف .npy بأصغر نوع صحيح يتسع لعدد الطيات (int8
+    حتى 128 طية)، فكل الطلبات على البيانات نفسها تستخدم الطيات نفسها دون
+    إعادة حسابها.
+
+    Args:
+        y: الهدف
+        n_splits: عدد الطيات
+        task_type: نوع المهمة
+        random_state: بذرة الخلط
+        dataset_fingerprint: بصمة البيانات (افتراضيًا joblib.hash للهدف)
+        use_cache: قراءة التوزيع المحفوظ وحفظه
+        cache_dir: مجلد الحفظ (افتراضيًا FOLD_CACHE_DIR)
+
+    Returns:
+        ndarray: رقم الطية لكل صف
+    """
+    from sklearn.model_selection import KFold, StratifiedKFold
+
+    n_samples = len(y)
+    path = None
+    if use_cache:
+        if dataset_fingerprint is None:
+            dataset_fingerprint = joblib.hash(np.asarray(y))
+        path = _fold_cache_path(dataset_fingerprint, n_samples, n_splits, task_type, random_state, cache_dir)
+        if os.path.exists(path):
+            assignments = np.load(path)
+            if len(assignments) == n_samples:
+                return assignments
+
+    if task_type == 'classification':
+        splitter = StratifiedKFold(n_splits, shuffle=True, random_state=random_state)
+    else:
+        splitter = KFold(n_splits, shuffle=True, random_state=random_state)
+    # أرقام الطيات من 0 إلى n_splits - 1 (int8 يفيض بعد 128 طية)
+    assignments = np.empty(n_samples, dtype=np.min_scalar_type(-n_splits))
+    for fold, (_, test) in enumerate(splitter.split(np.zeros(n_samples), y)):
+        assignments[test] = fold
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp{os.getpid()}.npy'
+        np.save(tmp_path, assignments)
+        os.replace(tmp_path, path)
+    return assignments
+
+
+def fold_metrics(task_type, y_true, y_pred, metrics):
+    """
+    كل المقاييس المطلوبة من تنبؤات طية واحدة في مرور واحد
+
+    مقاييس التصنيف تُشتق من مصفوفة ارتباك واحدة، ومقاييس الانحدار من
+    البواقي مرة واحدة.
+
+    Returns:
+        dict: قيمة كل مقياس معروف (المقاييس الأخرى تُحسب بـ sklearn لاحقًا)
+    """
+    scores = {}
+    if task_type == 'classification':
+        accumulator = ConfusionAccumulator().update(y_true, y_pred)
+        precision, recall, f1, support = accumulator.per_class()
+        weights = support / support.sum()
+        values = {
+            'accuracy': np.trace(accumulator.matrix_) / support.sum(),
+            'precision': (precision * weights).sum(),
+            'recall': (recall * weights).sum(),
+            'f1': (f1 * weights).sum(),
+            'balanced_accuracy': recall[support > 0].mean()
+        }
+    else:
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        residuals = y_true - np.asarray(y_pred, dtype=np.float64).ravel()
+        mse = float(np.mean(residuals ** 2))
+        variance = float(np.var(y_true))
+        values = {
+            'r2': 1 - mse / variance if variance > 0 else (1.0 if mse == 0 else 0.0),
+            'mse': mse,
+            'rmse': np.sqrt(mse),
+            'mae': float(np.abs(residuals).mean())
+        }
+    for name in metrics:
+        if name in values:
+            scores[name] = float(values[name])
+    return scores
+
+
+def _fit_fold(model, X, y, train, test, fold, task_type, metrics):
+    """تدريب نسخة من النموذج على طية وحساب كل المقاييس من تنبؤ واحد"""
+    from sklearn.base import clone
+    from sklearn.metrics import get_scorer
+
+    estimator = clone(model)
+    start = time.perf_counter()
+    estimator.fit(_take(X, train), _take(y, train))
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X_test, y_test = _take(X, test), _take(y, test)
+    scores = fold_metrics(task_type, y_test, estimator.predict(X_test), metrics)
+    for name in metrics:
+        if name not in scores:
+            scores[name] = float(get_scorer(name)(estimator, X_test, y_test))
+    score_time = time.perf_counter() - start
+    return {
+        'fold': fold,
+        'n_train': int(len(train)),
+        'n_test': int(len(test)),
+        'fit_time': fit_time,
+        'score_time': score_time,
+        'scores': scores
+    }
+
+
+def cross_validate(model, X, y, cv=5, task_type='classification', scoring=None, n_jobs=1,
+                   backend=None, random_state=42, dataset_fingerprint=None, use_cache=True,
+                   cache_dir=None, abort_threshold=None, min_folds=2, progress_callback=None,
+                   verbose=False):
+    """
+    تحقق متقاطع متوازي بعدة مقاييس
+
+    الطيات تُدرَّب بالتوازي عبر joblib (بالواجهة الخلفية المحددة) وتُستهلك
+    نتائجها فور اكتمالها. كل الطيات تُقيَّم بتنبؤ واحد تُشتق منه كل المقاييس.
+    إذا حُدد abort_threshold يتوقف التحقق بعد min_folds طيات على الأقل متى
+    كان متوسط المقياس الأول أسوأ من الحد، وتُلغى الطيات المتبقية.
+
+    Args:
+        model: النموذج (غير مدرب أو مدرب؛ تُدرَّب نسخ منه)
+        X: البيانات
+        y: الهدف
+        cv: عدد الطيات أو مقسم sklearn (المقسم لا تُحفظ طياته)
+        task_type: 'classification' أو 'regression'
+        scoring: اسم مقياس أو قائمة أسماء (الأول هو الرئيسي). الأسماء غير
+            الموجودة في CV_METRICS تُحسب بـ sklearn.metrics.get_scorer
+        n_jobs: عدد الطيات المتوازية
+        backend: واجهة joblib الخلفية ('loky' أو 'threading' أو 'multiprocessing')
+        random_state: بذرة توزيع الطيات
+        dataset_fingerprint: بصمة البيانات لحفظ توزيع الطيات
+        use_cache: استخدام توزيع الطيات المحفوظ
+        cache_dir: مجلد توزيعات الطيات
+        abort_threshold: حد المقياس الرئيسي لاستبعاد النموذج مبكرًا
+        min_folds: أقل عدد طيات قبل السماح بالإيقاف
+        progress_callback: دالة تُستدعى بعد كل طية بحالة التقدم
+        verbose: طباعة التقدم
+
+    Returns:
+        dict: درجات المقياس الرئيسي وملخصه، وكل المقاييس، وتفاصيل كل طية
+    """
+    if task_type not in CV_METRICS:
+        raise ValueError(f"Cross-validation is not supported for task type: {task_type}")
+    if scoring is None:
+        metrics = [CV_METRICS[task_type][0]]
+    elif isinstance(scoring, str):
+        metrics = [scoring]
+    else:
+        metrics = list(scoring)
+    primary = metrics[0]
+    sign = -1 if primary in LOWER_IS_BETTER else 1
+
+    if isinstance(cv, (int, np.integer)):
+        assignments = fold_assignments(y, int(cv), task_type, random_state, dataset_fingerprint,
+                                       use_cache, cache_dir)
+        positions = np.arange(len(assignments))
+        splits = [(positions[assignments != fold], positions[assignments == fold]) for fold in range(int(cv))]
+    else:
+        splits = list(cv.split(X, y))
+
+    start = time.perf_counter()
+    parallel = joblib.Parallel(n_jobs=n_jobs, backend=backend, return_as='generator_unordered')
+    outputs = parallel(
+        joblib.delayed(_fit_fold)(model, X, y, train, test, fold, task_type, metrics)
+        for fold, (train, test) in enumerate(splits)
+    )
+
+    folds = []
+    aborted = False
+    try:
+        for result in outputs:
+            folds.append(result)
+            running = float(np.mean([f['scores'][primary] for f in folds]))
+            if verbose:
+                print(f"Fold {result['fold'] + 1}/{len(splits)}: {primary}={result['scores'][primary]:.4f} "
+                      f"(fit {result['fit_time']:.2f}s)")
+            if progress_callback is not None:
+                elapsed = time.perf_counter() - start
+                progress_callback({
+                    'stage': 'cross_validation',
+                    'completed': len(folds),
+                    'total': len(splits),
+                    'fold': result['fold'],
+                    'running_score': running,
+                    'elapsed': elapsed,
+                    'eta': elapsed / len(folds) * (len(splits) - len(folds))
+                })
+            if (abort_threshold is not None and len(folds) >= min_folds and len(folds) < len(splits)
+                    and sign * running < sign * abort_threshold):
+                aborted = True
+                break
+    finally:
+        # إغلاق المولد يلغي الطيات التي لم تبدأ بعد
+        if hasattr(outputs, 'close'):
+            outputs.close()
+
+    folds.sort(key=lambda f: f['fold'])
+    summary = {}
+    for name in metrics:
+        values = np.array([f['scores'][name] for f in folds])
+        summary[name] = {
+            'scores': values.tolist(),
+            'mean': float(values.mean()),
+            'std': float(values.std())
+        }
+    scores = np.array(summary[primary]['scores'])
+    if verbose and aborted:
+        print(f"Aborted after {len(folds)} folds: mean {primary} {scores.mean():.4f} "
+              f"is worse than {abort_threshold}")
+    return {
+        'scoring': primary,
+        'cv_scores': scores.tolist(),
+        'mean_score': float(scores.mean()),
+        'std_score': float(scores.std()),
+        'min_score': float(scores.min()),
+        'max_score': float(scores.max()),
+        'metrics': summary,
+        'folds': folds,
+        'n_folds': len(splits),
+        'n_folds_completed': len(folds),
+        'aborted': aborted,
+        'total_fit_time': float(sum(f['fit_time'] for f in folds)),
+        'elapsed': time.perf_counter() - start
+    }
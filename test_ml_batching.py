@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Micro-batching Tests
+اختبارات تجميع طلبات التنبؤ في دفعات
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ml.batching import MicroBatcher, QueueFullError
+
+TIMEOUT = 10
+
+
+def _double(batch_sizes):
+    """دالة دفعة تسجل حجم كل دفعة وتضاعف كل حمولة"""
+    def batch_fn(payloads):
+        batch_sizes.append(len(payloads))
+        return [payload * 2 for payload in payloads]
+    return batch_fn
+
+
+class TestMicroBatcher:
+    """Concurrent requests share one batch call"""
+
+    def test_each_request_gets_its_own_result(self):
+        batcher = MicroBatcher(max_batch_size=100, max_wait_ms=200)
+        batch_sizes = []
+        batch_fn = _double(batch_sizes)
+        with ThreadPoolExecutor(8) as pool:
+            futures = [pool.submit(batcher.submit, 'model', i, 1, batch_fn) for i in range(8)]
+            results = [future.result(timeout=TIMEOUT) for future in futures]
+        assert results == [i * 2 for i in range(8)]
+        assert sum(batch_sizes) == 8
+        assert len(batch_sizes) < 8
+        assert batcher.stats()['n_requests'] == 8
+
+    def test_batch_rows_are_bounded(self):
+        batcher = MicroBatcher(max_batch_size=5, max_wait_ms=100)
+        rows_per_batch = []
+
+        def batch_fn(payloads):
+            rows_per_batch.append(sum(payloads))
+            return payloads
+        with ThreadPoolExecutor(6) as pool:
+            futures = [pool.submit(batcher.submit, 'model', 2, 2, batch_fn) for _ in range(6)]
+            for future in futures:
+                future.result(timeout=TIMEOUT)
+        assert sum(rows_per_batch) == 12
+        assert max(rows_per_batch) <= 5
+
+    def test_batch_error_reaches_every_request(self):
+        batcher = MicroBatcher(max_wait_ms=1)
+
+        def batch_fn(payloads):
+            raise ValueError('bad batch')
+        with pytest.raises(ValueError, match='bad batch'):
+            batcher.submit('model', 1, 1, batch_fn)
+
+    def test_full_queue_is_rejected(self):
+        batcher = MicroBatcher(max_batch_size=1, max_wait_ms=0, max_queue_depth=1)
+        entered, release = threading.Event(), threading.Event()
+
+        def batch_fn(payloads):
+            entered.set()
+            release.wait(TIMEOUT)
+            return payloads
+        with ThreadPoolExecutor(2) as pool:
+            running = pool.submit(batcher.submit, 'model', 1, 1, batch_fn)
+            assert entered.wait(TIMEOUT)
+            queued = pool.submit(batcher.submit, 'model', 2, 1, batch_fn)
+            deadline = time.monotonic() + TIMEOUT
+            while batcher.stats()['queue_depths']['model'] < 1 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            with pytest.raises(QueueFullError):
+                batcher.submit('model', 3, 1, batch_fn)
+            release.set()
+            assert running.result(timeout=TIMEOUT) == 1
+            assert queued.result(timeout=TIMEOUT) == 2
+        assert batcher.stats()['n_rejected'] == 1
+
+    def test_short_result_list_fails_every_request(self):
+        batcher = MicroBatcher(max_batch_size=100, max_wait_ms=200)
+
+        def batch_fn(payloads):
+            return payloads[:-1]
+        with ThreadPoolExecutor(3) as pool:
+            futures = [pool.submit(batcher.submit, 'model', i, 1, batch_fn) for i in range(3)]
+            for future in futures:
+                with pytest.raises(RuntimeError, match='results for'):
+                    future.result(timeout=TIMEOUT)
+
+    def test_number_of_keys_is_capped(self):
+        batcher = MicroBatcher(max_wait_ms=0, max_keys=2)
+        batch_fn = _double([])
+        assert batcher.submit('a', 1, 1, batch_fn) == 2
+        assert batcher.submit('b', 1, 1, batch_fn) == 2
+        with pytest.raises(QueueFullError, match='Too many'):
+            batcher.submit('c', 1, 1, batch_fn)
+        assert batcher.submit('a', 2, 1, batch_fn) == 4
+        assert batcher.stats()['n_rejected'] == 1
+
+    def test_idle_worker_exits(self):
+        batcher = MicroBatcher(max_wait_ms=0, max_keys=1, idle_timeout=0.05)
+        batch_fn = _double([])
+        assert batcher.submit('a', 1, 1, batch_fn) == 2
+        deadline = time.monotonic() + TIMEOUT
+        while batcher.stats()['queue_depths'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert batcher.stats()['queue_depths'] == {}
+        # المفتاح المحذوف يفسح المجال لمفتاح جديد
+        assert batcher.submit('b', 3, 1, batch_fn) == 6
+
+    def test_bucket(self):
+        assert [MicroBatcher._bucket(n) for n in (1, 2, 3, 5, 64, 65)] == [1, 2, 4, 8, 64, 128]
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Preprocessing Tests
+اختبارات المعالجة المسبقة ومطابقة التدريب للتنبؤ
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.data_utils import DataPreprocessor, load_data, preprocess_data
+
+
+@pytest.fixture
+def frame():
+    """بيانات مختلطة: رقمية، منطقية، فئوية بقيم مفقودة"""
+    return pd.DataFrame({
+        'x': [1.0, 2.5, 3.0, 4.5, 5.0, 6.5],
+        'flag': [True, False, True, True, False, False],
+        'color': ['red', 'blue', np.nan, 'red', 'green', 'blue'],
+        'target': [0, 1, 0, 1, 0, 1]
+    })
+
+
+class TestPreprocessData:
+    """Training output must equal what the saved preprocessor produces"""
+
+    @pytest.mark.parametrize('scale_features', [True, False])
+    @pytest.mark.parametrize('encode_categorical', [True, False])
+    def test_training_matches_transform(self, frame, scale_features, encode_categorical):
+        X = frame.drop(columns=['target'])
+        processed, preprocessor = preprocess_data(
+            X, scale_features=scale_features, encode_categorical=encode_categorical,
+            return_transformers=True
+        )
+        features = preprocessor.transform(X)
+        pd.testing.assert_frame_equal(processed[features.columns], features)
+
+    def test_bool_columns_are_scaled(self, frame):
+        X = frame.drop(columns=['target'])
+        processed = preprocess_data(X)
+        assert processed['flag'].mean() == pytest.approx(0.0)
+        assert processed['flag'].std(ddof=0) == pytest.approx(1.0)
+
+    def test_unencoded_columns_pass_through_in_order(self):
+        data = pd.DataFrame({
+            'y': [0, 1, 0, 1],
+            'a': [1.0, 2.0, 3.0, 4.0],
+            'c': ['u', 'v', 'u', 'w'],
+            'd': pd.to_datetime(['2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01'])
+        })
+        processed = preprocess_data(data, target_column='y', encode_categorical=False)
+        assert list(processed.columns) == ['y', 'a', 'c', 'd']
+        pd.testing.assert_series_equal(processed['c'], data['c'])
+        pd.testing.assert_series_equal(processed['d'], data['d'])
+        assert processed['a'].mean() == pytest.approx(0.0)
+
+    def test_target_column_keeps_its_position(self, frame):
+        processed = preprocess_data(frame, target_column='target')
+        assert list(processed.columns) == list(frame.columns)
+        assert processed['target'].tolist() == frame['target'].tolist()
+        assert 'target' not in DataPreprocessor('target').fit(frame).get_feature_names_out()
+
+    def test_input_is_not_modified(self, frame):
+        original = frame.copy()
+        preprocess_data(frame, target_column='target')
+        pd.testing.assert_frame_equal(frame, original)
+
+
+class TestCategoricalEncoding:
+    """Missing values keep the 'nan' label of the original LabelEncoder path"""
+
+    def test_missing_values_form_a_category(self, frame):
+        preprocessor = DataPreprocessor(scale_features=False).fit(frame[['color']])
+        codes = preprocessor.transform(frame[['color']])['color'].tolist()
+        # الترتيب الأبجدي: blue, green, nan, red
+        assert codes == [3.0, 0.0, 2.0, 3.0, 1.0, 0.0]
+
+    def test_none_and_nan_share_a_code(self):
+        train = pd.DataFrame({'c': pd.Series(['a', None, 'b'], dtype=object)})
+        preprocessor = DataPreprocessor(scale_features=False).fit(train)
+        codes = preprocessor.transform(pd.DataFrame({'c': ['a', np.nan, 'b']}))['c'].tolist()
+        assert codes == preprocessor.transform(train)['c'].tolist()
+
+    def test_unknown_category_is_minus_one(self, frame):
+        preprocessor = DataPreprocessor(scale_features=False).fit(frame[['color']])
+        assert preprocessor.transform(pd.DataFrame({'color': ['purple']}))['color'].tolist() == [-1.0]
+
+    def test_partial_fit_matches_fit(self, frame):
+        full = DataPreprocessor('target').fit(frame)
+        chunked = DataPreprocessor('target').partial_fit(frame.iloc[:3]).partial_fit(frame.iloc[3:])
+        np.testing.assert_allclose(chunked.transform_array(frame), full.transform_array(frame))
+
+
+class TestLoadDataCache:
+    """The Parquet copy of a CSV is keyed by the read options"""
+
+    @pytest.fixture
+    def csv_path(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        path = tmp_path / 'data.csv'
+        pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']}).to_csv(path, index=False)
+        return str(path)
+
+    def test_dtype_change_is_not_served_from_cache(self, csv_path):
+        assert load_data(csv_path, cache=True)['a'].dtype == np.int64
+        assert load_data(csv_path, cache=True, dtype={'a': 'float32'})['a'].dtype == np.float32
+        assert load_data(csv_path, cache=True)['a'].dtype == np.int64
+
+    def test_equivalent_dtypes_share_a_cache_file(self, csv_path, tmp_path):
+        load_data(csv_path, cache=True, dtype={'a': 'float32'})
+        load_data(csv_path, cache=True, dtype={'a': np.float32})
+        assert len(list(tmp_path.glob('.data.csv*.parquet'))) == 1
+
+    def test_cache_requires_pyarrow(self, csv_path, monkeypatch):
+        from ml import data_utils
+        monkeypatch.setattr(data_utils, 'PYARROW_AVAILABLE', False)
+        with pytest.raises(ImportError, match='pyarrow'):
+            load_data(csv_path, cache=True)
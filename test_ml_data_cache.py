@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Prepared Data Cache Tests
+اختبارات ذاكرة البيانات المعالجة حسب بصمة الملف
+"""
+
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import data_cache
+from ml.data_cache import file_fingerprint, load_prepared_data, prune_data_cache
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'iris.csv'
+    shutil.copy('sample_data/iris.csv', path)
+    return str(path)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+class TestFileFingerprint:
+    """Content hash of a data file"""
+
+    def test_same_content_same_fingerprint(self, data_path, tmp_path):
+        copy = tmp_path / 'copy.csv'
+        shutil.copy(data_path, copy)
+        assert file_fingerprint(data_path) == file_fingerprint(str(copy))
+
+    def test_changed_content_changes_fingerprint(self, data_path):
+        before = file_fingerprint(data_path)
+        with open(data_path, 'a', encoding='utf-8') as f:
+            f.write('5.0,3.0,1.5,0.2,setosa\n')
+        assert file_fingerprint(data_path) != before
+
+
+class TestLoadPreparedData:
+    """Second call reads the saved result instead of preprocessing again"""
+
+    def test_cached_result_matches_first_call(self, data_path, cache_dir):
+        first = load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        second = load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        for a, b in zip(first[:4], second[:4]):
+            np.testing.assert_array_equal(np.asarray(a), np.asarray(b))
+            np.testing.assert_array_equal(a.index, b.index)
+        raw = pd.read_csv(data_path)
+        np.testing.assert_allclose(first[4].transform_array(raw), second[4].transform_array(raw))
+
+    def test_options_are_part_of_the_key(self, data_path, cache_dir):
+        load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        load_prepared_data(data_path, 'species', test_size=0.3, cache_dir=cache_dir)
+        load_prepared_data(data_path, 'species', scale_features=False, cache_dir=cache_dir)
+        assert len(os.listdir(cache_dir)) == 3
+
+    def test_training_features_match_preprocessor(self, data_path):
+        X_train, X_test, _, _, preprocessor = load_prepared_data(data_path, 'species', use_cache=False)
+        raw = pd.read_csv(data_path).drop(columns=['species'])
+        pd.testing.assert_frame_equal(X_test, preprocessor.transform(raw.loc[X_test.index]))
+        assert X_train.mean().abs().max() < 1e-9
+
+    def test_low_memory_returns_float32(self, data_path, cache_dir):
+        X_train, X_test, y_train, y_test, preprocessor = load_prepared_data(
+            data_path, 'species', low_memory=True, cache_dir=cache_dir
+        )
+        assert set(X_train.dtypes) == {np.dtype(np.float32)}
+        assert len(X_train) + len(X_test) == len(y_train) + len(y_test) == 150
+        assert X_train.shape[1] == len(preprocessor.get_feature_names_out())
+
+    def test_clustering_keeps_all_rows(self, data_path):
+        X, X_test, y_train, y_test, _ = load_prepared_data(
+            data_path, 'species', task_type='clustering', use_cache=False
+        )
+        assert len(X) == 150
+        assert X_test is None and y_train is None and y_test is None
+
+
+class TestCacheSize:
+    """The cache directory is kept under CACHE_MAX_MB"""
+
+    def _entries(self, cache_dir):
+        return sorted(os.listdir(cache_dir))
+
+    def test_oldest_entry_is_evicted(self, data_path, cache_dir, monkeypatch):
+        load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        first = self._entries(cache_dir)
+        time.sleep(0.01)
+        load_prepared_data(data_path, 'species', test_size=0.3, cache_dir=cache_dir)
+        second = sorted(set(self._entries(cache_dir)) - set(first))
+        # حد أصغر من نسختين: تبقى الأحدث فقط
+        monkeypatch.setattr(data_cache, 'CACHE_MAX_MB', 1e-6)
+        time.sleep(0.01)
+        load_prepared_data(data_path, 'species', scale_features=False, cache_dir=cache_dir)
+        remaining = self._entries(cache_dir)
+        assert len(remaining) == 1
+        assert remaining[0] not in first + second
+
+    def test_cache_hit_counts_as_use(self, data_path, cache_dir):
+        load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        first = self._entries(cache_dir)
+        time.sleep(0.01)
+        load_prepared_data(data_path, 'species', test_size=0.3, cache_dir=cache_dir)
+        time.sleep(0.01)
+        load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        size = sum(data_cache._directory_size(os.path.join(cache_dir, name))
+                   for name in self._entries(cache_dir))
+        assert prune_data_cache(cache_dir, max_mb=(size - 1) / 1024 / 1024) == 1
+        assert self._entries(cache_dir) == first
+
+    def test_zero_disables_the_limit(self, data_path, cache_dir):
+        load_prepared_data(data_path, 'species', cache_dir=cache_dir)
+        assert prune_data_cache(cache_dir, max_mb=0) == 0
+        assert len(self._entries(cache_dir)) == 1
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Background Job Tests
+اختبارات مهام التدريب غير المتزامنة وإلغائها
+"""
+
+import threading
+
+import pytest
+
+from ml.batching import QueueFullError
+from ml.jobs import Job, JobManager
+
+TIMEOUT = 10
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, max_pending=3)
+    yield manager
+    manager._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _blocking(started, release):
+    """مهمة تنتظر إذن المتابعة وتبلغ تقدمها أثناء الانتظار"""
+    def fn(params, report):
+        started.set()
+        while not release.wait(0.01):
+            report({'stage': 'waiting'})
+        return {'done': True}
+    return fn
+
+
+class TestJobManager:
+    """Job lifecycle"""
+
+    def test_completed_job(self, manager):
+        job = manager.submit('train', lambda params, report: {'value': params['x'] * 2}, {'x': 21})
+        job.future.result(timeout=TIMEOUT)
+        info = job.to_dict()
+        assert info['status'] == 'completed'
+        assert info['result'] == {'value': 42}
+        assert info['finished_at'] >= info['started_at']
+
+    def test_failed_job_records_error(self, manager):
+        def fail(params, report):
+            raise RuntimeError('boom')
+        job = manager.submit('train', fail, {})
+        job.future.result(timeout=TIMEOUT)
+        assert job.status == 'failed'
+        assert job.error == 'boom'
+
+    def test_queue_depth_is_bounded(self, manager):
+        started, release = threading.Event(), threading.Event()
+        jobs = [manager.submit('train', _blocking(started, release), {}) for _ in range(3)]
+        with pytest.raises(QueueFullError):
+            manager.submit('train', _blocking(started, release), {})
+        release.set()
+        for job in jobs:
+            job.future.result(timeout=TIMEOUT)
+        assert manager.stats()['completed'] == 3
+
+
+class TestCancel:
+    """Cancelled jobs always end in a terminal state"""
+
+    def test_cancel_queued_job(self, manager):
+        started, release = threading.Event(), threading.Event()
+        running = manager.submit('train', _blocking(started, release), {})
+        queued = manager.submit('train', _blocking(threading.Event(), release), {})
+        assert started.wait(TIMEOUT)
+
+        manager.cancel(queued.id)
+        assert queued.status == 'cancelled'
+        assert queued.finished_at is not None
+        release.set()
+        running.future.result(timeout=TIMEOUT)
+
+    def test_cancel_running_job_stops_at_next_report(self, manager):
+        started, release = threading.Event(), threading.Event()
+        job = manager.submit('train', _blocking(started, release), {})
+        assert started.wait(TIMEOUT)
+
+        manager.cancel(job.id)
+        job.future.result(timeout=TIMEOUT)
+        assert job.status == 'cancelled'
+        assert job.result is None
+        assert job.finished_at is not None
+
+    def test_cancel_after_pickup_before_start(self, manager):
+        """A worker that picks up an already-cancelled job marks it cancelled"""
+        calls = []
+        job = Job('train', {})
+        job.cancel_event.set()
+        manager._run(job, lambda params, report: calls.append(params))
+        assert calls == []
+        assert job.status == 'cancelled'
+        assert job.finished_at is not None
+
+    def test_cancel_unknown_job(self, manager):
+        assert manager.cancel('missing') is None
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Metrics Tests
+اختبارات المقاييس مقارنة بـ sklearn
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+from sklearn.metrics import (
+    accuracy_score, calinski_harabasz_score, classification_report, confusion_matrix,
+    davies_bouldin_score, f1_score, silhouette_samples, silhouette_score
+)
+
+from ml.metrics import (
+    ConfusionAccumulator, classification_metrics, cluster_codes, sampled_silhouette,
+    silhouette_samples_chunked, stratified_cluster_sample
+)
+from ml.predict import evaluate_classification_chunks, evaluate_clustering
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    labels = np.array(['cat', 'dog', 'bird', 'fish'])
+    y_true = labels[rng.integers(0, 4, 500)]
+    y_pred = np.where(rng.random(500) < 0.7, y_true, labels[rng.integers(0, 4, 500)])
+    return y_true, y_pred
+
+
+class TestConfusionAccumulator:
+    """Metrics derived from one confusion matrix match sklearn"""
+
+    def test_matches_sklearn(self, predictions):
+        y_true, y_pred = predictions
+        accumulator = ConfusionAccumulator().update(y_true, y_pred)
+        labels = sorted(set(y_true) | set(y_pred))
+        np.testing.assert_array_equal(accumulator.confusion_matrix,
+                                      confusion_matrix(y_true, y_pred, labels=labels))
+        assert list(accumulator.labels_) == labels
+
+        expected = classification_report(y_true, y_pred, output_dict=True, zero_division=0)
+        report = accumulator.report()
+        for key in labels + ['macro avg', 'weighted avg']:
+            for metric in ('precision', 'recall', 'f1-score', 'support'):
+                assert report[key][metric] == pytest.approx(expected[key][metric])
+        assert report['accuracy'] == pytest.approx(expected['accuracy'])
+
+    def test_chunks_and_merge_equal_single_pass(self, predictions):
+        y_true, y_pred = predictions
+        single = ConfusionAccumulator().update(y_true, y_pred)
+
+        chunked = ConfusionAccumulator()
+        for start in range(0, len(y_true), 64):
+            chunked.update(y_true[start:start + 64], y_pred[start:start + 64])
+        left = ConfusionAccumulator().update(y_true[:100], y_pred[:100])
+        right = ConfusionAccumulator().update(y_true[100:], y_pred[100:])
+        merged = left.merge(right)
+
+        for other in (chunked, merged):
+            assert list(other.labels_) == list(single.labels_)
+            np.testing.assert_array_equal(other.matrix_, single.matrix_)
+
+    def test_fixed_labels_ignore_other_classes(self, predictions):
+        y_true, y_pred = predictions
+        labels = ['cat', 'dog']
+        accumulator = ConfusionAccumulator(labels).update(y_true, y_pred)
+        np.testing.assert_array_equal(accumulator.matrix_, confusion_matrix(y_true, y_pred, labels=labels))
+
+    def test_missing_predicted_class_has_zero_precision(self):
+        metrics = classification_metrics([0, 1, 2, 2], [0, 1, 1, 1])
+        expected = f1_score([0, 1, 2, 2], [0, 1, 1, 1], average='weighted', zero_division=0)
+        assert metrics['f1_score'] == pytest.approx(expected)
+        assert metrics['classification_report']['2']['precision'] == 0.0
+
+    def test_empty_report_raises(self):
+        with pytest.raises(ValueError):
+            ConfusionAccumulator().report()
+
+
+def test_evaluate_classification_chunks(predictions):
+    y_true, y_pred = predictions
+    chunks = ((y_true[i:i + 50], y_pred[i:i + 50]) for i in range(0, len(y_true), 50))
+    metrics = evaluate_classification_chunks(chunks)
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert metrics['f1_score'] == pytest.approx(f1_score(y_true, y_pred, average='weighted'))
+
+
+@pytest.fixture
+def blobs():
+    X, labels = make_blobs(600, 3, centers=[[0, 0, 0], [4, 0, 0], [0, 5, 0], [3, 3, 3]],
+                           cluster_std=[1.0, 1.5, 0.8, 2.0], random_state=0)
+    return X, labels
+
+
+class TestClusteringMetrics:
+    """Scalable clustering metrics match sklearn on full data"""
+
+    def test_full_evaluation_matches_sklearn(self, blobs):
+        X, labels = blobs
+        evaluation = evaluate_clustering(X, labels, sample_size=0)
+        assert evaluation['silhouette_sample_size'] == len(X)
+        assert evaluation['silhouette_score'] == pytest.approx(silhouette_score(X, labels))
+        assert evaluation['silhouette_ci'][0] == pytest.approx(evaluation['silhouette_ci'][1])
+        assert evaluation['calinski_harabasz_score'] == pytest.approx(calinski_harabasz_score(X, labels))
+        assert evaluation['davies_bouldin_score'] == pytest.approx(davies_bouldin_score(X, labels))
+
+    def test_chunked_silhouette_samples(self, blobs):
+        X, labels = blobs
+        codes, _, _ = cluster_codes(labels)
+        scores = silhouette_samples_chunked(X, codes, 4, working_memory_mb=0.01)
+        np.testing.assert_allclose(scores, silhouette_samples(X, labels))
+
+    def test_sampled_estimate_is_close(self, blobs):
+        X, labels = blobs
+        codes, _, _ = cluster_codes(labels)
+        result = sampled_silhouette(X, codes, 4, sample_size=200, random_state=1)
+        exact = silhouette_score(X, labels)
+        assert result['sample_size'] == pytest.approx(200, abs=4)
+        assert result['ci'][0] < result['score'] < result['ci'][1]
+        assert abs(result['score'] - exact) < 0.05
+
+    def test_noise_points_are_excluded(self, blobs):
+        X, labels = blobs
+        noisy = labels.copy()
+        noisy[:25] = -1
+        evaluation = evaluate_clustering(X, noisy, sample_size=0)
+        assert evaluation['n_noise'] == 25
+        assert evaluation['silhouette_score'] == pytest.approx(silhouette_score(X[25:], noisy[25:]))
+
+    def test_single_cluster_is_undefined(self, blobs):
+        X, _ = blobs
+        evaluation = evaluate_clustering(X, np.zeros(len(X), dtype=int), sample_size=0)
+        assert evaluation['silhouette_score'] is None
+        assert evaluation['calinski_harabasz_score'] is None
+
+    def test_stratified_sample_keeps_small_clusters(self):
+        codes = np.array([0] * 1000 + [1] * 3)
+        positions = stratified_cluster_sample(codes, 50, min_per_cluster=2)
+        assert np.bincount(codes[positions]).tolist() == [50, 2]
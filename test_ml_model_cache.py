@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Model Cache Tests
+اختبارات ذاكرة النماذج المؤقتة (LRU)
+"""
+
+import os
+
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.tree import DecisionTreeClassifier
+
+from ml.model_cache import ModelCache, load_model_file
+from ml.models import save_model
+
+
+def _write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+@pytest.fixture
+def loads():
+    """سجل استدعاءات دالة التحميل"""
+    return []
+
+
+@pytest.fixture
+def cache(loads):
+    def loader(path):
+        loads.append(path)
+        with open(path, 'rb') as f:
+            return f.read()
+    return ModelCache(max_bytes=100, loader=loader)
+
+
+class TestModelCache:
+    """LRU cache keyed by path, mtime and size"""
+
+    def test_hit_after_first_load(self, cache, loads, tmp_path):
+        path = _write(tmp_path / 'a.pkl', b'a' * 10)
+        assert cache.get(path) == b'a' * 10
+        assert cache.get(path) == b'a' * 10
+        assert len(loads) == 1
+        assert cache.stats()['hits'] == 1
+
+    def test_changed_file_is_reloaded(self, cache, loads, tmp_path):
+        path = _write(tmp_path / 'a.pkl', b'a' * 10)
+        cache.get(path)
+        _write(tmp_path / 'a.pkl', b'b' * 12)
+        assert cache.get(path) == b'b' * 12
+        assert len(loads) == 2
+        assert cache.stats()['current_mb'] * 1024 * 1024 == pytest.approx(12)
+
+    def test_least_recently_used_is_evicted(self, cache, loads, tmp_path):
+        first = _write(tmp_path / 'a.pkl', b'a' * 40)
+        second = _write(tmp_path / 'b.pkl', b'b' * 40)
+        third = _write(tmp_path / 'c.pkl', b'c' * 40)
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+        models = cache.stats()['models']
+        assert os.path.abspath(second) not in models
+        assert os.path.abspath(first) in models
+        assert cache.evictions == 1
+
+    def test_oversized_model_is_not_cached(self, cache, loads, tmp_path):
+        path = _write(tmp_path / 'big.pkl', b'x' * 200)
+        cache.get(path)
+        cache.get(path)
+        assert len(loads) == 2
+        assert cache.stats()['entries'] == 0
+
+    def test_invalidate(self, cache, loads, tmp_path):
+        path = _write(tmp_path / 'a.pkl', b'a' * 10)
+        cache.get(path)
+        cache.invalidate(path)
+        cache.get(path)
+        assert len(loads) == 2
+        cache.invalidate()
+        assert cache.stats()['entries'] == 0
+        assert cache.current_bytes == 0
+
+    def test_missing_file(self, cache, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            cache.get(str(tmp_path / 'missing.pkl'))
+
+    def test_warm_skips_missing_files(self, cache, tmp_path):
+        path = _write(tmp_path / 'a.pkl', b'a' * 10)
+        assert cache.warm([path, str(tmp_path / 'missing.pkl'), '']) == [path]
+
+
+def test_load_model_file_round_trip(tmp_path):
+    X, y = make_classification(50, 4, random_state=0)
+    model = DecisionTreeClassifier(random_state=0).fit(X, y)
+    path = str(tmp_path / 'tree_model.pkl')
+    save_model(model, path)
+    loaded = load_model_file(path)
+    assert (loaded.predict(X) == model.predict(X)).all()
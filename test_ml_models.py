@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Streaming Training Tests
+اختبارات التدريب خارج الذاكرة على دفعات
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.models import train_algorithm_streaming
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """ملف CSV بهدف مفقود في بعض الصفوف (منها دفعة كاملة)"""
+    rng = np.random.default_rng(0)
+    n = 60
+    frame = pd.DataFrame({
+        'x1': rng.normal(size=n),
+        'x2': rng.normal(size=n),
+        'color': rng.choice(['red', 'blue'], size=n),
+    })
+    frame['label'] = np.where(frame['x1'] > 0, 'pos', 'neg').astype(object)
+    frame['value'] = frame['x1'] * 2.0 + frame['x2']
+    missing = [3, 17, 33] + list(range(40, 50))
+    frame.loc[missing, ['label', 'value']] = np.nan
+    path = tmp_path / 'data.csv'
+    frame.to_csv(path, index=False)
+    return str(path), n - len(missing)
+
+
+class TestStreamingTraining:
+    """Rows with a missing target are dropped in both passes"""
+
+    def test_classification_skips_missing_targets(self, data_file):
+        path, n_labeled = data_file
+        model, info = train_algorithm_streaming(path, 'label', 'sgd_classifier', 'classification',
+                                                chunksize=10, random_state=0)
+        assert info['classes'] == ['neg', 'pos']
+        assert info['n_rows'] == n_labeled
+        assert list(model.classes_) == ['neg', 'pos']
+        # الدفعة 40-49 بلا أهداف فلا تُدرَّب
+        assert len(info['history']) == 5
+
+    def test_regression_skips_missing_targets(self, data_file):
+        path, n_labeled = data_file
+        _, info = train_algorithm_streaming(path, 'value', 'passive_aggressive_regressor', 'regression',
+                                            chunksize=10, random_state=0)
+        assert info['n_rows'] == n_labeled
+        assert info['preprocessor'].n_samples_seen_ == n_labeled
+
+    def test_requires_partial_fit(self, data_file):
+        path, _ = data_file
+        with pytest.raises(ValueError, match='partial_fit'):
+            train_algorithm_streaming(path, 'label', 'decision_tree', 'classification')
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Batch Text Prediction Tests
+اختبارات التنبؤ الدفعي بالنصوص والاستئناف
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml.nlp_utils import TextClassifier
+
+
+class _Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    """مصنف مدرب على بيانات صغيرة"""
+    words = {'pos': ['good', 'great', 'fine', 'nice'], 'neg': ['bad', 'awful', 'poor', 'sad']}
+    rows = [{'text': f'{a} {b} day', 'label': label}
+            for label, vocab in words.items() for a in vocab for b in vocab]
+    data_path = tmp_path / 'train.csv'
+    pd.DataFrame(rows).to_csv(data_path, index=False)
+    model = TextClassifier(model_path=str(tmp_path / 'nlp_model.pkl'))
+    model.train(str(data_path), 'text', 'label')
+    return model
+
+
+@pytest.fixture
+def texts_file(tmp_path):
+    path = tmp_path / 'texts.csv'
+    texts = [f'{w} day {i}' for i, w in enumerate(['good', 'bad', 'nice', 'sad', 'great'] * 5)]
+    pd.DataFrame({'text': texts}).to_csv(path, index=False)
+    return str(path)
+
+
+class TestColumnarOutput:
+    """Columnar and record outputs carry the same predictions"""
+
+    def test_columnar_matches_records(self, classifier):
+        texts = ['good day', 'bad day', 'nice great']
+        frame = classifier.predict(texts, columnar=True)
+        records = classifier.predict(texts)
+        assert frame['prediction'].tolist() == [r['prediction'] for r in records]
+        np.testing.assert_allclose(frame['confidence'], [r['confidence'] for r in records])
+        assert list(frame.columns) == ['text', 'prediction', 'confidence', 'prob_neg', 'prob_pos']
+
+    def test_csv_and_parquet_outputs_match(self, classifier, texts_file, tmp_path):
+        pytest.importorskip('pyarrow')
+        classifier.predict_batch(texts_file, str(tmp_path / 'out.csv'), chunk_size=4)
+        classifier.predict_batch(texts_file, str(tmp_path / 'out.parquet'), chunk_size=4)
+        csv = pd.read_csv(tmp_path / 'out.csv')
+        parquet = pd.read_parquet(tmp_path / 'out.parquet')
+        assert len(csv) == 25
+        assert csv['prediction'].tolist() == parquet['prediction'].tolist()
+
+    def test_in_memory_results(self, classifier, texts_file):
+        results = classifier.predict_batch(texts_file, chunk_size=7, include_text=False)
+        assert len(results) == 25
+        assert set(results[0]) == {'prediction', 'confidence', 'probabilities'}
+
+    def test_no_output_and_no_results_is_rejected(self, classifier, texts_file):
+        with pytest.raises(ValueError, match='output_file'):
+            classifier.predict_batch(texts_file, return_results=False)
+
+
+class TestResume:
+    """An interrupted CSV batch continues from its last completed chunk"""
+
+    def _interrupt_after(self, n_chunks):
+        def callback(progress):
+            if progress['chunk'] == n_chunks:
+                raise _Interrupted()
+        return callback
+
+    def test_resume_produces_same_output(self, classifier, texts_file, tmp_path):
+        expected_path = str(tmp_path / 'expected.csv')
+        output_path = str(tmp_path / 'out.csv')
+        classifier.predict_batch(texts_file, expected_path, chunk_size=4)
+
+        with pytest.raises(_Interrupted):
+            classifier.predict_batch(texts_file, output_path, chunk_size=4,
+                                     progress_callback=self._interrupt_after(3))
+        # دفعة مكتوبة جزئيًا بعد آخر نقطة حفظ
+        with open(output_path, 'a', encoding='utf-8') as f:
+            f.write('partial row,')
+
+        summary = classifier.predict_batch(texts_file, output_path, chunk_size=4, resume=True)
+        assert summary['resumed'] is True
+        assert summary['n_rows'] == 25
+        pd.testing.assert_frame_equal(pd.read_csv(output_path), pd.read_csv(expected_path))
+        assert not (tmp_path / 'out.csv.progress.json').exists()
+
+    def test_checkpoint_for_other_chunk_size_is_ignored(self, classifier, texts_file, tmp_path):
+        output_path = str(tmp_path / 'out.csv')
+        with pytest.raises(_Interrupted):
+            classifier.predict_batch(texts_file, output_path, chunk_size=4,
+                                     progress_callback=self._interrupt_after(2))
+        summary = classifier.predict_batch(texts_file, output_path, chunk_size=5, resume=True)
+        assert summary['resumed'] is False
+        assert len(pd.read_csv(output_path)) == 25
+
+    def test_resume_requires_csv(self, classifier, texts_file, tmp_path):
+        with pytest.raises(ValueError, match='CSV'):
+            classifier.predict_batch(texts_file, str(tmp_path / 'out.parquet'), resume=True)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Report Plotting Tests
+اختبارات رسم التقارير دون واجهة رسومية
+"""
+
+import numpy as np
+import pytest
+
+from ml import plotting
+from ml.plotting import PlotRenderer, downsample_points, render
+
+
+@pytest.fixture
+def renderer():
+    renderer = PlotRenderer(max_workers=1, pool='thread')
+    yield renderer
+    renderer.shutdown()
+
+
+class TestDownsample:
+    """Fixed-seed point sampling for scatter plots"""
+
+    def test_small_input_is_unchanged(self):
+        x, y, total = downsample_points([1, 2, 3], [4, 5, 6], max_points=10)
+        assert x.tolist() == [1, 2, 3] and y.tolist() == [4, 5, 6] and total == 3
+
+    def test_large_input_is_sampled_in_order(self):
+        x = np.arange(1000)
+        xs, ys, total = downsample_points(x, x * 2, max_points=100)
+        assert total == 1000
+        assert len(xs) == 100
+        assert (np.diff(xs) > 0).all()
+        assert (ys == xs * 2).all()
+
+    def test_same_seed_same_sample(self):
+        x = np.arange(1000)
+        assert (downsample_points(x, x, 50)[0] == downsample_points(x, x, 50)[0]).all()
+        assert (downsample_points(x, x, 50, random_state=1)[0] != downsample_points(x, x, 50)[0]).any()
+
+
+class TestRender:
+    """Rendering entry points"""
+
+    def test_unknown_kind(self, renderer):
+        with pytest.raises(ValueError):
+            render('histogram')
+        with pytest.raises(ValueError):
+            renderer.submit('histogram')
+
+    def test_unknown_pool(self):
+        with pytest.raises(ValueError):
+            PlotRenderer(pool='gpu')
+
+    @pytest.mark.skipif(plotting.MATPLOTLIB_AVAILABLE, reason='matplotlib is installed')
+    def test_missing_matplotlib_raises_import_error(self, renderer):
+        future = renderer.submit('confusion_matrix', y_true=[0, 1], y_pred=[0, 1])
+        with pytest.raises(ImportError, match='matplotlib'):
+            future.result(timeout=10)
+
+    @pytest.mark.skipif(not plotting.MATPLOTLIB_AVAILABLE, reason='matplotlib is not installed')
+    def test_render_many(self, renderer):
+        rng = np.random.default_rng(0)
+        y = rng.normal(size=20000)
+        images = renderer.render_many([
+            {'kind': 'confusion_matrix', 'y_true': [0, 1, 1, 2], 'y_pred': [0, 1, 2, 2]},
+            {'kind': 'regression_results', 'y_true': y, 'y_pred': y + rng.normal(size=20000),
+             'max_points': 500, 'fmt': 'svg'}
+        ], timeout=60)
+        assert images[0].startswith(b'\x89PNG')
+        assert b'<svg' in images[1]
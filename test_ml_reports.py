@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Prediction Report Tests
+اختبارات ملفات التنبؤات الجانبية وقراءتها صفحة صفحة
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+
+from ml.predict import generate_prediction_report, read_prediction_rows, report_file_path
+
+
+@pytest.fixture
+def fitted():
+    X, y = make_classification(300, 4, n_informative=3, n_redundant=0, n_classes=3, random_state=0)
+    return LogisticRegression().fit(X, y), X, y
+
+
+@pytest.fixture(params=['npy', 'parquet'])
+def report(request, fitted, tmp_path):
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+    model, X, y = fitted
+    return generate_prediction_report(model, X, y, output_format=request.param, report_dir=str(tmp_path))
+
+
+class TestSideFile:
+    """Predictions are written to a side file instead of the report body"""
+
+    def test_report_has_summary_only(self, report, fitted):
+        model, X, _ = fitted
+        assert 'predictions' not in report
+        info = report['predictions_file']
+        assert info['n_rows'] == len(X)
+        assert info['columns'] == ['prediction', 'actual', 'prob_0', 'prob_1', 'prob_2']
+        assert sum(report['summary']['prediction_counts'].values()) == len(X)
+
+    def test_pages_cover_all_rows(self, report, fitted):
+        model, X, y = fitted
+        path = report['predictions_file']['path']
+        rows, offset = [], 0
+        while offset is not None:
+            page = read_prediction_rows(path, offset=offset, limit=70)
+            assert page['total'] == len(X)
+            rows.extend(page['rows'])
+            offset = page['next_offset']
+        assert [r['prediction'] for r in rows] == model.predict(X).tolist()
+        assert [r['actual'] for r in rows] == y.tolist()
+        np.testing.assert_allclose([r['prob_1'] for r in rows], model.predict_proba(X)[:, 1], rtol=1e-6)
+
+    def test_page_past_the_end_is_empty(self, report):
+        page = read_prediction_rows(report['predictions_file']['path'], offset=1000, limit=10)
+        assert page['rows'] == [] and page['next_offset'] is None
+
+    def test_lookup_by_report_id(self, report, tmp_path):
+        info = report['predictions_file']
+        assert report_file_path(info['report_id'], str(tmp_path)) == info['path']
+
+
+class TestReadPredictionRows:
+    """Argument validation"""
+
+    @pytest.mark.parametrize('offset,limit', [(-1, 10), (0, 0), (0, 100000)])
+    def test_invalid_page(self, offset, limit, tmp_path):
+        with pytest.raises(ValueError):
+            read_prediction_rows(str(tmp_path / 'missing.npy'), offset, limit)
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            read_prediction_rows(str(tmp_path / 'missing.npy'))
+
+    @pytest.mark.parametrize('report_id', ['../../etc/passwd', 'abc', '0' * 31 + 'g'])
+    def test_invalid_report_id(self, report_id, tmp_path):
+        assert report_file_path(report_id, str(tmp_path)) is None
+
+
+def test_inline_report_keeps_predictions(fitted):
+    model, X, y = fitted
+    report = generate_prediction_report(model, X, y)
+    assert len(report['predictions']) == len(X)
+    assert len(report['probabilities']) == len(X)
+
+
+def test_report_endpoints(tmp_path, monkeypatch):
+    """/reports writes the side file and /reports/<id>/rows pages through it"""
+    import importlib
+
+    import pandas as pd
+
+    import app as peerai_app
+    from ml.models import save_model
+
+    # ml.predict هو أيضًا اسم دالة معاد تصديرها في ml
+    monkeypatch.setattr(importlib.import_module('ml.predict'), 'REPORT_DIR', str(tmp_path / 'reports'))
+    frame = pd.read_csv('sample_data/iris.csv')
+    model_path = str(tmp_path / 'iris_model.pkl')
+    save_model(LogisticRegression(max_iter=500).fit(frame.drop(columns=['species']), frame['species']),
+               model_path)
+
+    client = peerai_app.app.test_client()
+    response = client.post('/reports', json={
+        'model_path': model_path, 'data_path': 'sample_data/iris.csv', 'target': 'species'
+    })
+    assert response.status_code == 200
+    report_id = response.get_json()['report']['predictions_file']['report_id']
+
+    page = client.get(f'/reports/{report_id}/rows?offset=140&limit=20').get_json()
+    assert page['total'] == 150
+    assert len(page['rows']) == 10
+    assert page['rows'][-1]['actual'] == frame['species'].iloc[-1]
+    assert client.get(f'/reports/{report_id}/rows?limit=0').status_code == 400
+    assert client.get(f"/reports/{'0' * 32}/rows").status_code == 404
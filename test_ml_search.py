@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Hyperparameter Search Tests
+اختبارات البحث عن المعاملات وحفظ نتائج الطيات
+"""
+
+import os
+import shutil
+
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from ml import search
+from ml.search import FoldScoreCache, hyperparameter_search
+
+
+@pytest.fixture
+def dataset():
+    return make_classification(120, 5, random_state=0)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """نتائج الطيات في مجلد مؤقت لكل اختبار"""
+    monkeypatch.setattr(search, 'CACHE_DIR', str(tmp_path / 'search'))
+    return tmp_path / 'search'
+
+
+class TestFailedFits:
+    """A failing candidate is recorded as NaN instead of aborting the search"""
+
+    def test_unsupported_penalty_is_skipped(self, dataset):
+        X, y = dataset
+        model, info = hyperparameter_search(
+            LogisticRegression(), X, y, {'penalty': ['l1', 'l2']}, cv=3, n_jobs=1,
+            dataset_fingerprint='data'
+        )
+        assert info['best_params'] == {'penalty': 'l2'}
+        assert info['n_failed'] == 3
+        failed = info['results'][-1]
+        assert failed['params'] == {'penalty': 'l1'}
+        assert failed['mean_score'] is None
+        assert failed['n_failed_folds'] == 3
+        assert 'lbfgs' in failed['error']
+        assert model.get_params()['penalty'] == 'l2'
+
+    def test_failures_are_not_cached(self, dataset):
+        X, y = dataset
+        grid = {'penalty': ['l1', 'l2']}
+        hyperparameter_search(LogisticRegression(), X, y, grid, cv=3, n_jobs=1, dataset_fingerprint='data')
+        _, info = hyperparameter_search(LogisticRegression(), X, y, grid, cv=3, n_jobs=1,
+                                        dataset_fingerprint='data')
+        assert info['n_cached'] == 3
+        assert info['n_computed'] == 3
+
+    def test_all_candidates_failing_raises(self, dataset):
+        X, y = dataset
+        with pytest.raises(ValueError, match='All 1 search candidates failed'):
+            hyperparameter_search(LogisticRegression(), X, y, {'penalty': ['l1']}, cv=3, n_jobs=1,
+                                  use_cache=False)
+
+    def test_warm_start_group_failure(self, dataset):
+        X, y = dataset
+        _, info = hyperparameter_search(
+            RandomForestClassifier(random_state=0), X, y,
+            {'n_estimators': [3, 6], 'max_depth': [2, -1]}, cv=2, n_jobs=1, use_cache=False
+        )
+        assert info['best_params']['max_depth'] == 2
+        assert info['n_failed'] == 4
+        assert all(r['mean_score'] is None for r in info['results'] if r['params']['max_depth'] == -1)
+
+
+class TestFoldScoreCache:
+    """Fold results are reused across searches"""
+
+    def test_second_search_is_fully_cached(self, dataset):
+        X, y = dataset
+        grid = {'C': [0.1, 1.0]}
+        _, first = hyperparameter_search(LogisticRegression(), X, y, grid, cv=3, n_jobs=1,
+                                         dataset_fingerprint='data')
+        _, second = hyperparameter_search(LogisticRegression(), X, y, grid, cv=3, n_jobs=1,
+                                          dataset_fingerprint='data')
+        assert first['n_computed'] == 6
+        assert second['n_cached'] == 6 and second['n_computed'] == 0
+        assert second['best_score'] == first['best_score']
+
+    def test_key_ignores_param_order(self):
+        assert FoldScoreCache.key({'a': 1, 'b': 2}, 0) == FoldScoreCache.key({'b': 2, 'a': 1}, 0)
+
+
+class TestTrainEndpoint:
+    """/train with search options"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """/train يكتب النماذج والذاكرة المؤقتة نسبةً إلى مجلد العمل، فيُنقل إلى مجلد مؤقت"""
+        import app as peerai_app
+        (tmp_path / 'sample_data').mkdir()
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_data', 'iris.csv'),
+                    tmp_path / 'sample_data' / 'iris.csv')
+        monkeypatch.chdir(tmp_path)
+        return peerai_app.app.test_client()
+
+    def test_failing_candidate_does_not_fail_request(self, client):
+        response = client.post('/train', json={
+            'data_path': 'sample_data/iris.csv', 'target': 'species', 'algorithm': 'logistic_regression',
+            'task_type': 'classification', 'use_gridsearch': True, 'cv': 3,
+            'param_grid': {'penalty': ['l1', 'l2']}
+        })
+        assert response.status_code == 200
+        assert response.get_json()['search']['best_params'] == {'penalty': 'l2'}
+
+    def test_legacy_randomized_search_defaults_to_100_iterations(self, client):
+        response = client.post('/train', json={
+            'data_path': 'sample_data/iris.csv', 'target': 'species', 'algorithm': 'decision_tree',
+            'task_type': 'classification', 'use_randomized_search': True, 'cv': 2,
+            'param_distributions': {'max_depth': list(range(1, 31))}
+        })
+        assert response.status_code == 200
+        # 30 مرشحًا (كل الشبكة) بدل 10
+        assert response.get_json()['search']['n_candidates'] == 30
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Bayesian Search Tests
+اختبارات البحث البايزي والدراسات المحفوظة
+"""
+
+import pytest
+from sklearn.datasets import make_classification
+
+from ml import tuning
+from ml.tuning import bayesian_search, is_valid_study_name, study_path_for
+
+
+def _fingerprint(test_size=0.2, target='target'):
+    """بصمة بالصيغة التي يبنيها run_training"""
+    return ':'.join(str(part) for part in ('abc123:4096:1700000000', target, test_size, 42, False, False))
+
+
+class TestStudyPath:
+    """Study file naming"""
+
+    def test_fingerprint_changes_path(self):
+        """Different split settings must not share a study file"""
+        base = study_path_for('random_forest', 'classification', None, _fingerprint())
+        assert study_path_for('random_forest', 'classification', None, _fingerprint(test_size=0.3)) != base
+        assert study_path_for('random_forest', 'classification', None, _fingerprint(target='label')) != base
+        assert study_path_for('random_forest', 'classification', None, _fingerprint()) == base
+
+    def test_named_study_stays_in_study_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tuning, 'STUDY_DIR', str(tmp_path))
+        assert study_path_for('svm', 'classification', 'my_study-1') == str(tmp_path / 'my_study-1.json')
+
+    @pytest.mark.parametrize('name', ['../../escaped', 'a/b', '', 'name.json', '..'])
+    def test_invalid_study_name(self, name):
+        assert not is_valid_study_name(name)
+        with pytest.raises(ValueError):
+            study_path_for('svm', 'classification', name)
+
+
+class TestBayesianSearch:
+    """Resuming studies"""
+
+    def test_separate_fingerprints_do_not_collide(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tuning, 'STUDY_DIR', str(tmp_path))
+        X, y = make_classification(120, 5, random_state=0)
+        space = {'max_depth': {'type': 'int', 'low': 1, 'high': 4}}
+        for test_size in (0.2, 0.3):
+            fingerprint = _fingerprint(test_size=test_size)
+            _, info = bayesian_search(
+                X, y, 'decision_tree', 'classification', space, n_trials=3, cv=2,
+                study_path=study_path_for('decision_tree', 'classification', None, fingerprint),
+                dataset_fingerprint=fingerprint
+            )
+            assert info['n_resumed'] == 0
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_resume_continues_study(self, tmp_path):
+        X, y = make_classification(120, 5, random_state=0)
+        space = {'max_depth': {'type': 'int', 'low': 1, 'high': 4}}
+        path = str(tmp_path / 'study.json')
+        bayesian_search(X, y, 'decision_tree', 'classification', space, n_trials=3, cv=2,
+                        study_path=path, dataset_fingerprint='data')
+        _, info = bayesian_search(X, y, 'decision_tree', 'classification', space, n_trials=5, cv=2,
+                                  study_path=path, dataset_fingerprint='data')
+        assert info['n_resumed'] == 3
+        assert info['n_trials'] == 5
+
+
+def test_train_rejects_unsafe_study_name(tmp_path, monkeypatch):
+    """/train returns 400 instead of writing outside the study directory"""
+    import app as peerai_app
+
+    monkeypatch.setattr(tuning, 'STUDY_DIR', str(tmp_path / 'studies'))
+    client = peerai_app.app.test_client()
+    response = client.post('/train', json={
+        'data_path': 'sample_data/iris.csv', 'target': 'species', 'algorithm': 'decision_tree',
+        'task_type': 'classification', 'use_bayesian_search': True, 'study_name': '../../escaped',
+        'search_space': {'max_depth': [1, 2]}, 'n_trials': 2
+    })
+    assert response.status_code == 400
+    assert not (tmp_path / 'escaped.json').exists()
+
+
+class TestStudySettings:
+    """A resumed study must match every saved setting"""
+
+    SPACE = {'max_depth': {'type': 'int', 'low': 1, 'high': 4}}
+
+    @pytest.fixture
+    def study_path(self, tmp_path):
+        X, y = make_classification(120, 5, random_state=0)
+        path = str(tmp_path / 'study.json')
+        bayesian_search(X, y, 'decision_tree', 'classification', self.SPACE, n_trials=2, cv=2,
+                        study_path=path, dataset_fingerprint='data')
+        return X, y, path
+
+    @pytest.mark.parametrize('changes,setting', [
+        ({'algorithm_name': 'random_forest'}, 'algorithm'),
+        ({'cv': 3}, 'cv'),
+        ({'scoring': 'f1'}, 'scoring'),
+        ({'base_params': {'criterion': 'entropy'}}, 'base_params'),
+    ])
+    def test_changed_setting_is_rejected(self, study_path, changes, setting):
+        X, y, path = study_path
+        kwargs = {'algorithm_name': 'decision_tree', 'cv': 2, 'study_path': path,
+                  'dataset_fingerprint': 'data', **changes}
+        with pytest.raises(ValueError, match=setting):
+            bayesian_search(X, y, task_type='classification', search_space=self.SPACE, n_trials=3, **kwargs)
+
+    def test_changed_dataset_is_rejected(self, study_path):
+        X, y, path = study_path
+        with pytest.raises(ValueError, match='different dataset'):
+            bayesian_search(X, y, 'decision_tree', 'classification', self.SPACE, n_trials=3, cv=2,
+                            study_path=path, dataset_fingerprint='other')
+
+    def test_empty_search_space_is_rejected(self):
+        X, y = make_classification(60, 4, random_state=0)
+        with pytest.raises(ValueError, match='search_space'):
+            bayesian_search(X, y, 'decision_tree', 'classification', {}, n_trials=2, cv=2)
+
+
+def test_train_rejects_empty_search_space(tmp_path, monkeypatch):
+    """/train returns 400 instead of running n_trials identical fits"""
+    import app as peerai_app
+
+    monkeypatch.setattr(tuning, 'STUDY_DIR', str(tmp_path / 'studies'))
+    client = peerai_app.app.test_client()
+    response = client.post('/train', json={
+        'data_path': 'sample_data/iris.csv', 'target': 'species', 'algorithm': 'decision_tree',
+        'task_type': 'classification', 'use_bayesian_search': True, 'n_trials': 2
+    })
+    assert response.status_code == 400
+    assert 'search_space' in response.get_json()['error']
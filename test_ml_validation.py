@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+PeerAI - Cross-Validation Tests
+اختبارات التحقق المتقاطع وتوزيع الطيات المحفوظ
+"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification, make_regression
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.metrics import f1_score, mean_absolute_error
+
+from ml.validation import cross_validate, fold_assignments, fold_metrics
+
+
+class TestFoldAssignments:
+    """Fold numbers per row"""
+
+    @pytest.mark.parametrize('n_splits', [5, 128, 150])
+    def test_every_fold_is_used(self, n_splits, tmp_path):
+        y = np.arange(n_splits * 2, dtype=float)
+        assignments = fold_assignments(y, n_splits, 'regression', cache_dir=str(tmp_path))
+        assert assignments.min() == 0
+        assert np.bincount(assignments).tolist() == [2] * n_splits
+
+    def test_cached_assignments_are_reused(self, tmp_path):
+        _, y = make_classification(100, 4, random_state=0)
+        first = fold_assignments(y, 5, dataset_fingerprint='data', cache_dir=str(tmp_path))
+        assert len(list(tmp_path.iterdir())) == 1
+        second = fold_assignments(y, 5, dataset_fingerprint='data', cache_dir=str(tmp_path))
+        np.testing.assert_array_equal(first, second)
+
+    def test_classification_folds_are_stratified(self, tmp_path):
+        y = np.array([0] * 50 + [1] * 50)
+        assignments = fold_assignments(y, 5, cache_dir=str(tmp_path))
+        for fold in range(5):
+            assert np.bincount(y[assignments == fold]).tolist() == [10, 10]
+
+
+class TestFoldMetrics:
+    """Metrics derived in one pass match sklearn"""
+
+    def test_classification(self):
+        rng = np.random.default_rng(0)
+        y_true, y_pred = rng.integers(0, 3, 200), rng.integers(0, 3, 200)
+        scores = fold_metrics('classification', y_true, y_pred, ['f1'])
+        assert scores['f1'] == pytest.approx(f1_score(y_true, y_pred, average='weighted'))
+
+    def test_regression(self):
+        rng = np.random.default_rng(0)
+        y_true, y_pred = rng.normal(size=100), rng.normal(size=100)
+        scores = fold_metrics('regression', y_true, y_pred, ['mae'])
+        assert scores['mae'] == pytest.approx(mean_absolute_error(y_true, y_pred))
+
+
+class TestCrossValidate:
+    """Parallel cross-validation"""
+
+    def test_multiple_metrics(self, tmp_path):
+        X, y = make_classification(150, 5, random_state=0)
+        result = cross_validate(LogisticRegression(), X, y, cv=3, scoring=['accuracy', 'f1'],
+                                cache_dir=str(tmp_path))
+        assert result['scoring'] == 'accuracy'
+        assert len(result['cv_scores']) == 3
+        assert set(result['metrics']) == {'accuracy', 'f1'}
+        assert [f['fold'] for f in result['folds']] == [0, 1, 2]
+
+    def test_abort_threshold(self, tmp_path):
+        X, y = make_regression(100, 3, noise=0.1, random_state=0)
+        result = cross_validate(LinearRegression(), X, y, cv=5, task_type='regression', scoring='mse',
+                                cache_dir=str(tmp_path), abort_threshold=1e-6, min_folds=2)
+        assert result['aborted'] is True
+        assert result['n_folds_completed'] == 2